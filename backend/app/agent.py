@@ -3,22 +3,65 @@ Claude Agent SDK integration with Context Graph tools.
 Provides MCP tools for querying and updating the context graph.
 """
 
-import json
-from typing import Any
-
-from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient, create_sdk_mcp_server, tool
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, AsyncIterator
+
+import orjson
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+    create_sdk_mcp_server,
+    tool,
+)
 
-from .context_graph_client import context_graph_client
+from .context_graph_client import ContextGraphNotFound, CypherValidationError, context_graph_client
+from .models import GraphData
 from .gds_client import gds_client
 from .vector_client import vector_client
 
+logger = logging.getLogger(__name__)
+
+
+# Shared part of every tool text response
+_TEXT_ENVELOPE = {"type": "text"}
+
+
+def _pack(obj: Any) -> str:
+    """Serialize a tool response compactly (no indentation, fewer tokens for Claude)."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _error_response(message: str) -> dict[str, Any]:
+    """
+    Build a tool error result for an expected failure (bad input, missing entity).
+
+    Tool handlers only catch the context graph's typed errors; anything else
+    propagates and is reported as a tool error by the MCP server.
+    """
+    return {"content": [{**_TEXT_ENVELOPE, "text": message}], "is_error": True}
+
+
+def _missing_args(args: dict[str, Any], *names: str) -> dict[str, Any] | None:
+    """Return an error result if any required argument is missing or empty."""
+    missing = [name for name in names if not args.get(name)]
+    if missing:
+        return _error_response(f"Missing required argument(s): {', '.join(missing)}")
+    return None
+
 
 def slim_properties(props: dict) -> dict:
     """Remove large properties to reduce response size."""
     slim = {}
     for key, value in props.items():
         # Skip embedding vectors
-        if key in ("fast_rp_embedding", "reasoning_embedding", "embedding"):
+        if key in ("fast_rp_embedding", "reasoning_embedding", "description_embedding", "embedding"):
             continue
         # Truncate long strings
         if isinstance(value, str) and len(value) > 200:
@@ -31,44 +74,54 @@ def slim_properties(props: dict) -> dict:
     return slim
 
 
-def get_graph_data_for_entity(entity_id: str, depth: int = 2, limit: int = 30) -> dict:
-    """Get graph visualization data centered on an entity."""
-    try:
-        graph_data = context_graph_client.get_graph_data(
-            center_node_id=entity_id, depth=depth, limit=limit
-        )
-        # Build nodes list first
-        nodes = [
-            {
-                "id": node.id,
-                "labels": node.labels,
-                "properties": slim_properties(node.properties),
-            }
-            for node in graph_data.nodes
-        ]
+def graph_data_to_dict(graph_data: GraphData) -> dict:
+    """Convert GraphData to the slimmed dict shape returned by tools."""
+    # Build nodes list first
+    nodes = [
+        {
+            "id": node.id,
+            "labels": node.labels,
+            "properties": slim_properties(node.properties),
+        }
+        for node in graph_data.nodes
+    ]
+
+    # Create set of node IDs for filtering relationships
+    node_ids = {node["id"] for node in nodes}
+
+    # Only include relationships where both nodes exist
+    relationships = [
+        {
+            "id": rel.id,
+            "type": rel.type,
+            "startNodeId": rel.start_node_id,
+            "endNodeId": rel.end_node_id,
+            "properties": slim_properties(rel.properties),
+        }
+        for rel in graph_data.relationships
+        if rel.start_node_id in node_ids and rel.end_node_id in node_ids
+    ]
 
-        # Create set of node IDs for filtering relationships
-        node_ids = {node["id"] for node in nodes}
+    return {
+        "nodes": nodes,
+        "relationships": relationships,
+    }
 
-        # Only include relationships where both nodes exist
-        relationships = [
-            {
-                "id": rel.id,
-                "type": rel.type,
-                "startNodeId": rel.start_node_id,
-                "endNodeId": rel.end_node_id,
-                "properties": slim_properties(rel.properties),
-            }
-            for rel in graph_data.relationships
-            if rel.start_node_id in node_ids and rel.end_node_id in node_ids
-        ]
 
-        return {
-            "nodes": nodes,
-            "relationships": relationships,
-        }
+def get_graph_data_for_entity(entity_id: str, limit: int = 30) -> dict:
+    """Get graph visualization data (the 2-hop neighbourhood) centered on an entity."""
+    try:
+        # Nodes/relationships arrive already projected by Cypher; only slim the properties
+        graph_data = context_graph_client.get_graph_view(center_node_id=entity_id, limit=limit)
+        for item in graph_data["nodes"]:
+            item["properties"] = slim_properties(item["properties"])
+        for item in graph_data["relationships"]:
+            item["properties"] = slim_properties(item["properties"])
+        return graph_data
+    except ContextGraphNotFound:
+        raise
     except Exception as e:
-        print(f"Error getting graph data for entity {entity_id}: {e}")
+        logger.warning("Error getting graph data for entity %s: %s", entity_id, e)
         return {"nodes": [], "relationships": []}
 
 
@@ -76,40 +129,29 @@ def get_graph_data_for_entity(entity_id: str, depth: int = 2, limit: int = 30) -
 # SYSTEM PROMPT
 # ============================================
 
-CONTEXT_GRAPH_SYSTEM_PROMPT = """You are an AI assistant for a financial institution with access to a Context Graph.
-
-The Context Graph stores decision traces - the reasoning, context, and causal relationships behind every significant decision made in the organization. This enables you to:
+# Kept terse: it is sent with every Claude request
+CONTEXT_GRAPH_SYSTEM_PROMPT = """You are an AI assistant for a financial institution with access to a Context Graph: decision traces recording the reasoning, context and causal links behind every significant decision.
 
-1. **Find Precedents**: Search for similar past decisions to inform current recommendations
-2. **Trace Causality**: Understand how past decisions influenced subsequent outcomes
-3. **Record Decisions**: Create new decision traces with full reasoning context
-4. **Detect Patterns**: Identify fraud patterns and entity duplicates using graph structure
+## Capabilities
+- Find precedents: similar past decisions to inform recommendations
+- Trace causality: how past decisions influenced later outcomes
+- Record decisions: new traces with full reasoning
+- Detect patterns: fraud and duplicate entities via graph structure
 
 ## Key Concepts
-
-**Event Clock vs State Clock**:
-- Traditional systems store the "state clock" - what is true right now
-- The Context Graph stores the "event clock" - what happened, when, and with what reasoning
-
-**Decision Traces**:
-- Every significant decision is recorded with full reasoning
-- Risk factors, confidence scores, and applied policies are captured
-- Causal chains show how decisions influenced each other
+- Event clock: the graph stores what happened, when and why (not just current state)
+- Decision traces: reasoning, risk factors, confidence scores and applied policies; causal chains link decisions
 
 ## Guidelines
+1. Always search for precedents before recommending
+2. Explain your reasoning thoroughly; it becomes part of the decision trace
+3. Cite the specific past decisions that inform a recommendation
+4. Flag needed exceptions or escalations
+5. Use both semantic similarity (text embeddings, meaning) and structural similarity (FastRP graph embeddings, relationship patterns)
+6. Set include_graph=true, or call get_graph_view, only when the user should see the graph
 
-When helping users:
-1. **Always search for precedents** before making recommendations
-2. **Explain your reasoning thoroughly** - this becomes part of the decision trace
-3. **Cite specific past decisions** when they inform your recommendation
-4. **Flag exceptions or escalations** that may be needed
-5. **Consider both structural and semantic similarity** when finding related cases
-
-You have access to tools that leverage both:
-- **Semantic similarity** (text embeddings) - for matching by meaning
-- **Structural similarity** (FastRP graph embeddings) - for matching by relationship patterns
-
-This combination provides insights that are impossible with traditional databases."""
+## Conversation
+Earlier turns arrive as a "Previous conversation:" block of "USER:"/"ASSISTANT:" lines, followed by the current message. Answer the current message, taking the earlier turns into account."""
 
 
 # ============================================
@@ -140,66 +182,83 @@ def merge_graph_data(graphs: list[dict], max_nodes: int = 50, max_rels: int = 75
     }
 
 
+async def _fetch_graph(entity_id: str, include_graph: bool) -> dict | None:
+    """
+    Fetch graph visualization data for an entity only when the caller will render it.
+
+    The graph is an extra, so a missing center node gives None instead of failing the tool.
+    """
+    if not include_graph:
+        return None
+    try:
+        return await asyncio.to_thread(get_graph_data_for_entity, entity_id)
+    except ContextGraphNotFound as e:
+        logger.warning("No graph data for %s: %s", entity_id, e)
+        return None
+
+
 @tool(
     "search_customer",
     "Search for customers by name, email, or account number. Returns customer profiles with risk scores and related account counts.",
-    {"query": str, "limit": int},
+    {"query": str, "limit": int, "include_graph": bool},
 )
 async def search_customer(args: dict[str, Any]) -> dict[str, Any]:
     """Search for customers in the context graph."""
-    try:
-        results = context_graph_client.search_customers(
-            query=args["query"], limit=args.get("limit", 10)
+    if error := _missing_args(args, "query"):
+        return error
+    if not args.get("include_graph", False):
+        results = await asyncio.to_thread(
+            context_graph_client.search_customers,
+            query=args["query"],
+            limit=args.get("limit", 10),
         )
-        # Include graph data for top customers (1 hop from each)
-        graphs = []
-        for customer in results[:3]:  # Limit to first 3 customers
-            customer_id = customer.get("id")
-            if customer_id:
-                customer_graph = get_graph_data_for_entity(customer_id, depth=1)
-                graphs.append(customer_graph)
-
-        # Merge all graph data with size limits
-        graph_data = merge_graph_data(graphs) if graphs else {"nodes": [], "relationships": []}
-
-        response = {
-            "customers": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error searching customers: {str(e)}"}],
-            "is_error": True,
-        }
+        response = {"customers": results, "graph_data": None}
+        return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
+
+    # Search and fetch graph data for the top 3 customers (1 hop) in one round-trip
+    results, customer_graph = await asyncio.to_thread(
+        context_graph_client.search_customers_with_graph,
+        query=args["query"],
+        limit=args.get("limit", 10),
+        graph_depth=1,
+        graph_customers=3,
+    )
+
+    # Merge all graph data with size limits
+    graph_data = merge_graph_data([graph_data_to_dict(customer_graph)])
+
+    response = {
+        "customers": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
     "get_customer_decisions",
     "Get all decisions made about a specific customer, including approvals, rejections, escalations, and exceptions.",
-    {"customer_id": str, "decision_type": str, "limit": int},
+    {"customer_id": str, "decision_type": str, "limit": int, "include_graph": bool},
 )
 async def get_customer_decisions(args: dict[str, Any]) -> dict[str, Any]:
     """Get decisions about a customer."""
-    try:
-        results = context_graph_client.get_customer_decisions(
+    if error := _missing_args(args, "customer_id"):
+        return error
+    # Fetch decisions and graph data centered on the customer concurrently
+    results, graph_data = await asyncio.gather(
+        asyncio.to_thread(
+            context_graph_client.get_customer_decisions,
             customer_id=args["customer_id"],
             decision_type=args.get("decision_type"),
             limit=args.get("limit", 20),
-        )
-        # Include graph data centered on the customer
-        graph_data = get_graph_data_for_entity(args["customer_id"], depth=2)
+        ),
+        _fetch_graph(args["customer_id"], args.get("include_graph", False)),
+    )
 
-        response = {
-            "decisions": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting decisions: {str(e)}"}],
-            "is_error": True,
-        }
+    response = {
+        "decisions": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
@@ -215,6 +274,11 @@ async def get_customer_decisions(args: dict[str, Any]) -> dict[str, Any]:
             "type": int,
             "description": "Number of similar decisions to return",
             "default": 5
+        },
+        "include_graph": {
+            "type": bool,
+            "description": "Also return graph visualization data centered on the decision",
+            "default": False
         }
     },
 )
@@ -222,83 +286,95 @@ async def find_similar_decisions(args: dict[str, Any]) -> dict[str, Any]:
     """Find similar decisions using FastRP embeddings."""
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        decision_id = args["decision_id"]
-        limit = int(args.get("limit", 10))
-
-        similar_decisions = gds_client.find_similar_decisions(decision_id, limit=limit)
+    if error := _missing_args(args, "decision_id"):
+        return error
+    decision_id = args["decision_id"]
+    limit = int(args.get("limit", 10))
 
-        # Include graph data centered on the decision
-        graph_data = get_graph_data_for_entity(decision_id, depth=2)
+    # Fetch similar decisions and graph data centered on the decision concurrently
+    similar_decisions, graph_data = await asyncio.gather(
+        asyncio.to_thread(gds_client.find_similar_decisions, decision_id, limit=limit),
+        _fetch_graph(decision_id, args.get("include_graph", False)),
+    )
 
-        response = {
-            "similar_decisions": similar_decisions,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding similar decisions: {str(e)}"}],
-            "is_error": True,
-        }
+    response = {
+        "similar_decisions": similar_decisions,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
     "find_precedents",
     "Find precedent decisions that could inform the current decision. Uses both semantic similarity (meaning) and structural similarity (graph patterns).",
-    {"scenario": str, "category": str, "limit": int},
+    {"scenario": str, "category": str, "limit": int, "include_graph": bool},
 )
 async def find_precedents(args: dict[str, Any]) -> dict[str, Any]:
     """Find precedent decisions using hybrid search."""
-    try:
-        results = vector_client.find_precedents_hybrid(
-            scenario=args["scenario"], category=args.get("category"), limit=args.get("limit", 5)
-        )
-        # Include graph data for the first precedent found
-        graph_data = None
-        if results and len(results) > 0:
-            first_id = results[0].get("id") if isinstance(results[0], dict) else None
-            if first_id:
-                graph_data = get_graph_data_for_entity(first_id, depth=2)
-
-        response = {
-            "precedents": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding precedents: {str(e)}"}],
-            "is_error": True,
-        }
+    if error := _missing_args(args, "scenario"):
+        return error
+    results = await asyncio.to_thread(
+        vector_client.find_precedents_hybrid,
+        scenario=args["scenario"],
+        category=args.get("category"),
+        limit=args.get("limit", 5),
+    )
+    # Include graph data for the first precedent found
+    graph_data = None
+    if args.get("include_graph", False) and results:
+        first_id = results[0].get("id") if isinstance(results[0], dict) else None
+        if first_id:
+            graph_data = await _fetch_graph(first_id, True)
+
+    response = {
+        "precedents": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
     "get_causal_chain",
     "Trace the causal chain of a decision - what caused it and what it led to. Useful for understanding decision impact and history.",
-    {"decision_id": str, "direction": str, "depth": int},
+    {"decision_id": str, "direction": str, "depth": int, "include_graph": bool},
 )
 async def get_causal_chain(args: dict[str, Any]) -> dict[str, Any]:
     """Get the causal chain for a decision."""
-    try:
-        results = context_graph_client.get_causal_chain(
+    if error := _missing_args(args, "decision_id"):
+        return error
+    # Fetch the chain and graph data centered on the decision concurrently
+    results, graph_data = await asyncio.gather(
+        asyncio.to_thread(
+            context_graph_client.get_causal_chain,
             decision_id=args["decision_id"],
             direction=args.get("direction", "both"),
             depth=args.get("depth", 3),
-        )
-        # Include graph data centered on the decision
-        graph_data = get_graph_data_for_entity(args["decision_id"], depth=3)
+        ),
+        _fetch_graph(args["decision_id"], args.get("include_graph", False)),
+    )
+
+    response = {
+        "causal_chain": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
-        response = {
-            "causal_chain": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting causal chain: {str(e)}"}],
-            "is_error": True,
-        }
+
+@tool(
+    "get_graph_view",
+    "Get graph visualization data (nodes and relationships) centered on a customer, account, decision or other entity. Use this to show the graph for results fetched earlier.",
+    {"entity_id": str},
+)
+async def get_graph_view(args: dict[str, Any]) -> dict[str, Any]:
+    """Get graph visualization data centered on an entity."""
+    if error := _missing_args(args, "entity_id"):
+        return error
+    try:
+        graph_data = await asyncio.to_thread(get_graph_data_for_entity, args["entity_id"])
+    except ContextGraphNotFound as e:
+        return _error_response(f"Error getting graph view: {e}")
+
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack({"graph_data": graph_data})}]}
 
 
 @tool(
@@ -317,46 +393,44 @@ async def get_causal_chain(args: dict[str, Any]) -> dict[str, Any]:
 )
 async def record_decision(args: dict[str, Any]) -> dict[str, Any]:
     """Record a new decision in the context graph."""
+    if error := _missing_args(args, "decision_type", "category", "reasoning"):
+        return error
+    # Generate embedding for the reasoning
+    reasoning_embedding = None
     try:
-        # Generate embedding for the reasoning
-        reasoning_embedding = None
-        try:
-            reasoning_embedding = vector_client.generate_embedding(args["reasoning"])
-        except Exception:
-            pass  # Continue without embedding if it fails
-
-        decision_id = context_graph_client.record_decision(
-            decision_type=args["decision_type"],
-            category=args["category"],
-            reasoning=args["reasoning"],
-            customer_id=args.get("customer_id"),
-            account_id=args.get("account_id"),
-            risk_factors=args.get("risk_factors", []),
-            precedent_ids=args.get("precedent_ids", []),
-            confidence_score=args.get("confidence_score", 0.8),
-            reasoning_embedding=reasoning_embedding,
+        reasoning_embedding = await asyncio.to_thread(
+            vector_client.generate_embedding, args["reasoning"]
         )
+    except Exception:
+        pass  # Continue without embedding if it fails
+
+    decision_id = await asyncio.to_thread(
+        context_graph_client.record_decision,
+        decision_type=args["decision_type"],
+        category=args["category"],
+        reasoning=args["reasoning"],
+        customer_id=args.get("customer_id"),
+        account_id=args.get("account_id"),
+        risk_factors=args.get("risk_factors", []),
+        precedent_ids=args.get("precedent_ids", []),
+        confidence_score=args.get("confidence_score", 0.8),
+        reasoning_embedding=reasoning_embedding,
+    )
 
-        return {
-            "content": [
-                {
-                    "type": "text",
-                    "text": json.dumps(
-                        {
-                            "success": True,
-                            "decision_id": decision_id,
-                            "message": f"Decision recorded successfully with ID {decision_id}",
-                        },
-                        indent=2,
-                    ),
-                }
-            ]
-        }
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error recording decision: {str(e)}"}],
-            "is_error": True,
-        }
+    return {
+        "content": [
+            {
+                **_TEXT_ENVELOPE,
+                "text": _pack(
+                    {
+                        "success": True,
+                        "decision_id": decision_id,
+                        "message": f"Decision recorded successfully with ID {decision_id}",
+                    }
+                ),
+            }
+        ]
+    }
 
 
 @tool(
@@ -379,18 +453,15 @@ async def detect_fraud_patterns(args: dict[str, Any]) -> dict[str, Any]:
     """Detect fraud patterns using graph analysis."""
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        neighbor_count = int(args.get("neighbor_count", 5))
-        results = gds_client.detect_fraud_patterns(
-            account_id=args.get("account_id"),
-            neighbor_count=neighbor_count,
-        )
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error detecting fraud patterns: {str(e)}"}],
-            "is_error": True,
-        }
+    if error := _missing_args(args, "account_id"):
+        return error
+    neighbor_count = int(args.get("neighbor_count", 5))
+    results = await asyncio.to_thread(
+        gds_client.detect_fraud_patterns,
+        account_id=args.get("account_id"),
+        neighbor_count=neighbor_count,
+    )
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
 
 
 @tool(
@@ -405,33 +476,37 @@ async def detect_fraud_patterns(args: dict[str, Any]) -> dict[str, Any]:
             "type": int,
             "description": "Number of example decisions to return from the community",
             "default": 5
+        },
+        "include_graph": {
+            "type": bool,
+            "description": "Also return graph visualization data centered on the decision",
+            "default": False
         }
     },
 )
 async def find_decision_community(args: dict[str, Any]) -> dict[str, Any]:
     """Find decisions in the same community using Leiden."""
-    decision_id = args["decision_id"]
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        example_count = int(args.get("example_count", 5))
-        results = gds_client.get_decision_community(
-            decision_id=args["decision_id"], example_count=example_count
-        )
- 
-        # Include graph data centered on the decision
-        graph_data = get_graph_data_for_entity(decision_id, depth=2)
+    if error := _missing_args(args, "decision_id"):
+        return error
+    decision_id = args["decision_id"]
+    example_count = int(args.get("example_count", 5))
+    # Fetch the community and graph data centered on the decision concurrently
+    results, graph_data = await asyncio.gather(
+        asyncio.to_thread(
+            gds_client.get_decision_community,
+            decision_id=decision_id,
+            example_count=example_count,
+        ),
+        _fetch_graph(decision_id, args.get("include_graph", False)),
+    )
 
-        response = {
-            "community_decisions": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding community: {str(e)}"}],
-            "is_error": True,
-        }
+    response = {
+        "community_decisions": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 @tool(
     "find_accounts_with_high_shared_transaction_volume",
@@ -447,17 +522,14 @@ async def find_accounts_with_high_shared_transaction_volume(args: dict[str, Any]
     """Find accounts with high shared transaction volume."""
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        results = gds_client.find_accounts_with_high_shared_transaction_volume(
-            account_id=args.get("account_id")
-        )
+    if error := _missing_args(args, "account_id"):
+        return error
+    results = await asyncio.to_thread(
+        gds_client.find_accounts_with_high_shared_transaction_volume,
+        account_id=args.get("account_id"),
+    )
 
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding accounts with high shared transaction volume: {str(e)}"}],
-            "is_error": True,
-        }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
     
 
 @tool(
@@ -467,59 +539,50 @@ async def find_accounts_with_high_shared_transaction_volume(args: dict[str, Any]
 )
 async def get_policy(args: dict[str, Any]) -> dict[str, Any]:
     """Get policy information."""
-    try:
-        # Get all policies for the category
-        policies = context_graph_client.get_policies(category=args.get("category"))
-
-        if args.get("policy_name"):
-            # Extract meaningful words from the search query (skip common words)
-            stop_words = {"the", "a", "an", "for", "and", "or", "of", "in", "to", "with"}
-            search_words = [
-                word.lower()
-                for word in args["policy_name"].split()
-                if word.lower() not in stop_words and len(word) > 2
-            ]
-
-            # Score each policy by how many search words match
-            scored_policies = []
-            for policy in policies:
-                policy_name_lower = policy.get("name", "").lower()
-                # Count how many search words appear in the policy name
-                matches = sum(1 for word in search_words if word in policy_name_lower)
-                if matches > 0:
-                    scored_policies.append({"policy": policy, "relevance_score": matches})
-
-            # Sort by relevance score (highest first)
-            scored_policies.sort(key=lambda x: x["relevance_score"], reverse=True)
-
-            if scored_policies:
-                # Return all matching policies with relevance info
-                results = {
-                    "matching_policies": [
-                        {**sp["policy"], "relevance_score": sp["relevance_score"]}
-                        for sp in scored_policies
-                    ],
-                    "search_terms": search_words,
-                    "total_matches": len(scored_policies),
-                }
-            else:
-                # No matches found - return all policies in category as fallback
-                results = {
-                    "matching_policies": [],
-                    "search_terms": search_words,
-                    "total_matches": 0,
-                    "all_policies_in_category": policies,
-                    "note": f"No policies matched '{args['policy_name']}'. Showing all policies in category.",
-                }
+    if args.get("policy_name"):
+        # Extract meaningful words from the search query (skip common words)
+        stop_words = {"the", "a", "an", "for", "and", "or", "of", "in", "to", "with"}
+        search_words = [
+            word.lower()
+            for word in args["policy_name"].split()
+            if word.lower() not in stop_words and len(word) > 2
+        ]
+
+        # Score policies by how many search words match (highest first) in the database
+        scored_policies = await asyncio.to_thread(
+            context_graph_client.get_policies_by_name,
+            search_words,
+            category=args.get("category"),
+        )
+
+        if scored_policies:
+            # Return all matching policies with relevance info
+            results = {
+                "matching_policies": [
+                    {**sp["policy"], "relevance_score": sp["relevance_score"]}
+                    for sp in scored_policies
+                ],
+                "search_terms": search_words,
+                "total_matches": len(scored_policies),
+            }
         else:
-            results = policies
+            # No matches found - return all policies in category as fallback
+            policies = await asyncio.to_thread(
+                context_graph_client.get_policies, category=args.get("category")
+            )
+            results = {
+                "matching_policies": [],
+                "search_terms": search_words,
+                "total_matches": 0,
+                "all_policies_in_category": policies,
+                "note": f"No policies matched '{args['policy_name']}'. Showing all policies in category.",
+            }
+    else:
+        results = await asyncio.to_thread(
+            context_graph_client.get_policies, category=args.get("category")
+        )
 
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting policy: {str(e)}"}],
-            "is_error": True,
-        }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
 
 
 @tool(
@@ -529,19 +592,15 @@ async def get_policy(args: dict[str, Any]) -> dict[str, Any]:
 )
 async def execute_cypher(args: dict[str, Any]) -> dict[str, Any]:
     """Execute a read-only Cypher query."""
+    if not args.get("cypher", "").strip():
+        return _error_response("Query not allowed: cypher is empty")
     try:
-        results = context_graph_client.execute_cypher(cypher=args["cypher"])
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except ValueError as e:
-        return {
-            "content": [{"type": "text", "text": f"Query not allowed: {str(e)}"}],
-            "is_error": True,
-        }
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error executing query: {str(e)}"}],
-            "is_error": True,
-        }
+        results = await asyncio.to_thread(
+            context_graph_client.execute_cypher, cypher=args["cypher"]
+        )
+    except CypherValidationError as e:
+        return _error_response(f"Query not allowed: {e}")
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
 
 
 @tool(
@@ -551,14 +610,8 @@ async def execute_cypher(args: dict[str, Any]) -> dict[str, Any]:
 )
 async def get_schema(args: dict[str, Any]) -> dict[str, Any]:
     """Get the graph database schema."""
-    try:
-        schema = context_graph_client.get_schema()
-        return {"content": [{"type": "text", "text": json.dumps(schema, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting schema: {str(e)}"}],
-            "is_error": True,
-        }
+    schema = await asyncio.to_thread(context_graph_client.get_schema)
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(schema)}]}
 
 
 # ============================================
@@ -566,8 +619,9 @@ async def get_schema(args: dict[str, Any]) -> dict[str, Any]:
 # ============================================
 
 
+@lru_cache(maxsize=1)
 def create_context_graph_server():
-    """Create the MCP server with all context graph tools."""
+    """Create the MCP server with all context graph tools (built once, shared by sessions)."""
     return create_sdk_mcp_server(
         name="context-graph",
         version="1.0.0",
@@ -577,6 +631,7 @@ def create_context_graph_server():
             find_similar_decisions,
             find_precedents,
             get_causal_chain,
+            get_graph_view,
             record_decision,
             detect_fraud_patterns,
             find_decision_community,
@@ -588,27 +643,15 @@ def create_context_graph_server():
     )
 
 
+@lru_cache(maxsize=1)
 def get_agent_options() -> ClaudeAgentOptions:
-    """Get the agent options with context graph server configured."""
+    """Get the agent options with context graph server configured (built once)."""
     context_graph_server = create_context_graph_server()
 
     return ClaudeAgentOptions(
         system_prompt=CONTEXT_GRAPH_SYSTEM_PROMPT,
         mcp_servers={"graph": context_graph_server},
-        allowed_tools=[
-            "mcp__graph__search_customer",
-            "mcp__graph__get_customer_decisions",
-            "mcp__graph__find_similar_decisions",
-            "mcp__graph__find_precedents",
-            "mcp__graph__get_causal_chain",
-            "mcp__graph__record_decision",
-            "mcp__graph__detect_fraud_patterns",
-            "mcp__graph__find_decision_community",
-            "mcp__graph__find_accounts_with_high_shared_transaction_volume",
-            "mcp__graph__get_policy",
-            "mcp__graph__execute_cypher",
-            "mcp__graph__get_schema",
-        ],
+        allowed_tools=list(ALLOWED_TOOLS),
     )
 
 
@@ -622,6 +665,7 @@ AVAILABLE_TOOLS = [
     "find_similar_decisions",
     "find_precedents",
     "get_causal_chain",
+    "get_graph_view",
     "record_decision",
     "detect_fraud_patterns",
     "find_decision_community",
@@ -631,9 +675,13 @@ AVAILABLE_TOOLS = [
     "get_schema",
 ]
 
+# Fully qualified names of the tools on the "graph" MCP server
+ALLOWED_TOOLS = tuple(f"mcp__graph__{tool_name}" for tool_name in AVAILABLE_TOOLS)
 
+
+@lru_cache(maxsize=1)
 def get_agent_context() -> dict[str, Any]:
-    """Get agent context information for transparency/debugging."""
+    """Get agent context information for transparency/debugging (built once, read-only)."""
     return {
         "system_prompt": CONTEXT_GRAPH_SYSTEM_PROMPT,
         "model": "claude-sonnet-4-20250514",
@@ -647,12 +695,166 @@ def get_agent_context() -> dict[str, Any]:
 # ============================================
 
 
-class ContextGraphAgent:
-    """Wrapper for managing Claude Agent SDK sessions."""
+# Marks the end of a query_stream event queue
+_STREAM_DONE = object()
+
+# Adjacent text chunks are coalesced into one event, up to this many chunks or this long
+TEXT_BATCH_MAX_CHUNKS = 8
+TEXT_BATCH_WAIT_S = 0.03
+
+
+async def _read_coalesced(queue: asyncio.Queue) -> AsyncIterator[dict[str, Any]]:
+    """
+    Yield stream events from a queue until _STREAM_DONE, coalescing adjacent text events.
+
+    Producers may put a text delta on the queue as a bare str instead of a text event.
+    """
+    loop = asyncio.get_running_loop()
+    pending_text: list[str] = []
+    batch_deadline = 0.0
+    while True:
+        # While text is pending, only wait until its batch window closes
+        timeout = max(0.0, batch_deadline - loop.time()) if pending_text else None
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            yield {"type": "text", "content": "".join(pending_text)}
+            pending_text.clear()
+            continue
+
+        if isinstance(event, str):
+            text = event
+        elif event is not _STREAM_DONE and event["type"] == "text":
+            text = event["content"]
+        else:
+            text = None
+        if text is not None:
+            if not pending_text:
+                batch_deadline = loop.time() + TEXT_BATCH_WAIT_S
+            pending_text.append(text)
+            if len(pending_text) < TEXT_BATCH_MAX_CHUNKS:
+                continue
+            event = None
+
+        # Flush pending text before anything else to keep the event order
+        if pending_text:
+            yield {"type": "text", "content": "".join(pending_text)}
+            pending_text.clear()
+        if event is _STREAM_DONE:
+            return
+        if event is not None:
+            yield event
+
+
+# Token budget for the conversation history sent with each query
+HISTORY_TOKEN_BUDGET = 8000
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return len(text) // 4
+
+
+def _history_lines(conversation_history: list[dict[str, str]], max_tokens: int) -> list[str]:
+    """
+    Format the history as "ROLE: content" lines within the token budget.
+
+    The oldest user/assistant pairs are dropped first, always keeping the latest exchange.
+    """
+    lines = [f"{msg['role'].upper()}: {msg['content']}" for msg in conversation_history]
+    tokens = sum(_estimate_tokens(line) for line in lines)
+    start = 0
+    while tokens > max_tokens and len(lines) - start > 2:
+        tokens -= _estimate_tokens(lines[start]) + _estimate_tokens(lines[start + 1])
+        start += 2
+    return lines[start:]
+
+
+# Fully qualified name of the tool whose results are reported as decisions_made
+RECORD_DECISION_TOOL = "mcp__graph__record_decision"
+
+
+def _parse_tool_result(block_content: Any) -> Any:
+    """Decode a tool result's JSON text, falling back to the raw text."""
+    if isinstance(block_content, list):
+        # List of content item dicts; our tools put the text item first
+        item = block_content[0] if block_content else None
+        if not (isinstance(item, dict) and item.get("type") == "text"):
+            item = next(
+                (
+                    item
+                    for item in block_content
+                    if isinstance(item, dict) and item.get("type") == "text"
+                ),
+                None,
+            )
+        if item is None:
+            return None
+        block_content = item.get("text", "{}")
+    elif not isinstance(block_content, str):
+        return None
+
+    try:
+        return orjson.loads(block_content)
+    except orjson.JSONDecodeError:
+        return block_content
+
+
+def _recorded_decision_id(output: Any) -> str | None:
+    """Return the decision ID from a successful record_decision result."""
+    if isinstance(output, dict) and output.get("success"):
+        return output.get("decision_id")
+    return None
+
+
+class _StreamState:
+    """Per-stream bookkeeping shared by the query_stream block handlers."""
 
     def __init__(self):
+        self.tool_calls: list[dict[str, Any]] = []
+        self.tool_id_to_name: dict[str, str] = {}  # Map tool_use_id to tool name
+        self.decisions_made: list[str] = []  # IDs of decisions recorded by tools
+
+
+async def _user_turn(content: list[dict[str, Any]]):
+    """Yield content blocks as a single streaming-input user message for ClaudeSDKClient."""
+    yield {
+        "type": "user",
+        "message": {"role": "user", "content": content},
+        "parent_tool_use_id": None,
+    }
+
+
+class ContextGraphAgent:
+    """
+    Wrapper for managing Claude Agent SDK sessions.
+
+    Each ``async with`` block connects its own ClaudeSDKClient. The client is a stateful
+    conversation bound to the task that connected it, so it is not shared across requests;
+    the parts of the setup that can be shared (options, MCP server) are built once.
+    """
+
+    __slots__ = (
+        "options",
+        "client",
+        "max_history_tokens",
+        "_block_handlers",
+    )
+
+    # Static parts of the user turn
+    _HISTORY_TMPL = "Previous conversation:\n{history}"
+    _MESSAGE_TMPL = "Current message from USER: {message}"
+
+    def __init__(self, max_history_tokens: int = HISTORY_TOKEN_BUDGET):
         self.options = get_agent_options()
         self.client: ClaudeSDKClient | None = None
+        # Token budget for the history block, oldest pairs are dropped first
+        self.max_history_tokens = max_history_tokens
+        # Stream event builders, keyed by SDK message type and then content block type
+        self._block_handlers = {
+            AssistantMessage: {TextBlock: self._handle_text, ToolUseBlock: self._handle_tool_use},
+            UserMessage: {ToolResultBlock: self._handle_tool_result},
+        }
 
     async def __aenter__(self):
         self.client = ClaudeSDKClient(options=self.options)
@@ -662,6 +864,38 @@ class ContextGraphAgent:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.client:
             await self.client.disconnect()
+            self.client = None
+
+    def _build_prompt(
+        self, message: str, conversation_history: list[dict[str, str]]
+    ) -> list[dict[str, Any]]:
+        """
+        Build the user turn content blocks.
+
+        The history (trimmed to the token budget) goes in its own block behind a cache
+        breakpoint, and the current message follows uncached, so the history prefix stays
+        byte-stable.
+        """
+        lines = _history_lines(conversation_history, self.max_history_tokens)
+
+        return [
+            {
+                **_TEXT_ENVELOPE,
+                "text": self._HISTORY_TMPL.format(history="\n".join(lines)),
+                "cache_control": {"type": "ephemeral"},
+            },
+            {**_TEXT_ENVELOPE, "text": self._MESSAGE_TMPL.format(message=message)},
+        ]
+
+    async def _send(
+        self, message: str, conversation_history: list[dict[str, str]] | None
+    ) -> None:
+        """Send the user turn; without history the bare message goes out unwrapped."""
+        if not conversation_history:
+            await self.client.query(message)
+            return
+        # History block ahead of the current message
+        await self.client.query(_user_turn(self._build_prompt(message, conversation_history)))
 
     async def query(
         self, message: str, conversation_history: list[dict[str, str]] | None = None
@@ -670,48 +904,34 @@ class ContextGraphAgent:
         if not self.client:
             raise RuntimeError("Agent not connected. Use 'async with' context manager.")
 
-        # Build message with conversation context
-        if conversation_history and len(conversation_history) > 0:
-            # Format history as context in the message
-            history_text = "\n".join(
-                [
-                    f"{msg['role'].upper()}: {msg['content']}" for msg in conversation_history[-6:]
-                ]  # Last 6 messages
-            )
-            full_message = f"""Previous conversation:
-{history_text}
-
-Current message from USER: {message}
-
-Please respond to the current message, taking the conversation history into account."""
-        else:
-            full_message = message
-
-        # Send the message
-        await self.client.query(full_message)
+        await self._send(message, conversation_history)
 
         response_text = ""
         tool_calls = []
         decisions_made = []
+        record_ids = set()  # tool_use_ids of record_decision calls
 
         async for msg in self.client.receive_response():
-            # Process different message types
-            if hasattr(msg, "content"):
+            # Assistant messages carry text and tool use blocks
+            if isinstance(msg, AssistantMessage):
                 for block in msg.content:
-                    if hasattr(block, "text"):
+                    if isinstance(block, TextBlock):
                         response_text += block.text
-                    elif hasattr(block, "name"):
-                        # Tool use block
+                    elif isinstance(block, ToolUseBlock):
                         tool_calls.append(
                             {
                                 "name": block.name,
-                                "input": block.input if hasattr(block, "input") else {},
+                                "input": block.input,
                             }
                         )
-                        # Track decisions made
-                        if block.name == "mcp__graph__record_decision":
-                            # Will be populated when we get the result
-                            pass
+                        if block.name == RECORD_DECISION_TOOL:
+                            record_ids.add(block.id)
+            # Tool results come back in user messages; only decisions are kept
+            elif isinstance(msg, UserMessage) and record_ids:
+                for block in msg.content:
+                    if isinstance(block, ToolResultBlock) and block.tool_use_id in record_ids:
+                        if decision_id := _recorded_decision_id(_parse_tool_result(block.content)):
+                            decisions_made.append(decision_id)
 
         return {
             "response": response_text,
@@ -719,6 +939,28 @@ Please respond to the current message, taking the conversation history into acco
             "decisions_made": decisions_made,
         }
 
+    async def query_many(
+        self,
+        messages: list[str],
+        conversation_history: list[dict[str, str]] | None = None,
+        max_concurrent: int = 4,
+    ) -> list[dict[str, Any]]:
+        """
+        Answer independent messages concurrently and return the results in order.
+
+        An SDK session serves one conversation at a time, so each message runs in its own
+        session, at most max_concurrent at once. conversation_history is shared by all of
+        them and only read.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def run_one(message: str) -> dict[str, Any]:
+            async with semaphore:
+                async with ContextGraphAgent(self.max_history_tokens) as agent:
+                    return await agent.query(message, conversation_history)
+
+        return list(await asyncio.gather(*(run_one(message) for message in messages)))
+
     async def query_stream(
         self, message: str, conversation_history: list[dict[str, str]] | None = None
     ):
@@ -726,133 +968,159 @@ Please respond to the current message, taking the conversation history into acco
         if not self.client:
             raise RuntimeError("Agent not connected. Use 'async with' context manager.")
 
-        # Build message with conversation context
-        if conversation_history and len(conversation_history) > 0:
-            history_text = "\n".join(
-                [f"{msg['role'].upper()}: {msg['content']}" for msg in conversation_history[-6:]]
-            )
-            full_message = f"""Previous conversation:
-{history_text}
-
-Current message from USER: {message}
-
-Please respond to the current message, taking the conversation history into account."""
-        else:
-            full_message = message
-
         # Emit agent context first
         yield {"type": "agent_context", "context": get_agent_context()}
 
-        # Send the message
-        await self.client.query(full_message)
-
-        tool_calls = []
-        tool_id_to_name = {}  # Map tool_use_id to tool name
-        decisions_made = []
-
-        async for msg in self.client.receive_response():
-            msg_type = type(msg).__name__
+        await self._send(message, conversation_history)
 
-            # Handle UserMessage containing ToolResultBlock objects
-            if msg_type == "UserMessage" and hasattr(msg, "content"):
+        # SDK reads and block parsing run in a producer task, so they overlap with
+        # whatever the consumer does with each event
+        queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+        producer = asyncio.create_task(self._drain_into_queue(queue))
+        try:
+            async for event in _read_coalesced(queue):
+                yield event
+            await producer  # Surface any error raised while reading
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    async def _drain_into_queue(self, queue: asyncio.Queue) -> None:
+        """Read the SDK response, parse it into stream events and put them on the queue."""
+        state = _StreamState()
+        cancelled = False
+        try:
+            async for msg in self.client.receive_response():
+                block_handlers = self._block_handlers.get(type(msg))
+                if block_handlers is None:
+                    continue
                 for block in msg.content:
-                    block_type = type(block).__name__
-                    # ToolResultBlock has tool_use_id and content attributes
-                    if block_type == "ToolResultBlock":
-                        tool_use_id = getattr(block, "tool_use_id", None)
-                        block_content = getattr(block, "content", None)
-
-                        print(f"[DEBUG] ToolResultBlock - tool_use_id: {tool_use_id}")
-
-                        if tool_use_id:
-                            parsed_output = None
-
-                            # Parse the block content (list of content items)
-                            if isinstance(block_content, list):
-                                for item in block_content:
-                                    if isinstance(item, dict) and item.get("type") == "text":
-                                        try:
-                                            parsed_output = json.loads(item.get("text", "{}"))
-                                        except json.JSONDecodeError:
-                                            parsed_output = item.get("text")
-                                        break
-                                    elif hasattr(item, "text"):
-                                        try:
-                                            parsed_output = json.loads(item.text)
-                                        except json.JSONDecodeError:
-                                            parsed_output = item.text
-                                        break
-                            elif isinstance(block_content, str):
-                                try:
-                                    parsed_output = json.loads(block_content)
-                                except json.JSONDecodeError:
-                                    parsed_output = block_content
-
-                            # Look up the tool name from the tool_use_id
-                            tool_name = tool_id_to_name.get(tool_use_id, "unknown")
-                            print(
-                                f"[DEBUG] Yielding tool_result: name={tool_name}, output_type={type(parsed_output)}"
-                            )
-
-                            yield {
-                                "type": "tool_result",
-                                "name": tool_name,
-                                "output": parsed_output,
-                            }
-                continue
+                    handler = block_handlers.get(type(block))
+                    if handler and (event := handler(block, state)) is not None:
+                        await queue.put(event)
 
-            # Handle AssistantMessage content blocks
-            if hasattr(msg, "content"):
-                for block in msg.content:
-                    if hasattr(block, "text"):
-                        # Stream text content
-                        yield {"type": "text", "content": block.text}
-                    elif hasattr(block, "name"):
-                        # Tool use block
-                        tool_id = getattr(block, "id", None)
-                        tool_call = {
-                            "name": block.name,
-                            "input": block.input if hasattr(block, "input") else {},
-                        }
-                        tool_calls.append(tool_call)
-
-                        # Track tool_use_id to name mapping
-                        if tool_id:
-                            tool_id_to_name[tool_id] = block.name
-
-                        yield {"type": "tool_use", **tool_call}
-
-                        # Track decisions made
-                        if block.name == "mcp__graph__record_decision":
-                            pass
-
-        # Final event with summary
-        yield {
-            "type": "done",
-            "tool_calls": tool_calls,
-            "decisions_made": decisions_made,
+            # Final event with summary
+            await queue.put(
+                {
+                    "type": "done",
+                    "tool_calls": state.tool_calls,
+                    "decisions_made": state.decisions_made,
+                }
+            )
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # Once cancelled, the consumer has stopped reading: the queue may be full and
+            # nothing waits for the end marker, so putting it could block forever
+            if not cancelled:
+                await queue.put(_STREAM_DONE)
+
+    def _handle_text(self, block: TextBlock, state: "_StreamState") -> dict[str, Any]:
+        """Stream text content."""
+        return {"type": "text", "content": block.text}
+
+    def _handle_tool_use(self, block: ToolUseBlock, state: "_StreamState") -> dict[str, Any]:
+        """Record a tool call and stream it."""
+        # One dict serves as both the stream event and the tool_calls entry
+        payload = {"type": "tool_use", "name": block.name, "input": block.input}
+        state.tool_calls.append(payload)
+        # Track tool_use_id to name mapping
+        state.tool_id_to_name[block.id] = block.name
+        return payload
+
+    def _handle_tool_result(
+        self, block: ToolResultBlock, state: "_StreamState"
+    ) -> dict[str, Any] | None:
+        """Parse a tool result and stream it under the name of the tool that produced it."""
+        tool_use_id = block.tool_use_id
+
+        logger.debug("ToolResultBlock - tool_use_id: %s", tool_use_id)
+
+        if not tool_use_id:
+            return None
+
+        parsed_output = _parse_tool_result(block.content)
+
+        # Look up the tool name from the tool_use_id
+        tool_name = state.tool_id_to_name.get(tool_use_id, "unknown")
+        if tool_name == RECORD_DECISION_TOOL and (
+            decision_id := _recorded_decision_id(parsed_output)
+        ):
+            state.decisions_made.append(decision_id)
+        logger.debug(
+            "Yielding tool_result: name=%s, output_type=%s", tool_name, type(parsed_output).__name__
+        )
+
+        return {
+            "type": "tool_result",
+            "name": tool_name,
+            "output": parsed_output,
         }
 """
 Claude Agent SDK integration with Context Graph tools.
 Provides MCP tools for querying and updating the context graph.
 """
 
-import json
-from typing import Any
-
-from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient, create_sdk_mcp_server, tool
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, AsyncIterator
+
+import orjson
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+    create_sdk_mcp_server,
+    tool,
+)
 
-from .context_graph_client import context_graph_client
+from .context_graph_client import ContextGraphNotFound, CypherValidationError, context_graph_client
+from .models import GraphData
 from .gds_client import gds_client
 from .vector_client import vector_client
 
+logger = logging.getLogger(__name__)
+
+
+# Shared part of every tool text response
+_TEXT_ENVELOPE = {"type": "text"}
+
+
+def _pack(obj: Any) -> str:
+    """Serialize a tool response compactly (no indentation, fewer tokens for Claude)."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _error_response(message: str) -> dict[str, Any]:
+    """
+    Build a tool error result for an expected failure (bad input, missing entity).
+
+    Tool handlers only catch the context graph's typed errors; anything else
+    propagates and is reported as a tool error by the MCP server.
+    """
+    return {"content": [{**_TEXT_ENVELOPE, "text": message}], "is_error": True}
+
+
+def _missing_args(args: dict[str, Any], *names: str) -> dict[str, Any] | None:
+    """Return an error result if any required argument is missing or empty."""
+    missing = [name for name in names if not args.get(name)]
+    if missing:
+        return _error_response(f"Missing required argument(s): {', '.join(missing)}")
+    return None
+
 
 def slim_properties(props: dict) -> dict:
     """Remove large properties to reduce response size."""
     slim = {}
     for key, value in props.items():
         # Skip embedding vectors
-        if key in ("fast_rp_embedding", "reasoning_embedding", "embedding"):
+        if key in ("fast_rp_embedding", "reasoning_embedding", "description_embedding", "embedding"):
             continue
         # Truncate long strings
         if isinstance(value, str) and len(value) > 200:
@@ -865,44 +1133,54 @@ def slim_properties(props: dict) -> dict:
     return slim
 
 
-def get_graph_data_for_entity(entity_id: str, depth: int = 2, limit: int = 30) -> dict:
-    """Get graph visualization data centered on an entity."""
-    try:
-        graph_data = context_graph_client.get_graph_data(
-            center_node_id=entity_id, depth=depth, limit=limit
-        )
-        # Build nodes list first
-        nodes = [
-            {
-                "id": node.id,
-                "labels": node.labels,
-                "properties": slim_properties(node.properties),
-            }
-            for node in graph_data.nodes
-        ]
+def graph_data_to_dict(graph_data: GraphData) -> dict:
+    """Convert GraphData to the slimmed dict shape returned by tools."""
+    # Build nodes list first
+    nodes = [
+        {
+            "id": node.id,
+            "labels": node.labels,
+            "properties": slim_properties(node.properties),
+        }
+        for node in graph_data.nodes
+    ]
+
+    # Create set of node IDs for filtering relationships
+    node_ids = {node["id"] for node in nodes}
+
+    # Only include relationships where both nodes exist
+    relationships = [
+        {
+            "id": rel.id,
+            "type": rel.type,
+            "startNodeId": rel.start_node_id,
+            "endNodeId": rel.end_node_id,
+            "properties": slim_properties(rel.properties),
+        }
+        for rel in graph_data.relationships
+        if rel.start_node_id in node_ids and rel.end_node_id in node_ids
+    ]
 
-        # Create set of node IDs for filtering relationships
-        node_ids = {node["id"] for node in nodes}
+    return {
+        "nodes": nodes,
+        "relationships": relationships,
+    }
 
-        # Only include relationships where both nodes exist
-        relationships = [
-            {
-                "id": rel.id,
-                "type": rel.type,
-                "startNodeId": rel.start_node_id,
-                "endNodeId": rel.end_node_id,
-                "properties": slim_properties(rel.properties),
-            }
-            for rel in graph_data.relationships
-            if rel.start_node_id in node_ids and rel.end_node_id in node_ids
-        ]
 
-        return {
-            "nodes": nodes,
-            "relationships": relationships,
-        }
+def get_graph_data_for_entity(entity_id: str, limit: int = 30) -> dict:
+    """Get graph visualization data (the 2-hop neighbourhood) centered on an entity."""
+    try:
+        # Nodes/relationships arrive already projected by Cypher; only slim the properties
+        graph_data = context_graph_client.get_graph_view(center_node_id=entity_id, limit=limit)
+        for item in graph_data["nodes"]:
+            item["properties"] = slim_properties(item["properties"])
+        for item in graph_data["relationships"]:
+            item["properties"] = slim_properties(item["properties"])
+        return graph_data
+    except ContextGraphNotFound:
+        raise
     except Exception as e:
-        print(f"Error getting graph data for entity {entity_id}: {e}")
+        logger.warning("Error getting graph data for entity %s: %s", entity_id, e)
         return {"nodes": [], "relationships": []}
 
 
@@ -910,40 +1188,29 @@ def get_graph_data_for_entity(entity_id: str, depth: int = 2, limit: int = 30) -
 # SYSTEM PROMPT
 # ============================================
 
-CONTEXT_GRAPH_SYSTEM_PROMPT = """You are an AI assistant for a financial institution with access to a Context Graph.
-
-The Context Graph stores decision traces - the reasoning, context, and causal relationships behind every significant decision made in the organization. This enables you to:
+# Kept terse: it is sent with every Claude request
+CONTEXT_GRAPH_SYSTEM_PROMPT = """You are an AI assistant for a financial institution with access to a Context Graph: decision traces recording the reasoning, context and causal links behind every significant decision.
 
-1. **Find Precedents**: Search for similar past decisions to inform current recommendations
-2. **Trace Causality**: Understand how past decisions influenced subsequent outcomes
-3. **Record Decisions**: Create new decision traces with full reasoning context
-4. **Detect Patterns**: Identify fraud patterns and entity duplicates using graph structure
+## Capabilities
+- Find precedents: similar past decisions to inform recommendations
+- Trace causality: how past decisions influenced later outcomes
+- Record decisions: new traces with full reasoning
+- Detect patterns: fraud and duplicate entities via graph structure
 
 ## Key Concepts
-
-**Event Clock vs State Clock**:
-- Traditional systems store the "state clock" - what is true right now
-- The Context Graph stores the "event clock" - what happened, when, and with what reasoning
-
-**Decision Traces**:
-- Every significant decision is recorded with full reasoning
-- Risk factors, confidence scores, and applied policies are captured
-- Causal chains show how decisions influenced each other
+- Event clock: the graph stores what happened, when and why (not just current state)
+- Decision traces: reasoning, risk factors, confidence scores and applied policies; causal chains link decisions
 
 ## Guidelines
+1. Always search for precedents before recommending
+2. Explain your reasoning thoroughly; it becomes part of the decision trace
+3. Cite the specific past decisions that inform a recommendation
+4. Flag needed exceptions or escalations
+5. Use both semantic similarity (text embeddings, meaning) and structural similarity (FastRP graph embeddings, relationship patterns)
+6. Set include_graph=true, or call get_graph_view, only when the user should see the graph
 
-When helping users:
-1. **Always search for precedents** before making recommendations
-2. **Explain your reasoning thoroughly** - this becomes part of the decision trace
-3. **Cite specific past decisions** when they inform your recommendation
-4. **Flag exceptions or escalations** that may be needed
-5. **Consider both structural and semantic similarity** when finding related cases
-
-You have access to tools that leverage both:
-- **Semantic similarity** (text embeddings) - for matching by meaning
-- **Structural similarity** (FastRP graph embeddings) - for matching by relationship patterns
-
-This combination provides insights that are impossible with traditional databases."""
+## Conversation
+Earlier turns arrive as a "Previous conversation:" block of "USER:"/"ASSISTANT:" lines, followed by the current message. Answer the current message, taking the earlier turns into account."""
 
 
 # ============================================
@@ -974,66 +1241,83 @@ def merge_graph_data(graphs: list[dict], max_nodes: int = 50, max_rels: int = 75
     }
 
 
+async def _fetch_graph(entity_id: str, include_graph: bool) -> dict | None:
+    """
+    Fetch graph visualization data for an entity only when the caller will render it.
+
+    The graph is an extra, so a missing center node gives None instead of failing the tool.
+    """
+    if not include_graph:
+        return None
+    try:
+        return await asyncio.to_thread(get_graph_data_for_entity, entity_id)
+    except ContextGraphNotFound as e:
+        logger.warning("No graph data for %s: %s", entity_id, e)
+        return None
+
+
 @tool(
     "search_customer",
     "Search for customers by name, email, or account number. Returns customer profiles with risk scores and related account counts.",
-    {"query": str, "limit": int},
+    {"query": str, "limit": int, "include_graph": bool},
 )
 async def search_customer(args: dict[str, Any]) -> dict[str, Any]:
     """Search for customers in the context graph."""
-    try:
-        results = context_graph_client.search_customers(
-            query=args["query"], limit=args.get("limit", 10)
+    if error := _missing_args(args, "query"):
+        return error
+    if not args.get("include_graph", False):
+        results = await asyncio.to_thread(
+            context_graph_client.search_customers,
+            query=args["query"],
+            limit=args.get("limit", 10),
         )
-        # Include graph data for top customers (1 hop from each)
-        graphs = []
-        for customer in results[:3]:  # Limit to first 3 customers
-            customer_id = customer.get("id")
-            if customer_id:
-                customer_graph = get_graph_data_for_entity(customer_id, depth=1)
-                graphs.append(customer_graph)
-
-        # Merge all graph data with size limits
-        graph_data = merge_graph_data(graphs) if graphs else {"nodes": [], "relationships": []}
-
-        response = {
-            "customers": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error searching customers: {str(e)}"}],
-            "is_error": True,
-        }
+        response = {"customers": results, "graph_data": None}
+        return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
+
+    # Search and fetch graph data for the top 3 customers (1 hop) in one round-trip
+    results, customer_graph = await asyncio.to_thread(
+        context_graph_client.search_customers_with_graph,
+        query=args["query"],
+        limit=args.get("limit", 10),
+        graph_depth=1,
+        graph_customers=3,
+    )
+
+    # Merge all graph data with size limits
+    graph_data = merge_graph_data([graph_data_to_dict(customer_graph)])
+
+    response = {
+        "customers": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
     "get_customer_decisions",
     "Get all decisions made about a specific customer, including approvals, rejections, escalations, and exceptions.",
-    {"customer_id": str, "decision_type": str, "limit": int},
+    {"customer_id": str, "decision_type": str, "limit": int, "include_graph": bool},
 )
 async def get_customer_decisions(args: dict[str, Any]) -> dict[str, Any]:
     """Get decisions about a customer."""
-    try:
-        results = context_graph_client.get_customer_decisions(
+    if error := _missing_args(args, "customer_id"):
+        return error
+    # Fetch decisions and graph data centered on the customer concurrently
+    results, graph_data = await asyncio.gather(
+        asyncio.to_thread(
+            context_graph_client.get_customer_decisions,
             customer_id=args["customer_id"],
             decision_type=args.get("decision_type"),
             limit=args.get("limit", 20),
-        )
-        # Include graph data centered on the customer
-        graph_data = get_graph_data_for_entity(args["customer_id"], depth=2)
+        ),
+        _fetch_graph(args["customer_id"], args.get("include_graph", False)),
+    )
 
-        response = {
-            "decisions": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting decisions: {str(e)}"}],
-            "is_error": True,
-        }
+    response = {
+        "decisions": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
@@ -1049,6 +1333,11 @@ async def get_customer_decisions(args: dict[str, Any]) -> dict[str, Any]:
             "type": int,
             "description": "Number of similar decisions to return",
             "default": 5
+        },
+        "include_graph": {
+            "type": bool,
+            "description": "Also return graph visualization data centered on the decision",
+            "default": False
         }
     },
 )
@@ -1056,83 +1345,95 @@ async def find_similar_decisions(args: dict[str, Any]) -> dict[str, Any]:
     """Find similar decisions using FastRP embeddings."""
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        decision_id = args["decision_id"]
-        limit = int(args.get("limit", 10))
-
-        similar_decisions = gds_client.find_similar_decisions(decision_id, limit=limit)
+    if error := _missing_args(args, "decision_id"):
+        return error
+    decision_id = args["decision_id"]
+    limit = int(args.get("limit", 10))
 
-        # Include graph data centered on the decision
-        graph_data = get_graph_data_for_entity(decision_id, depth=2)
+    # Fetch similar decisions and graph data centered on the decision concurrently
+    similar_decisions, graph_data = await asyncio.gather(
+        asyncio.to_thread(gds_client.find_similar_decisions, decision_id, limit=limit),
+        _fetch_graph(decision_id, args.get("include_graph", False)),
+    )
 
-        response = {
-            "similar_decisions": similar_decisions,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding similar decisions: {str(e)}"}],
-            "is_error": True,
-        }
+    response = {
+        "similar_decisions": similar_decisions,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
     "find_precedents",
     "Find precedent decisions that could inform the current decision. Uses both semantic similarity (meaning) and structural similarity (graph patterns).",
-    {"scenario": str, "category": str, "limit": int},
+    {"scenario": str, "category": str, "limit": int, "include_graph": bool},
 )
 async def find_precedents(args: dict[str, Any]) -> dict[str, Any]:
     """Find precedent decisions using hybrid search."""
-    try:
-        results = vector_client.find_precedents_hybrid(
-            scenario=args["scenario"], category=args.get("category"), limit=args.get("limit", 5)
-        )
-        # Include graph data for the first precedent found
-        graph_data = None
-        if results and len(results) > 0:
-            first_id = results[0].get("id") if isinstance(results[0], dict) else None
-            if first_id:
-                graph_data = get_graph_data_for_entity(first_id, depth=2)
-
-        response = {
-            "precedents": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding precedents: {str(e)}"}],
-            "is_error": True,
-        }
+    if error := _missing_args(args, "scenario"):
+        return error
+    results = await asyncio.to_thread(
+        vector_client.find_precedents_hybrid,
+        scenario=args["scenario"],
+        category=args.get("category"),
+        limit=args.get("limit", 5),
+    )
+    # Include graph data for the first precedent found
+    graph_data = None
+    if args.get("include_graph", False) and results:
+        first_id = results[0].get("id") if isinstance(results[0], dict) else None
+        if first_id:
+            graph_data = await _fetch_graph(first_id, True)
+
+    response = {
+        "precedents": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 
 @tool(
     "get_causal_chain",
     "Trace the causal chain of a decision - what caused it and what it led to. Useful for understanding decision impact and history.",
-    {"decision_id": str, "direction": str, "depth": int},
+    {"decision_id": str, "direction": str, "depth": int, "include_graph": bool},
 )
 async def get_causal_chain(args: dict[str, Any]) -> dict[str, Any]:
     """Get the causal chain for a decision."""
-    try:
-        results = context_graph_client.get_causal_chain(
+    if error := _missing_args(args, "decision_id"):
+        return error
+    # Fetch the chain and graph data centered on the decision concurrently
+    results, graph_data = await asyncio.gather(
+        asyncio.to_thread(
+            context_graph_client.get_causal_chain,
             decision_id=args["decision_id"],
             direction=args.get("direction", "both"),
             depth=args.get("depth", 3),
-        )
-        # Include graph data centered on the decision
-        graph_data = get_graph_data_for_entity(args["decision_id"], depth=3)
+        ),
+        _fetch_graph(args["decision_id"], args.get("include_graph", False)),
+    )
+
+    response = {
+        "causal_chain": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
-        response = {
-            "causal_chain": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting causal chain: {str(e)}"}],
-            "is_error": True,
-        }
+
+@tool(
+    "get_graph_view",
+    "Get graph visualization data (nodes and relationships) centered on a customer, account, decision or other entity. Use this to show the graph for results fetched earlier.",
+    {"entity_id": str},
+)
+async def get_graph_view(args: dict[str, Any]) -> dict[str, Any]:
+    """Get graph visualization data centered on an entity."""
+    if error := _missing_args(args, "entity_id"):
+        return error
+    try:
+        graph_data = await asyncio.to_thread(get_graph_data_for_entity, args["entity_id"])
+    except ContextGraphNotFound as e:
+        return _error_response(f"Error getting graph view: {e}")
+
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack({"graph_data": graph_data})}]}
 
 
 @tool(
@@ -1151,46 +1452,44 @@ async def get_causal_chain(args: dict[str, Any]) -> dict[str, Any]:
 )
 async def record_decision(args: dict[str, Any]) -> dict[str, Any]:
     """Record a new decision in the context graph."""
+    if error := _missing_args(args, "decision_type", "category", "reasoning"):
+        return error
+    # Generate embedding for the reasoning
+    reasoning_embedding = None
     try:
-        # Generate embedding for the reasoning
-        reasoning_embedding = None
-        try:
-            reasoning_embedding = vector_client.generate_embedding(args["reasoning"])
-        except Exception:
-            pass  # Continue without embedding if it fails
-
-        decision_id = context_graph_client.record_decision(
-            decision_type=args["decision_type"],
-            category=args["category"],
-            reasoning=args["reasoning"],
-            customer_id=args.get("customer_id"),
-            account_id=args.get("account_id"),
-            risk_factors=args.get("risk_factors", []),
-            precedent_ids=args.get("precedent_ids", []),
-            confidence_score=args.get("confidence_score", 0.8),
-            reasoning_embedding=reasoning_embedding,
+        reasoning_embedding = await asyncio.to_thread(
+            vector_client.generate_embedding, args["reasoning"]
         )
+    except Exception:
+        pass  # Continue without embedding if it fails
+
+    decision_id = await asyncio.to_thread(
+        context_graph_client.record_decision,
+        decision_type=args["decision_type"],
+        category=args["category"],
+        reasoning=args["reasoning"],
+        customer_id=args.get("customer_id"),
+        account_id=args.get("account_id"),
+        risk_factors=args.get("risk_factors", []),
+        precedent_ids=args.get("precedent_ids", []),
+        confidence_score=args.get("confidence_score", 0.8),
+        reasoning_embedding=reasoning_embedding,
+    )
 
-        return {
-            "content": [
-                {
-                    "type": "text",
-                    "text": json.dumps(
-                        {
-                            "success": True,
-                            "decision_id": decision_id,
-                            "message": f"Decision recorded successfully with ID {decision_id}",
-                        },
-                        indent=2,
-                    ),
-                }
-            ]
-        }
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error recording decision: {str(e)}"}],
-            "is_error": True,
-        }
+    return {
+        "content": [
+            {
+                **_TEXT_ENVELOPE,
+                "text": _pack(
+                    {
+                        "success": True,
+                        "decision_id": decision_id,
+                        "message": f"Decision recorded successfully with ID {decision_id}",
+                    }
+                ),
+            }
+        ]
+    }
 
 
 @tool(
@@ -1213,18 +1512,15 @@ async def detect_fraud_patterns(args: dict[str, Any]) -> dict[str, Any]:
     """Detect fraud patterns using graph analysis."""
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        neighbor_count = int(args.get("neighbor_count", 5))
-        results = gds_client.detect_fraud_patterns(
-            account_id=args.get("account_id"),
-            neighbor_count=neighbor_count,
-        )
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error detecting fraud patterns: {str(e)}"}],
-            "is_error": True,
-        }
+    if error := _missing_args(args, "account_id"):
+        return error
+    neighbor_count = int(args.get("neighbor_count", 5))
+    results = await asyncio.to_thread(
+        gds_client.detect_fraud_patterns,
+        account_id=args.get("account_id"),
+        neighbor_count=neighbor_count,
+    )
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
 
 
 @tool(
@@ -1239,33 +1535,37 @@ async def detect_fraud_patterns(args: dict[str, Any]) -> dict[str, Any]:
             "type": int,
             "description": "Number of example decisions to return from the community",
             "default": 5
+        },
+        "include_graph": {
+            "type": bool,
+            "description": "Also return graph visualization data centered on the decision",
+            "default": False
         }
     },
 )
 async def find_decision_community(args: dict[str, Any]) -> dict[str, Any]:
     """Find decisions in the same community using Leiden."""
-    decision_id = args["decision_id"]
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        example_count = int(args.get("example_count", 5))
-        results = gds_client.get_decision_community(
-            decision_id=args["decision_id"], example_count=example_count
-        )
- 
-        # Include graph data centered on the decision
-        graph_data = get_graph_data_for_entity(decision_id, depth=2)
+    if error := _missing_args(args, "decision_id"):
+        return error
+    decision_id = args["decision_id"]
+    example_count = int(args.get("example_count", 5))
+    # Fetch the community and graph data centered on the decision concurrently
+    results, graph_data = await asyncio.gather(
+        asyncio.to_thread(
+            gds_client.get_decision_community,
+            decision_id=decision_id,
+            example_count=example_count,
+        ),
+        _fetch_graph(decision_id, args.get("include_graph", False)),
+    )
 
-        response = {
-            "community_decisions": results,
-            "graph_data": graph_data,
-        }
-        return {"content": [{"type": "text", "text": json.dumps(response, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding community: {str(e)}"}],
-            "is_error": True,
-        }
+    response = {
+        "community_decisions": results,
+        "graph_data": graph_data,
+    }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(response)}]}
 
 @tool(
     "find_accounts_with_high_shared_transaction_volume",
@@ -1281,17 +1581,14 @@ async def find_accounts_with_high_shared_transaction_volume(args: dict[str, Any]
     """Find accounts with high shared transaction volume."""
     if not gds_client:
         return {"error": "GDS not available. This feature requires Neo4j AuraDS or Enterprise with GDS plugin."}
-    try:
-        results = gds_client.find_accounts_with_high_shared_transaction_volume(
-            account_id=args.get("account_id")
-        )
+    if error := _missing_args(args, "account_id"):
+        return error
+    results = await asyncio.to_thread(
+        gds_client.find_accounts_with_high_shared_transaction_volume,
+        account_id=args.get("account_id"),
+    )
 
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error finding accounts with high shared transaction volume: {str(e)}"}],
-            "is_error": True,
-        }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
     
 
 @tool(
@@ -1301,59 +1598,50 @@ async def find_accounts_with_high_shared_transaction_volume(args: dict[str, Any]
 )
 async def get_policy(args: dict[str, Any]) -> dict[str, Any]:
     """Get policy information."""
-    try:
-        # Get all policies for the category
-        policies = context_graph_client.get_policies(category=args.get("category"))
-
-        if args.get("policy_name"):
-            # Extract meaningful words from the search query (skip common words)
-            stop_words = {"the", "a", "an", "for", "and", "or", "of", "in", "to", "with"}
-            search_words = [
-                word.lower()
-                for word in args["policy_name"].split()
-                if word.lower() not in stop_words and len(word) > 2
-            ]
-
-            # Score each policy by how many search words match
-            scored_policies = []
-            for policy in policies:
-                policy_name_lower = policy.get("name", "").lower()
-                # Count how many search words appear in the policy name
-                matches = sum(1 for word in search_words if word in policy_name_lower)
-                if matches > 0:
-                    scored_policies.append({"policy": policy, "relevance_score": matches})
-
-            # Sort by relevance score (highest first)
-            scored_policies.sort(key=lambda x: x["relevance_score"], reverse=True)
-
-            if scored_policies:
-                # Return all matching policies with relevance info
-                results = {
-                    "matching_policies": [
-                        {**sp["policy"], "relevance_score": sp["relevance_score"]}
-                        for sp in scored_policies
-                    ],
-                    "search_terms": search_words,
-                    "total_matches": len(scored_policies),
-                }
-            else:
-                # No matches found - return all policies in category as fallback
-                results = {
-                    "matching_policies": [],
-                    "search_terms": search_words,
-                    "total_matches": 0,
-                    "all_policies_in_category": policies,
-                    "note": f"No policies matched '{args['policy_name']}'. Showing all policies in category.",
-                }
+    if args.get("policy_name"):
+        # Extract meaningful words from the search query (skip common words)
+        stop_words = {"the", "a", "an", "for", "and", "or", "of", "in", "to", "with"}
+        search_words = [
+            word.lower()
+            for word in args["policy_name"].split()
+            if word.lower() not in stop_words and len(word) > 2
+        ]
+
+        # Score policies by how many search words match (highest first) in the database
+        scored_policies = await asyncio.to_thread(
+            context_graph_client.get_policies_by_name,
+            search_words,
+            category=args.get("category"),
+        )
+
+        if scored_policies:
+            # Return all matching policies with relevance info
+            results = {
+                "matching_policies": [
+                    {**sp["policy"], "relevance_score": sp["relevance_score"]}
+                    for sp in scored_policies
+                ],
+                "search_terms": search_words,
+                "total_matches": len(scored_policies),
+            }
         else:
-            results = policies
+            # No matches found - return all policies in category as fallback
+            policies = await asyncio.to_thread(
+                context_graph_client.get_policies, category=args.get("category")
+            )
+            results = {
+                "matching_policies": [],
+                "search_terms": search_words,
+                "total_matches": 0,
+                "all_policies_in_category": policies,
+                "note": f"No policies matched '{args['policy_name']}'. Showing all policies in category.",
+            }
+    else:
+        results = await asyncio.to_thread(
+            context_graph_client.get_policies, category=args.get("category")
+        )
 
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting policy: {str(e)}"}],
-            "is_error": True,
-        }
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
 
 
 @tool(
@@ -1363,19 +1651,15 @@ async def get_policy(args: dict[str, Any]) -> dict[str, Any]:
 )
 async def execute_cypher(args: dict[str, Any]) -> dict[str, Any]:
     """Execute a read-only Cypher query."""
+    if not args.get("cypher", "").strip():
+        return _error_response("Query not allowed: cypher is empty")
     try:
-        results = context_graph_client.execute_cypher(cypher=args["cypher"])
-        return {"content": [{"type": "text", "text": json.dumps(results, indent=2, default=str)}]}
-    except ValueError as e:
-        return {
-            "content": [{"type": "text", "text": f"Query not allowed: {str(e)}"}],
-            "is_error": True,
-        }
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error executing query: {str(e)}"}],
-            "is_error": True,
-        }
+        results = await asyncio.to_thread(
+            context_graph_client.execute_cypher, cypher=args["cypher"]
+        )
+    except CypherValidationError as e:
+        return _error_response(f"Query not allowed: {e}")
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(results)}]}
 
 
 @tool(
@@ -1385,14 +1669,8 @@ async def execute_cypher(args: dict[str, Any]) -> dict[str, Any]:
 )
 async def get_schema(args: dict[str, Any]) -> dict[str, Any]:
     """Get the graph database schema."""
-    try:
-        schema = context_graph_client.get_schema()
-        return {"content": [{"type": "text", "text": json.dumps(schema, indent=2, default=str)}]}
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": f"Error getting schema: {str(e)}"}],
-            "is_error": True,
-        }
+    schema = await asyncio.to_thread(context_graph_client.get_schema)
+    return {"content": [{**_TEXT_ENVELOPE, "text": _pack(schema)}]}
 
 
 # ============================================
@@ -1400,8 +1678,9 @@ async def get_schema(args: dict[str, Any]) -> dict[str, Any]:
 # ============================================
 
 
+@lru_cache(maxsize=1)
 def create_context_graph_server():
-    """Create the MCP server with all context graph tools."""
+    """Create the MCP server with all context graph tools (built once, shared by sessions)."""
     return create_sdk_mcp_server(
         name="context-graph",
         version="1.0.0",
@@ -1411,6 +1690,7 @@ def create_context_graph_server():
             find_similar_decisions,
             find_precedents,
             get_causal_chain,
+            get_graph_view,
             record_decision,
             detect_fraud_patterns,
             find_decision_community,
@@ -1422,27 +1702,15 @@ def create_context_graph_server():
     )
 
 
+@lru_cache(maxsize=1)
 def get_agent_options() -> ClaudeAgentOptions:
-    """Get the agent options with context graph server configured."""
+    """Get the agent options with context graph server configured (built once)."""
     context_graph_server = create_context_graph_server()
 
     return ClaudeAgentOptions(
         system_prompt=CONTEXT_GRAPH_SYSTEM_PROMPT,
         mcp_servers={"graph": context_graph_server},
-        allowed_tools=[
-            "mcp__graph__search_customer",
-            "mcp__graph__get_customer_decisions",
-            "mcp__graph__find_similar_decisions",
-            "mcp__graph__find_precedents",
-            "mcp__graph__get_causal_chain",
-            "mcp__graph__record_decision",
-            "mcp__graph__detect_fraud_patterns",
-            "mcp__graph__find_decision_community",
-            "mcp__graph__find_accounts_with_high_shared_transaction_volume",
-            "mcp__graph__get_policy",
-            "mcp__graph__execute_cypher",
-            "mcp__graph__get_schema",
-        ],
+        allowed_tools=list(ALLOWED_TOOLS),
     )
 
 
@@ -1456,6 +1724,7 @@ AVAILABLE_TOOLS = [
     "find_similar_decisions",
     "find_precedents",
     "get_causal_chain",
+    "get_graph_view",
     "record_decision",
     "detect_fraud_patterns",
     "find_decision_community",
@@ -1465,9 +1734,13 @@ AVAILABLE_TOOLS = [
     "get_schema",
 ]
 
+# Fully qualified names of the tools on the "graph" MCP server
+ALLOWED_TOOLS = tuple(f"mcp__graph__{tool_name}" for tool_name in AVAILABLE_TOOLS)
 
+
+@lru_cache(maxsize=1)
 def get_agent_context() -> dict[str, Any]:
-    """Get agent context information for transparency/debugging."""
+    """Get agent context information for transparency/debugging (built once, read-only)."""
     return {
         "system_prompt": CONTEXT_GRAPH_SYSTEM_PROMPT,
         "model": "claude-sonnet-4-20250514",
@@ -1481,12 +1754,166 @@ def get_agent_context() -> dict[str, Any]:
 # ============================================
 
 
-class ContextGraphAgent:
-    """Wrapper for managing Claude Agent SDK sessions."""
+# Marks the end of a query_stream event queue
+_STREAM_DONE = object()
+
+# Adjacent text chunks are coalesced into one event, up to this many chunks or this long
+TEXT_BATCH_MAX_CHUNKS = 8
+TEXT_BATCH_WAIT_S = 0.03
+
+
+async def _read_coalesced(queue: asyncio.Queue) -> AsyncIterator[dict[str, Any]]:
+    """
+    Yield stream events from a queue until _STREAM_DONE, coalescing adjacent text events.
+
+    Producers may put a text delta on the queue as a bare str instead of a text event.
+    """
+    loop = asyncio.get_running_loop()
+    pending_text: list[str] = []
+    batch_deadline = 0.0
+    while True:
+        # While text is pending, only wait until its batch window closes
+        timeout = max(0.0, batch_deadline - loop.time()) if pending_text else None
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            yield {"type": "text", "content": "".join(pending_text)}
+            pending_text.clear()
+            continue
+
+        if isinstance(event, str):
+            text = event
+        elif event is not _STREAM_DONE and event["type"] == "text":
+            text = event["content"]
+        else:
+            text = None
+        if text is not None:
+            if not pending_text:
+                batch_deadline = loop.time() + TEXT_BATCH_WAIT_S
+            pending_text.append(text)
+            if len(pending_text) < TEXT_BATCH_MAX_CHUNKS:
+                continue
+            event = None
+
+        # Flush pending text before anything else to keep the event order
+        if pending_text:
+            yield {"type": "text", "content": "".join(pending_text)}
+            pending_text.clear()
+        if event is _STREAM_DONE:
+            return
+        if event is not None:
+            yield event
+
+
+# Token budget for the conversation history sent with each query
+HISTORY_TOKEN_BUDGET = 8000
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return len(text) // 4
+
+
+def _history_lines(conversation_history: list[dict[str, str]], max_tokens: int) -> list[str]:
+    """
+    Format the history as "ROLE: content" lines within the token budget.
+
+    The oldest user/assistant pairs are dropped first, always keeping the latest exchange.
+    """
+    lines = [f"{msg['role'].upper()}: {msg['content']}" for msg in conversation_history]
+    tokens = sum(_estimate_tokens(line) for line in lines)
+    start = 0
+    while tokens > max_tokens and len(lines) - start > 2:
+        tokens -= _estimate_tokens(lines[start]) + _estimate_tokens(lines[start + 1])
+        start += 2
+    return lines[start:]
+
+
+# Fully qualified name of the tool whose results are reported as decisions_made
+RECORD_DECISION_TOOL = "mcp__graph__record_decision"
+
+
+def _parse_tool_result(block_content: Any) -> Any:
+    """Decode a tool result's JSON text, falling back to the raw text."""
+    if isinstance(block_content, list):
+        # List of content item dicts; our tools put the text item first
+        item = block_content[0] if block_content else None
+        if not (isinstance(item, dict) and item.get("type") == "text"):
+            item = next(
+                (
+                    item
+                    for item in block_content
+                    if isinstance(item, dict) and item.get("type") == "text"
+                ),
+                None,
+            )
+        if item is None:
+            return None
+        block_content = item.get("text", "{}")
+    elif not isinstance(block_content, str):
+        return None
+
+    try:
+        return orjson.loads(block_content)
+    except orjson.JSONDecodeError:
+        return block_content
+
+
+def _recorded_decision_id(output: Any) -> str | None:
+    """Return the decision ID from a successful record_decision result."""
+    if isinstance(output, dict) and output.get("success"):
+        return output.get("decision_id")
+    return None
+
+
+class _StreamState:
+    """Per-stream bookkeeping shared by the query_stream block handlers."""
 
     def __init__(self):
+        self.tool_calls: list[dict[str, Any]] = []
+        self.tool_id_to_name: dict[str, str] = {}  # Map tool_use_id to tool name
+        self.decisions_made: list[str] = []  # IDs of decisions recorded by tools
+
+
+async def _user_turn(content: list[dict[str, Any]]):
+    """Yield content blocks as a single streaming-input user message for ClaudeSDKClient."""
+    yield {
+        "type": "user",
+        "message": {"role": "user", "content": content},
+        "parent_tool_use_id": None,
+    }
+
+
+class ContextGraphAgent:
+    """
+    Wrapper for managing Claude Agent SDK sessions.
+
+    Each ``async with`` block connects its own ClaudeSDKClient. The client is a stateful
+    conversation bound to the task that connected it, so it is not shared across requests;
+    the parts of the setup that can be shared (options, MCP server) are built once.
+    """
+
+    __slots__ = (
+        "options",
+        "client",
+        "max_history_tokens",
+        "_block_handlers",
+    )
+
+    # Static parts of the user turn
+    _HISTORY_TMPL = "Previous conversation:\n{history}"
+    _MESSAGE_TMPL = "Current message from USER: {message}"
+
+    def __init__(self, max_history_tokens: int = HISTORY_TOKEN_BUDGET):
         self.options = get_agent_options()
         self.client: ClaudeSDKClient | None = None
+        # Token budget for the history block, oldest pairs are dropped first
+        self.max_history_tokens = max_history_tokens
+        # Stream event builders, keyed by SDK message type and then content block type
+        self._block_handlers = {
+            AssistantMessage: {TextBlock: self._handle_text, ToolUseBlock: self._handle_tool_use},
+            UserMessage: {ToolResultBlock: self._handle_tool_result},
+        }
 
     async def __aenter__(self):
         self.client = ClaudeSDKClient(options=self.options)
@@ -1496,6 +1923,38 @@ class ContextGraphAgent:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.client:
             await self.client.disconnect()
+            self.client = None
+
+    def _build_prompt(
+        self, message: str, conversation_history: list[dict[str, str]]
+    ) -> list[dict[str, Any]]:
+        """
+        Build the user turn content blocks.
+
+        The history (trimmed to the token budget) goes in its own block behind a cache
+        breakpoint, and the current message follows uncached, so the history prefix stays
+        byte-stable.
+        """
+        lines = _history_lines(conversation_history, self.max_history_tokens)
+
+        return [
+            {
+                **_TEXT_ENVELOPE,
+                "text": self._HISTORY_TMPL.format(history="\n".join(lines)),
+                "cache_control": {"type": "ephemeral"},
+            },
+            {**_TEXT_ENVELOPE, "text": self._MESSAGE_TMPL.format(message=message)},
+        ]
+
+    async def _send(
+        self, message: str, conversation_history: list[dict[str, str]] | None
+    ) -> None:
+        """Send the user turn; without history the bare message goes out unwrapped."""
+        if not conversation_history:
+            await self.client.query(message)
+            return
+        # History block ahead of the current message
+        await self.client.query(_user_turn(self._build_prompt(message, conversation_history)))
 
     async def query(
         self, message: str, conversation_history: list[dict[str, str]] | None = None
@@ -1504,48 +1963,34 @@ class ContextGraphAgent:
         if not self.client:
             raise RuntimeError("Agent not connected. Use 'async with' context manager.")
 
-        # Build message with conversation context
-        if conversation_history and len(conversation_history) > 0:
-            # Format history as context in the message
-            history_text = "\n".join(
-                [
-                    f"{msg['role'].upper()}: {msg['content']}" for msg in conversation_history[-6:]
-                ]  # Last 6 messages
-            )
-            full_message = f"""Previous conversation:
-{history_text}
-
-Current message from USER: {message}
-
-Please respond to the current message, taking the conversation history into account."""
-        else:
-            full_message = message
-
-        # Send the message
-        await self.client.query(full_message)
+        await self._send(message, conversation_history)
 
         response_text = ""
         tool_calls = []
         decisions_made = []
+        record_ids = set()  # tool_use_ids of record_decision calls
 
         async for msg in self.client.receive_response():
-            # Process different message types
-            if hasattr(msg, "content"):
+            # Assistant messages carry text and tool use blocks
+            if isinstance(msg, AssistantMessage):
                 for block in msg.content:
-                    if hasattr(block, "text"):
+                    if isinstance(block, TextBlock):
                         response_text += block.text
-                    elif hasattr(block, "name"):
-                        # Tool use block
+                    elif isinstance(block, ToolUseBlock):
                         tool_calls.append(
                             {
                                 "name": block.name,
-                                "input": block.input if hasattr(block, "input") else {},
+                                "input": block.input,
                             }
                         )
-                        # Track decisions made
-                        if block.name == "mcp__graph__record_decision":
-                            # Will be populated when we get the result
-                            pass
+                        if block.name == RECORD_DECISION_TOOL:
+                            record_ids.add(block.id)
+            # Tool results come back in user messages; only decisions are kept
+            elif isinstance(msg, UserMessage) and record_ids:
+                for block in msg.content:
+                    if isinstance(block, ToolResultBlock) and block.tool_use_id in record_ids:
+                        if decision_id := _recorded_decision_id(_parse_tool_result(block.content)):
+                            decisions_made.append(decision_id)
 
         return {
             "response": response_text,
@@ -1553,6 +1998,28 @@ Please respond to the current message, taking the conversation history into acco
             "decisions_made": decisions_made,
         }
 
+    async def query_many(
+        self,
+        messages: list[str],
+        conversation_history: list[dict[str, str]] | None = None,
+        max_concurrent: int = 4,
+    ) -> list[dict[str, Any]]:
+        """
+        Answer independent messages concurrently and return the results in order.
+
+        An SDK session serves one conversation at a time, so each message runs in its own
+        session, at most max_concurrent at once. conversation_history is shared by all of
+        them and only read.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def run_one(message: str) -> dict[str, Any]:
+            async with semaphore:
+                async with ContextGraphAgent(self.max_history_tokens) as agent:
+                    return await agent.query(message, conversation_history)
+
+        return list(await asyncio.gather(*(run_one(message) for message in messages)))
+
     async def query_stream(
         self, message: str, conversation_history: list[dict[str, str]] | None = None
     ):
@@ -1560,109 +2027,92 @@ Please respond to the current message, taking the conversation history into acco
         if not self.client:
             raise RuntimeError("Agent not connected. Use 'async with' context manager.")
 
-        # Build message with conversation context
-        if conversation_history and len(conversation_history) > 0:
-            history_text = "\n".join(
-                [f"{msg['role'].upper()}: {msg['content']}" for msg in conversation_history[-6:]]
-            )
-            full_message = f"""Previous conversation:
-{history_text}
-
-Current message from USER: {message}
-
-Please respond to the current message, taking the conversation history into account."""
-        else:
-            full_message = message
-
         # Emit agent context first
         yield {"type": "agent_context", "context": get_agent_context()}
 
-        # Send the message
-        await self.client.query(full_message)
-
-        tool_calls = []
-        tool_id_to_name = {}  # Map tool_use_id to tool name
-        decisions_made = []
-
-        async for msg in self.client.receive_response():
-            msg_type = type(msg).__name__
+        await self._send(message, conversation_history)
 
-            # Handle UserMessage containing ToolResultBlock objects
-            if msg_type == "UserMessage" and hasattr(msg, "content"):
+        # SDK reads and block parsing run in a producer task, so they overlap with
+        # whatever the consumer does with each event
+        queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+        producer = asyncio.create_task(self._drain_into_queue(queue))
+        try:
+            async for event in _read_coalesced(queue):
+                yield event
+            await producer  # Surface any error raised while reading
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    async def _drain_into_queue(self, queue: asyncio.Queue) -> None:
+        """Read the SDK response, parse it into stream events and put them on the queue."""
+        state = _StreamState()
+        cancelled = False
+        try:
+            async for msg in self.client.receive_response():
+                block_handlers = self._block_handlers.get(type(msg))
+                if block_handlers is None:
+                    continue
                 for block in msg.content:
-                    block_type = type(block).__name__
-                    # ToolResultBlock has tool_use_id and content attributes
-                    if block_type == "ToolResultBlock":
-                        tool_use_id = getattr(block, "tool_use_id", None)
-                        block_content = getattr(block, "content", None)
-
-                        print(f"[DEBUG] ToolResultBlock - tool_use_id: {tool_use_id}")
-
-                        if tool_use_id:
-                            parsed_output = None
-
-                            # Parse the block content (list of content items)
-                            if isinstance(block_content, list):
-                                for item in block_content:
-                                    if isinstance(item, dict) and item.get("type") == "text":
-                                        try:
-                                            parsed_output = json.loads(item.get("text", "{}"))
-                                        except json.JSONDecodeError:
-                                            parsed_output = item.get("text")
-                                        break
-                                    elif hasattr(item, "text"):
-                                        try:
-                                            parsed_output = json.loads(item.text)
-                                        except json.JSONDecodeError:
-                                            parsed_output = item.text
-                                        break
-                            elif isinstance(block_content, str):
-                                try:
-                                    parsed_output = json.loads(block_content)
-                                except json.JSONDecodeError:
-                                    parsed_output = block_content
-
-                            # Look up the tool name from the tool_use_id
-                            tool_name = tool_id_to_name.get(tool_use_id, "unknown")
-                            print(
-                                f"[DEBUG] Yielding tool_result: name={tool_name}, output_type={type(parsed_output)}"
-                            )
-
-                            yield {
-                                "type": "tool_result",
-                                "name": tool_name,
-                                "output": parsed_output,
-                            }
-                continue
+                    handler = block_handlers.get(type(block))
+                    if handler and (event := handler(block, state)) is not None:
+                        await queue.put(event)
 
-            # Handle AssistantMessage content blocks
-            if hasattr(msg, "content"):
-                for block in msg.content:
-                    if hasattr(block, "text"):
-                        # Stream text content
-                        yield {"type": "text", "content": block.text}
-                    elif hasattr(block, "name"):
-                        # Tool use block
-                        tool_id = getattr(block, "id", None)
-                        tool_call = {
-                            "name": block.name,
-                            "input": block.input if hasattr(block, "input") else {},
-                        }
-                        tool_calls.append(tool_call)
-
-                        # Track tool_use_id to name mapping
-                        if tool_id:
-                            tool_id_to_name[tool_id] = block.name
-
-                        yield {"type": "tool_use", **tool_call}
-
-                        # Track decisions made
-                        if block.name == "mcp__graph__record_decision":
-                            pass
-
-        # Final event with summary
-        yield {
-            "type": "done",
-            "tool_calls": tool_calls,
-            "decisions_made": decisions_made,
+            # Final event with summary
+            await queue.put(
+                {
+                    "type": "done",
+                    "tool_calls": state.tool_calls,
+                    "decisions_made": state.decisions_made,
+                }
+            )
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # Once cancelled, the consumer has stopped reading: the queue may be full and
+            # nothing waits for the end marker, so putting it could block forever
+            if not cancelled:
+                await queue.put(_STREAM_DONE)
+
+    def _handle_text(self, block: TextBlock, state: "_StreamState") -> dict[str, Any]:
+        """Stream text content."""
+        return {"type": "text", "content": block.text}
+
+    def _handle_tool_use(self, block: ToolUseBlock, state: "_StreamState") -> dict[str, Any]:
+        """Record a tool call and stream it."""
+        # One dict serves as both the stream event and the tool_calls entry
+        payload = {"type": "tool_use", "name": block.name, "input": block.input}
+        state.tool_calls.append(payload)
+        # Track tool_use_id to name mapping
+        state.tool_id_to_name[block.id] = block.name
+        return payload
+
+    def _handle_tool_result(
+        self, block: ToolResultBlock, state: "_StreamState"
+    ) -> dict[str, Any] | None:
+        """Parse a tool result and stream it under the name of the tool that produced it."""
+        tool_use_id = block.tool_use_id
+
+        logger.debug("ToolResultBlock - tool_use_id: %s", tool_use_id)
+
+        if not tool_use_id:
+            return None
+
+        parsed_output = _parse_tool_result(block.content)
+
+        # Look up the tool name from the tool_use_id
+        tool_name = state.tool_id_to_name.get(tool_use_id, "unknown")
+        if tool_name == RECORD_DECISION_TOOL and (
+            decision_id := _recorded_decision_id(parsed_output)
+        ):
+            state.decisions_made.append(decision_id)
+        logger.debug(
+            "Yielding tool_result: name=%s, output_type=%s", tool_name, type(parsed_output).__name__
+        )
+
+        return {
+            "type": "tool_result",
+            "name": tool_name,
+            "output": parsed_output,
         }
@@ -3,13 +3,21 @@ Bedrock-compatible agent that works with MCP tools.
 This is a wrapper that uses BedrockAgent instead of Claude Agent SDK.
 """
 
-import json
+import asyncio
 import logging
-from typing import Any, AsyncIterator
+import time
+
+import fastjsonschema
+import orjson
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Mapping, Sequence
 
 from .agent import (
     AVAILABLE_TOOLS,
     CONTEXT_GRAPH_SYSTEM_PROMPT,
+    _STREAM_DONE,
+    _error_response,
+    _read_coalesced,
     detect_fraud_patterns,
     execute_cypher,
     find_accounts_with_high_shared_transaction_volume,
@@ -18,6 +26,7 @@ from .agent import (
     find_similar_decisions,
     get_causal_chain,
     get_customer_decisions,
+    get_graph_view,
     get_policy,
     get_schema,
     record_decision,
@@ -29,488 +38,402 @@ from .config import config
 logger = logging.getLogger(__name__)
 
 
-def convert_mcp_tools_to_bedrock_format(mcp_tools: list) -> list[dict[str, Any]]:
-    """
-    Convert MCP tool definitions to Bedrock/Anthropic tool format.
-    
-    MCP tools are decorated with @tool, we need to extract their schemas.
-    """
-    bedrock_tools = []
-    
-    tool_schemas = {
-        "search_customer": {
-            "name": "search_customer",
-            "description": "Search for customers by name, email, or account number. Returns customer profiles with risk scores and related account counts.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string", "description": "Search query"},
-                    "limit": {"type": "integer", "description": "Maximum results", "default": 10},
-                },
-                "required": ["query"],
+# Bedrock/Anthropic tool definitions, mirroring the MCP tools in .agent (built once at import)
+_TOOL_SCHEMAS: dict[str, dict[str, Any]] = {
+    "search_customer": {
+        "name": "search_customer",
+        "description": "Search for customers by name, email, or account number. Returns customer profiles with risk scores and related account counts.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Search query"},
+                "limit": {"type": "integer", "description": "Maximum results", "default": 10},
+                "include_graph": {"type": "boolean", "description": "Also return graph visualization data", "default": False},
             },
+            "required": ["query"],
         },
-        "get_customer_decisions": {
-            "name": "get_customer_decisions",
-            "description": "Get all decisions made about a specific customer, including approvals, rejections, escalations, and exceptions.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "customer_id": {"type": "string", "description": "Customer ID"},
-                    "decision_type": {"type": "string", "description": "Filter by decision type"},
-                    "limit": {"type": "integer", "description": "Maximum results", "default": 20},
-                },
-                "required": ["customer_id"],
+    },
+    "get_customer_decisions": {
+        "name": "get_customer_decisions",
+        "description": "Get all decisions made about a specific customer, including approvals, rejections, escalations, and exceptions.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "customer_id": {"type": "string", "description": "Customer ID"},
+                "decision_type": {"type": "string", "description": "Filter by decision type"},
+                "limit": {"type": "integer", "description": "Maximum results", "default": 20},
+                "include_graph": {"type": "boolean", "description": "Also return graph visualization data", "default": False},
             },
+            "required": ["customer_id"],
         },
-        "find_similar_decisions": {
-            "name": "find_similar_decisions",
-            "description": "Find structurally similar past decisions using FastRP graph embeddings. Returns decisions with similar influences, causes, and precedents.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_id": {"type": "string", "description": "The internal decision ID"},
-                    "limit": {"type": "integer", "description": "Number of similar decisions", "default": 5},
-                },
-                "required": ["decision_id"],
+    },
+    "find_similar_decisions": {
+        "name": "find_similar_decisions",
+        "description": "Find structurally similar past decisions using FastRP graph embeddings. Returns decisions with similar influences, causes, and precedents.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "decision_id": {"type": "string", "description": "The internal decision ID"},
+                "limit": {"type": "integer", "description": "Number of similar decisions", "default": 5},
+                "include_graph": {"type": "boolean", "description": "Also return graph visualization data", "default": False},
             },
+            "required": ["decision_id"],
         },
-        "find_precedents": {
-            "name": "find_precedents",
-            "description": "Find precedent decisions that could inform the current decision. Uses both semantic similarity (meaning) and structural similarity (graph patterns).",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "scenario": {"type": "string", "description": "Scenario description"},
-                    "category": {"type": "string", "description": "Decision category"},
-                    "limit": {"type": "integer", "description": "Maximum results", "default": 5},
-                },
-                "required": ["scenario"],
+    },
+    "find_precedents": {
+        "name": "find_precedents",
+        "description": "Find precedent decisions that could inform the current decision. Uses both semantic similarity (meaning) and structural similarity (graph patterns).",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "scenario": {"type": "string", "description": "Scenario description"},
+                "category": {"type": "string", "description": "Decision category"},
+                "limit": {"type": "integer", "description": "Maximum results", "default": 5},
+                "include_graph": {"type": "boolean", "description": "Also return graph visualization data", "default": False},
             },
+            "required": ["scenario"],
         },
-        "get_causal_chain": {
-            "name": "get_causal_chain",
-            "description": "Trace the causal chain of a decision - what caused it and what it led to.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_id": {"type": "string", "description": "Decision ID"},
-                    "direction": {"type": "string", "description": "Direction: 'upstream', 'downstream', or 'both'", "default": "both"},
-                    "depth": {"type": "integer", "description": "Depth to traverse", "default": 3},
-                },
-                "required": ["decision_id"],
+    },
+    "get_causal_chain": {
+        "name": "get_causal_chain",
+        "description": "Trace the causal chain of a decision - what caused it and what it led to.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "decision_id": {"type": "string", "description": "Decision ID"},
+                "direction": {"type": "string", "description": "Direction: 'upstream', 'downstream', or 'both'", "default": "both"},
+                "depth": {"type": "integer", "description": "Depth to traverse", "default": 3},
+                "include_graph": {"type": "boolean", "description": "Also return graph visualization data", "default": False},
             },
+            "required": ["decision_id"],
         },
-        "record_decision": {
-            "name": "record_decision",
-            "description": "Record a new decision with full reasoning context. Creates a decision trace in the context graph.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_type": {"type": "string", "description": "Type of decision"},
-                    "category": {"type": "string", "description": "Decision category"},
-                    "reasoning": {"type": "string", "description": "Full reasoning"},
-                    "customer_id": {"type": "string", "description": "Customer ID"},
-                    "account_id": {"type": "string", "description": "Account ID"},
-                    "risk_factors": {"type": "array", "items": {"type": "string"}, "description": "Risk factors"},
-                    "precedent_ids": {"type": "array", "items": {"type": "string"}, "description": "Precedent decision IDs"},
-                    "confidence_score": {"type": "number", "description": "Confidence score 0-1", "default": 0.8},
-                },
-                "required": ["decision_type", "category", "reasoning"],
+    },
+    "get_graph_view": {
+        "name": "get_graph_view",
+        "description": "Get graph visualization data (nodes and relationships) centered on a customer, account, decision or other entity.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "entity_id": {"type": "string", "description": "Entity ID"},
             },
+            "required": ["entity_id"],
         },
-        "detect_fraud_patterns": {
-            "name": "detect_fraud_patterns",
-            "description": "Analyze accounts or transactions for potential fraud patterns using graph structure analysis.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "account_id": {"type": "string", "description": "The internal account ID"},
-                    "neighbor_count": {"type": "integer", "description": "Number of examples to return", "default": 5},
-                },
-                "required": ["account_id"],
+    },
+    "record_decision": {
+        "name": "record_decision",
+        "description": "Record a new decision with full reasoning context. Creates a decision trace in the context graph.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "decision_type": {"type": "string", "description": "Type of decision"},
+                "category": {"type": "string", "description": "Decision category"},
+                "reasoning": {"type": "string", "description": "Full reasoning"},
+                "customer_id": {"type": "string", "description": "Customer ID"},
+                "account_id": {"type": "string", "description": "Account ID"},
+                "risk_factors": {"type": "array", "items": {"type": "string"}, "description": "Risk factors"},
+                "precedent_ids": {"type": "array", "items": {"type": "string"}, "description": "Precedent decision IDs"},
+                "confidence_score": {"type": "number", "description": "Confidence score 0-1", "default": 0.8},
             },
+            "required": ["decision_type", "category", "reasoning"],
         },
-        "find_decision_community": {
-            "name": "find_decision_community",
-            "description": "Find decisions in the same community using Leiden community detection.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_id": {"type": "string", "description": "Decision ID"},
-                    "example_count": {"type": "integer", "description": "Number of examples", "default": 5},
-                },
-                "required": ["decision_id"],
+    },
+    "detect_fraud_patterns": {
+        "name": "detect_fraud_patterns",
+        "description": "Analyze accounts or transactions for potential fraud patterns using graph structure analysis.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "account_id": {"type": "string", "description": "The internal account ID"},
+                "neighbor_count": {"type": "integer", "description": "Number of examples to return", "default": 5},
             },
+            "required": ["account_id"],
         },
-        "find_accounts_with_high_shared_transaction_volume": {
-            "name": "find_accounts_with_high_shared_transaction_volume",
-            "description": "Find accounts that share high transaction volumes with a given account.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "account_id": {"type": "string", "description": "The internal account ID"},
-                },
-                "required": ["account_id"],
+    },
+    "find_decision_community": {
+        "name": "find_decision_community",
+        "description": "Find decisions in the same community using Leiden community detection.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "decision_id": {"type": "string", "description": "Decision ID"},
+                "example_count": {"type": "integer", "description": "Number of examples", "default": 5},
+                "include_graph": {"type": "boolean", "description": "Also return graph visualization data", "default": False},
             },
+            "required": ["decision_id"],
         },
-        "get_policy": {
-            "name": "get_policy",
-            "description": "Get the current policy rules for a specific category.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "category": {"type": "string", "description": "Policy category"},
-                    "policy_name": {"type": "string", "description": "Policy name to search for"},
-                },
-                "required": [],
+    },
+    "find_accounts_with_high_shared_transaction_volume": {
+        "name": "find_accounts_with_high_shared_transaction_volume",
+        "description": "Find accounts that share high transaction volumes with a given account.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "account_id": {"type": "string", "description": "The internal account ID"},
             },
+            "required": ["account_id"],
         },
-        "execute_cypher": {
-            "name": "execute_cypher",
-            "description": "Execute a read-only Cypher query against the context graph for custom analysis.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "cypher": {"type": "string", "description": "Cypher query"},
-                },
-                "required": ["cypher"],
+    },
+    "get_policy": {
+        "name": "get_policy",
+        "description": "Get the current policy rules for a specific category.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "category": {"type": "string", "description": "Policy category"},
+                "policy_name": {"type": "string", "description": "Policy name to search for"},
             },
+            "required": [],
         },
-        "get_schema": {
-            "name": "get_schema",
-            "description": "Get the graph database schema including node labels, relationship types, and property keys.",
-            "input_schema": {
-                "type": "object",
-                "properties": {},
-                "required": [],
+    },
+    "execute_cypher": {
+        "name": "execute_cypher",
+        "description": "Execute a read-only Cypher query against the context graph for custom analysis.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "cypher": {"type": "string", "description": "Cypher query"},
             },
+            "required": ["cypher"],
+        },
+    },
+    "get_schema": {
+        "name": "get_schema",
+        "description": "Get the graph database schema including node labels, relationship types, and property keys.",
+        "input_schema": {
+            "type": "object",
+            "properties": {},
+            "required": [],
         },
-    }
-    
-    return list(tool_schemas.values())
+    },
+}
 
 
-class ContextGraphAgentBedrock:
-    """Bedrock-based agent for context graph operations."""
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
 
-    def __init__(self):
-        self.tools = convert_mcp_tools_to_bedrock_format(AVAILABLE_TOOLS)
-        
-        # Map tool names to their SdkMcpTool objects
-        self.tool_objects = {
-            "search_customer": search_customer,
-            "get_customer_decisions": get_customer_decisions,
-            "find_similar_decisions": find_similar_decisions,
-            "find_precedents": find_precedents,
-            "get_causal_chain": get_causal_chain,
-            "record_decision": record_decision,
-            "detect_fraud_patterns": detect_fraud_patterns,
-            "find_decision_community": find_decision_community,
-            "find_accounts_with_high_shared_transaction_volume": find_accounts_with_high_shared_transaction_volume,
-            "get_policy": get_policy,
-            "execute_cypher": execute_cypher,
-            "get_schema": get_schema,
-        }
-        
-        # Create wrapper functions that properly invoke the SdkMcpTool objects
-        self.tool_handlers = {}
-        for name, tool_obj in self.tool_objects.items():
-            # SdkMcpTool objects have a 'handler' attribute that is the actual async function
-            if hasattr(tool_obj, 'handler'):
-                self.tool_handlers[name] = tool_obj.handler
-            elif callable(tool_obj):
-                self.tool_handlers[name] = tool_obj
-            else:
-                # Fallback: try to get the underlying function
-                self.tool_handlers[name] = getattr(tool_obj, 'func', tool_obj)
-        
-        self.agent = BedrockAgent(
-            system_prompt=CONTEXT_GRAPH_SYSTEM_PROMPT,
-            tools=self.tools,
-            model_id=config.bedrock.claude_model_id,
-        )
 
-    async def __aenter__(self):
-        await self.agent.connect()
-        return self
+# Frozen so every agent (and request) can share the same schemas without copying
+_BEDROCK_TOOLS: Sequence[Mapping[str, Any]] = tuple(
+    _freeze(schema) for schema in _TOOL_SCHEMAS.values()
+)
+# Tools as sent in every Bedrock request body, encoded once
+_BEDROCK_TOOLS_JSON: bytes = orjson.dumps(list(_TOOL_SCHEMAS.values()))
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.agent.disconnect()
 
-    async def query(
-        self, message: str, conversation_history: list[dict[str, str]] | None = None
-    ) -> dict[str, Any]:
-        """Send a query to the agent and get the response."""
-        if conversation_history:
-            for msg in conversation_history[-6:]:
-                self.agent.conversation_history.append(msg)
-        
-        result = await self.agent.run_agentic_loop(
-            message=message,
-            tool_handlers=self.tool_handlers,
-            max_iterations=10,
-        )
-        
-        return {
-            "response": result.get("response", ""),
-            "tool_calls": result.get("tool_calls", []),
-            "decisions_made": [],
-        }
+# Map tool names to their SdkMcpTool objects
+_TOOL_OBJECTS = {
+    "search_customer": search_customer,
+    "get_customer_decisions": get_customer_decisions,
+    "find_similar_decisions": find_similar_decisions,
+    "find_precedents": find_precedents,
+    "get_causal_chain": get_causal_chain,
+    "get_graph_view": get_graph_view,
+    "record_decision": record_decision,
+    "detect_fraud_patterns": detect_fraud_patterns,
+    "find_decision_community": find_decision_community,
+    "find_accounts_with_high_shared_transaction_volume": find_accounts_with_high_shared_transaction_volume,
+    "get_policy": get_policy,
+    "execute_cypher": execute_cypher,
+    "get_schema": get_schema,
+}
 
-    async def query_stream(
-        self, message: str, conversation_history: list[dict[str, str]] | None = None
-    ) -> AsyncIterator[dict[str, Any]]:
-        """Send a query to the agent with streaming response."""
-        if conversation_history:
-            for msg in conversation_history[-6:]:
-                self.agent.conversation_history.append(msg)
-        
-        yield {"type": "agent_context", "context": {
-            "system_prompt": CONTEXT_GRAPH_SYSTEM_PROMPT,
-            "model": config.bedrock.claude_model_id,
-            "available_tools": AVAILABLE_TOOLS,
-        }}
-        
-        async for event in self.agent.run_agentic_loop_stream(
-            message=message,
-            tool_handlers=self.tool_handlers,
-            max_iterations=10,
-        ):
-            yield event
-        
-        yield {"type": "done", "tool_calls": [], "decisions_made": []}
-"""
-Bedrock-compatible agent that works with MCP tools.
-This is a wrapper that uses BedrockAgent instead of Claude Agent SDK.
-"""
+# Tool input validators, compiled once from the schemas sent to the model (defaults
+# are not filled in, since the input is also kept in the conversation history)
+_TOOL_VALIDATORS = {
+    name: fastjsonschema.compile(schema["input_schema"], use_default=False)
+    for name, schema in _TOOL_SCHEMAS.items()
+}
 
-import json
-import logging
-from typing import Any, AsyncIterator
 
-from .agent import (
-    AVAILABLE_TOOLS,
-    CONTEXT_GRAPH_SYSTEM_PROMPT,
-    detect_fraud_patterns,
-    execute_cypher,
-    find_accounts_with_high_shared_transaction_volume,
-    find_decision_community,
-    find_precedents,
-    find_similar_decisions,
-    get_causal_chain,
-    get_customer_decisions,
-    get_policy,
-    get_schema,
-    record_decision,
-    search_customer,
-)
-from .bedrock_agent import BedrockAgent
-from .config import config
+def _validating(name: str, handler: Any) -> Any:
+    """Wrap a tool handler so input that does not match its schema is rejected."""
+    validate = _TOOL_VALIDATORS[name]
+
+    async def validated(args: dict[str, Any]) -> dict[str, Any]:
+        try:
+            validate(args)
+        except fastjsonschema.JsonSchemaValueException as e:
+            return _error_response(f"Invalid input for {name}: {e.message}")
+        return await handler(args)
+    return validated
 
-logger = logging.getLogger(__name__)
 
+# Resolve the async function behind each tool once: SdkMcpTool objects keep it in
+# 'handler'; plain callables are used directly
+_TOOL_HANDLERS = {
+    name: _validating(
+        name,
+        getattr(tool_obj, "handler", None)
+        or (tool_obj if callable(tool_obj) else getattr(tool_obj, "func", tool_obj)),
+    )
+    for name, tool_obj in _TOOL_OBJECTS.items()
+}
 
-def convert_mcp_tools_to_bedrock_format(mcp_tools: list) -> list[dict[str, Any]]:
+
+class _TTLCachedTool:
+    """
+    Share a read-only tool's results across sessions for a short time.
+
+    Concurrent misses for the same arguments share one in-flight call, so only the
+    first caller queries Neo4j and the rest await its result. Error results are not kept,
+    and write tools clear the cache (see _WRITE_TOOLS).
+    """
+
+    # Entries kept at most; expired entries are swept first, then the oldest evicted
+    MAX_ENTRIES = 256
+
+    def __init__(self, handler: Any, ttl_s: float):
+        self._handler = handler
+        self._ttl_s = ttl_s
+        self._entries: dict[bytes, tuple[float, dict[str, Any]]] = {}
+        # Calls still running, by key; each removes itself when it finishes
+        self._inflight: dict[bytes, asyncio.Future] = {}
+
+    def _fresh(self, key: bytes) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all cached results, e.g. after a write to the graph."""
+        self._entries.clear()
+
+    async def _load(self, key: bytes, args: dict[str, Any]) -> dict[str, Any]:
+        try:
+            result = await self._handler(args)
+        finally:
+            del self._inflight[key]
+        if not result.get("is_error"):
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._sweep()
+            while len(self._entries) >= self.MAX_ENTRIES:
+                # Dicts keep insertion order, so the first entry is the oldest
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self._ttl_s, result)
+        return result
+
+    async def __call__(self, args: dict[str, Any]) -> dict[str, Any]:
+        key = orjson.dumps(args, option=orjson.OPT_SORT_KEYS)
+        if (result := self._fresh(key)) is not None:
+            return result
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._load(key, args))
+        # Shielded, so a cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(future)
+
+
+# The schema and policies change minutes to hours apart, so their results are
+# shared across concurrent sessions for a short time
+_TOOL_HANDLERS["get_schema"] = _TTLCachedTool(_TOOL_HANDLERS["get_schema"], ttl_s=60)
+_TOOL_HANDLERS["get_policy"] = _TTLCachedTool(_TOOL_HANDLERS["get_policy"], ttl_s=30)
+
+# Tools that write to the graph: never memoized, and they invalidate cached reads
+_WRITE_TOOLS = frozenset({"record_decision"})
+
+# Results shared across sessions, cleared whenever a write tool runs
+_SHARED_CACHES = (_TOOL_HANDLERS["get_schema"], _TOOL_HANDLERS["get_policy"])
+
+
+def _clearing_shared_caches(handler: Any) -> Any:
+    """Wrap a write tool so the shared read caches are cleared once its write is done."""
+    async def write(args: dict[str, Any]) -> dict[str, Any]:
+        try:
+            return await handler(args)
+        finally:
+            for cache in _SHARED_CACHES:
+                cache.clear()
+
+    return write
+
+
+for _name in _WRITE_TOOLS:
+    _TOOL_HANDLERS[_name] = _clearing_shared_caches(_TOOL_HANDLERS[_name])
+
+
+def _memoized_handlers(handlers: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Wrap tool handlers so identical calls within one query hit the graph once.
+
+    The model often repeats get_schema, get_policy or search_customer with the
+    same arguments across iterations. Results are keyed by tool name and the
+    canonical JSON of the arguments; error results are not kept.
+    """
+    cache: dict[tuple[str, bytes], dict[str, Any]] = {}
+
+    def memoize(name: str, handler: Any) -> Any:
+        if name in _WRITE_TOOLS:
+            async def invalidating(args: dict[str, Any]) -> dict[str, Any]:
+                cache.clear()
+                return await handler(args)
+            return invalidating
+
+        async def cached(args: dict[str, Any]) -> dict[str, Any]:
+            key = (name, orjson.dumps(args, option=orjson.OPT_SORT_KEYS))
+            if key in cache:
+                return cache[key]
+            result = await handler(args)
+            if not result.get("is_error"):
+                cache[key] = result
+            return result
+        return cached
+
+    return {name: memoize(name, handler) for name, handler in handlers.items()}
+
+
+# Stream events that never change, built once and shared by every query_stream
+# (consumers only read them)
+_AGENT_CONTEXT_EVENT = {
+    "type": "agent_context",
+    "context": {
+        "system_prompt": CONTEXT_GRAPH_SYSTEM_PROMPT,
+        "model": config.bedrock.claude_model_id,
+        "available_tools": AVAILABLE_TOOLS,
+    },
+}
+_DONE_EVENT = {"type": "done", "tool_calls": [], "decisions_made": []}
+
+# Events read ahead of a slow consumer before the Bedrock stream waits for it
+STREAM_QUEUE_SIZE = 64
+
+
+def convert_mcp_tools_to_bedrock_format(mcp_tools: list) -> Sequence[Mapping[str, Any]]:
     """
     Convert MCP tool definitions to Bedrock/Anthropic tool format.
-    
-    MCP tools are decorated with @tool, we need to extract their schemas.
+
+    MCP tools are decorated with @tool, so their schemas are mirrored in _TOOL_SCHEMAS;
+    the shared, precomputed read-only schemas are returned.
     """
-    bedrock_tools = []
-    
-    tool_schemas = {
-        "search_customer": {
-            "name": "search_customer",
-            "description": "Search for customers by name, email, or account number. Returns customer profiles with risk scores and related account counts.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string", "description": "Search query"},
-                    "limit": {"type": "integer", "description": "Maximum results", "default": 10},
-                },
-                "required": ["query"],
-            },
-        },
-        "get_customer_decisions": {
-            "name": "get_customer_decisions",
-            "description": "Get all decisions made about a specific customer, including approvals, rejections, escalations, and exceptions.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "customer_id": {"type": "string", "description": "Customer ID"},
-                    "decision_type": {"type": "string", "description": "Filter by decision type"},
-                    "limit": {"type": "integer", "description": "Maximum results", "default": 20},
-                },
-                "required": ["customer_id"],
-            },
-        },
-        "find_similar_decisions": {
-            "name": "find_similar_decisions",
-            "description": "Find structurally similar past decisions using FastRP graph embeddings. Returns decisions with similar influences, causes, and precedents.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_id": {"type": "string", "description": "The internal decision ID"},
-                    "limit": {"type": "integer", "description": "Number of similar decisions", "default": 5},
-                },
-                "required": ["decision_id"],
-            },
-        },
-        "find_precedents": {
-            "name": "find_precedents",
-            "description": "Find precedent decisions that could inform the current decision. Uses both semantic similarity (meaning) and structural similarity (graph patterns).",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "scenario": {"type": "string", "description": "Scenario description"},
-                    "category": {"type": "string", "description": "Decision category"},
-                    "limit": {"type": "integer", "description": "Maximum results", "default": 5},
-                },
-                "required": ["scenario"],
-            },
-        },
-        "get_causal_chain": {
-            "name": "get_causal_chain",
-            "description": "Trace the causal chain of a decision - what caused it and what it led to.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_id": {"type": "string", "description": "Decision ID"},
-                    "direction": {"type": "string", "description": "Direction: 'upstream', 'downstream', or 'both'", "default": "both"},
-                    "depth": {"type": "integer", "description": "Depth to traverse", "default": 3},
-                },
-                "required": ["decision_id"],
-            },
-        },
-        "record_decision": {
-            "name": "record_decision",
-            "description": "Record a new decision with full reasoning context. Creates a decision trace in the context graph.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_type": {"type": "string", "description": "Type of decision"},
-                    "category": {"type": "string", "description": "Decision category"},
-                    "reasoning": {"type": "string", "description": "Full reasoning"},
-                    "customer_id": {"type": "string", "description": "Customer ID"},
-                    "account_id": {"type": "string", "description": "Account ID"},
-                    "risk_factors": {"type": "array", "items": {"type": "string"}, "description": "Risk factors"},
-                    "precedent_ids": {"type": "array", "items": {"type": "string"}, "description": "Precedent decision IDs"},
-                    "confidence_score": {"type": "number", "description": "Confidence score 0-1", "default": 0.8},
-                },
-                "required": ["decision_type", "category", "reasoning"],
-            },
-        },
-        "detect_fraud_patterns": {
-            "name": "detect_fraud_patterns",
-            "description": "Analyze accounts or transactions for potential fraud patterns using graph structure analysis.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "account_id": {"type": "string", "description": "The internal account ID"},
-                    "neighbor_count": {"type": "integer", "description": "Number of examples to return", "default": 5},
-                },
-                "required": ["account_id"],
-            },
-        },
-        "find_decision_community": {
-            "name": "find_decision_community",
-            "description": "Find decisions in the same community using Leiden community detection.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "decision_id": {"type": "string", "description": "Decision ID"},
-                    "example_count": {"type": "integer", "description": "Number of examples", "default": 5},
-                },
-                "required": ["decision_id"],
-            },
-        },
-        "find_accounts_with_high_shared_transaction_volume": {
-            "name": "find_accounts_with_high_shared_transaction_volume",
-            "description": "Find accounts that share high transaction volumes with a given account.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "account_id": {"type": "string", "description": "The internal account ID"},
-                },
-                "required": ["account_id"],
-            },
-        },
-        "get_policy": {
-            "name": "get_policy",
-            "description": "Get the current policy rules for a specific category.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "category": {"type": "string", "description": "Policy category"},
-                    "policy_name": {"type": "string", "description": "Policy name to search for"},
-                },
-                "required": [],
-            },
-        },
-        "execute_cypher": {
-            "name": "execute_cypher",
-            "description": "Execute a read-only Cypher query against the context graph for custom analysis.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "cypher": {"type": "string", "description": "Cypher query"},
-                },
-                "required": ["cypher"],
-            },
-        },
-        "get_schema": {
-            "name": "get_schema",
-            "description": "Get the graph database schema including node labels, relationship types, and property keys.",
-            "input_schema": {
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        },
-    }
-    
-    return list(tool_schemas.values())
+    return _BEDROCK_TOOLS
 
 
 class ContextGraphAgentBedrock:
     """Bedrock-based agent for context graph operations."""
 
+    # One agent is created per chat request, so instances carry no __dict__
+    __slots__ = ("tools", "tools_json", "tool_handlers", "agent")
+
     def __init__(self):
-        self.tools = convert_mcp_tools_to_bedrock_format(AVAILABLE_TOOLS)
-        
-        # Map tool names to their SdkMcpTool objects
-        self.tool_objects = {
-            "search_customer": search_customer,
-            "get_customer_decisions": get_customer_decisions,
-            "find_similar_decisions": find_similar_decisions,
-            "find_precedents": find_precedents,
-            "get_causal_chain": get_causal_chain,
-            "record_decision": record_decision,
-            "detect_fraud_patterns": detect_fraud_patterns,
-            "find_decision_community": find_decision_community,
-            "find_accounts_with_high_shared_transaction_volume": find_accounts_with_high_shared_transaction_volume,
-            "get_policy": get_policy,
-            "execute_cypher": execute_cypher,
-            "get_schema": get_schema,
-        }
-        
-        # Create wrapper functions that properly invoke the SdkMcpTool objects
-        self.tool_handlers = {}
-        for name, tool_obj in self.tool_objects.items():
-            # SdkMcpTool objects have a 'handler' attribute that is the actual async function
-            if hasattr(tool_obj, 'handler'):
-                self.tool_handlers[name] = tool_obj.handler
-            elif callable(tool_obj):
-                self.tool_handlers[name] = tool_obj
-            else:
-                # Fallback: try to get the underlying function
-                self.tool_handlers[name] = getattr(tool_obj, 'func', tool_obj)
-        
+        self.tools = _BEDROCK_TOOLS
+        self.tools_json = _BEDROCK_TOOLS_JSON
+        self.tool_handlers = _TOOL_HANDLERS
+
         self.agent = BedrockAgent(
             system_prompt=CONTEXT_GRAPH_SYSTEM_PROMPT,
             tools=self.tools,
             model_id=config.bedrock.claude_model_id,
+            tools_json=self.tools_json,
         )
 
     async def __aenter__(self):
@@ -525,13 +448,13 @@ class ContextGraphAgentBedrock:
     ) -> dict[str, Any]:
         """Send a query to the agent and get the response."""
         if conversation_history:
-            for msg in conversation_history[-6:]:
-                self.agent.conversation_history.append(msg)
+            self.agent.conversation_history.extend(conversation_history[-6:])
         
         result = await self.agent.run_agentic_loop(
             message=message,
-            tool_handlers=self.tool_handlers,
-            max_iterations=10,
+            tool_handlers=_memoized_handlers(self.tool_handlers),
+            max_iterations=config.bedrock.max_agent_iterations,
+            time_budget_s=config.bedrock.agent_loop_budget_s,
         )
         
         return {
@@ -545,20 +468,41 @@ class ContextGraphAgentBedrock:
     ) -> AsyncIterator[dict[str, Any]]:
         """Send a query to the agent with streaming response."""
         if conversation_history:
-            for msg in conversation_history[-6:]:
-                self.agent.conversation_history.append(msg)
+            self.agent.conversation_history.extend(conversation_history[-6:])
         
-        yield {"type": "agent_context", "context": {
-            "system_prompt": CONTEXT_GRAPH_SYSTEM_PROMPT,
-            "model": config.bedrock.claude_model_id,
-            "available_tools": AVAILABLE_TOOLS,
-        }}
+        yield _AGENT_CONTEXT_EVENT
         
-        async for event in self.agent.run_agentic_loop_stream(
-            message=message,
-            tool_handlers=self.tool_handlers,
-            max_iterations=10,
-        ):
-            yield event
+        # Bedrock reads and tool calls run in a producer task, so they keep going
+        # while the consumer sends each event on
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        producer = asyncio.create_task(self._pump(queue, message))
+        try:
+            # Adjacent text deltas are coalesced, as in ContextGraphAgent.query_stream
+            async for event in _read_coalesced(queue):
+                yield event
+            await producer  # Surface any error raised while reading
+        finally:
+            if not producer.done():
+                producer.cancel()
         
-        yield {"type": "done", "tool_calls": [], "decisions_made": []}
+        yield _DONE_EVENT
+
+    async def _pump(self, queue: asyncio.Queue, message: str) -> None:
+        """Run the streaming agentic loop and put its events (text deltas as str) on the queue."""
+        cancelled = False
+        try:
+            async for event in self.agent.run_agentic_loop_stream(
+                message=message,
+                tool_handlers=_memoized_handlers(self.tool_handlers),
+                max_iterations=config.bedrock.max_agent_iterations,
+                time_budget_s=config.bedrock.agent_loop_budget_s,
+            ):
+                await queue.put(event)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # Once cancelled, the consumer has stopped reading: the queue may be full and
+            # nothing waits for the end marker, so putting it could block forever
+            if not cancelled:
+                await queue.put(_STREAM_DONE)
@@ -3,15 +3,112 @@ Bedrock-based agent implementation that mimics Claude Agent SDK interface.
 This allows using Amazon Bedrock instead of direct Anthropic API.
 """
 
-import json
+import asyncio
+import inspect
 import logging
-from typing import Any, AsyncIterator, Optional
+import threading
+from typing import Any, AsyncIterator, Mapping, Optional, Sequence
 
-from .bedrock_client import BedrockClaudeClient
+import orjson
+
+from .bedrock_client import BedrockClaudeClient, BedrockRateLimiter, encode_tools
 from .config import config
 
 logger = logging.getLogger(__name__)
 
+# Cap on messages kept in an agent's conversation history (caller history, turns and
+# tool results of one session; far above what a 10-iteration agentic loop adds).
+# Enforced by _trim_history, whole exchanges at a time.
+MAX_HISTORY_MESSAGES = 100
+
+# Rough budget, in tokens, for the history sent with each query (estimated as
+# JSON characters / 4); older exchanges are dropped to stay within it
+MAX_HISTORY_TOKENS = 8000
+_CHARS_PER_TOKEN = 4
+
+# Upper bound on a single tool call, so one slow graph query cannot stall a turn
+TOOL_TIMEOUT_S = 60
+
+
+# Claude clients shared by all agents, by model ID
+_shared_clients: dict[str, BedrockClaudeClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def _get_shared_client(model_id: str) -> BedrockClaudeClient:
+    """
+    Get the Claude client for a model, built on first use and shared by every agent.
+
+    Agents are created per chat request; sharing the client keeps its HTTP/2
+    connections, resolved credentials and rate limiter across requests.
+    """
+    client = _shared_clients.get(model_id)
+    if client is not None:
+        return client
+    with _shared_clients_lock:
+        client = _shared_clients.get(model_id)
+        if client is None:
+            client = _shared_clients[model_id] = _build_client(model_id)
+    return client
+
+
+def _build_client(model_id: str) -> BedrockClaudeClient:
+    """Build a Claude client from the application's Bedrock configuration."""
+    return BedrockClaudeClient(
+        region_name=config.bedrock.region_name,
+        model_id=model_id,
+        aws_access_key_id=config.bedrock.aws_access_key_id,
+        aws_secret_access_key=config.bedrock.aws_secret_access_key,
+        aws_session_token=config.bedrock.aws_session_token,
+        boto3_session=config.boto3_session,
+        performance_config="optimized" if config.bedrock.latency_optimized else None,
+        prompt_caching=config.bedrock.prompt_caching,
+        rate_limiter=BedrockRateLimiter(
+            max_concurrency=config.bedrock.max_concurrency,
+            requests_per_second=config.bedrock.requests_per_second or None,
+        ),
+    )
+
+
+async def close_shared_clients() -> None:
+    """Close the shared clients' pooled HTTP connections (call on application shutdown)."""
+    for client in _shared_clients.values():
+        await client.aclose()
+
+
+def _is_async(handler: Any) -> bool:
+    """Check whether a tool handler is an async function or an object with an async __call__."""
+    return inspect.iscoroutinefunction(handler) or inspect.iscoroutinefunction(
+        type(handler).__call__
+    )
+
+
+def _tool_result_block(tool_use_id: str, result: dict[str, Any]) -> dict[str, Any]:
+    """Build the tool_result content block for a tool's result (is_error only when set)."""
+    block = {
+        "type": "tool_result",
+        "tool_use_id": tool_use_id,
+        "content": result.get("content", []),
+    }
+    if result.get("is_error"):
+        block["is_error"] = True
+    return block
+
+
+# Result given to tool uses of a turn that only repeats the previous turn's calls
+_REPEATED_CALL_RESULT = {
+    "content": [{"type": "text", "text": "Not run: same calls as the previous turn"}],
+    "is_error": True,
+}
+
+
+def _call_key(tool_use: dict[str, Any]) -> tuple[Any, bytes]:
+    """Identify a tool call by its name and input, to spot a turn repeating the last one."""
+    return (
+        tool_use.get("name"),
+        orjson.dumps(tool_use.get("input", {}), option=orjson.OPT_SORT_KEYS),
+    )
+
 
 class BedrockAgent:
     """
@@ -19,42 +116,111 @@ class BedrockAgent:
     Provides similar interface to Claude Agent SDK but uses Bedrock.
     """
 
+    # One agent is created per chat request, so instances carry no __dict__
+    __slots__ = (
+        "system_prompt",
+        "tools",
+        "model_id",
+        "_tools_payload",
+        "client",
+        "conversation_history",
+    )
+
     def __init__(
         self,
         system_prompt: str,
-        tools: list[dict[str, Any]],
+        tools: Sequence[Mapping[str, Any]],
         model_id: str = "anthropic.claude-3-5-sonnet-20241022-v2:0",
+        tools_json: Optional[bytes] = None,
+        client: Optional[BedrockClaudeClient] = None,
     ):
         """
         Initialize Bedrock agent.
         
         Args:
             system_prompt: System prompt for the agent
-            tools: List of tool definitions in Anthropic format
+            tools: Tool definitions in Anthropic format (read-only, may be shared)
             model_id: Bedrock model ID
+            tools_json: The tools pre-encoded as a JSON array (encoded here once if not
+                given), sent as-is instead of re-encoding them on every request
+            client: Claude client to use (the process-wide one for model_id if not given)
         """
         self.system_prompt = system_prompt
         self.tools = tools
         self.model_id = model_id
+        # What goes into each request body's "tools" field
+        if tools_json is None and tools:
+            tools_json = encode_tools(list(tools))
+        self._tools_payload = tools_json
         
-        self.client = BedrockClaudeClient(
-            region_name=config.bedrock.region_name,
-            model_id=model_id,
-            aws_access_key_id=config.bedrock.aws_access_key_id,
-            aws_secret_access_key=config.bedrock.aws_secret_access_key,
-            aws_session_token=config.bedrock.aws_session_token,
-        )
+        self.client = client if client is not None else _get_shared_client(model_id)
         
         self.conversation_history: list[dict[str, Any]] = []
 
     async def connect(self):
-        """Connect to Bedrock (no-op, connection is per-request)."""
+        """
+        Connect to Bedrock.
+
+        The shared client's async HTTP/2 pool is opened on the first request and
+        kept until close_shared_clients, so there is nothing to do per agent.
+        """
         pass
 
     async def disconnect(self):
-        """Disconnect from Bedrock (no-op)."""
+        """Disconnect from Bedrock (no-op, the shared client stays open for other agents)."""
         pass
 
+    def _append_user_turn(self, message: str) -> list[dict[str, Any]]:
+        """
+        Add the user's message to the history, which is then sent as-is.
+        
+        An empty message continues the loop after tool results, which are already
+        the latest user turn.
+        
+        Returns:
+            The history as it was before, for _restore_history if the request fails
+            (trimming may have dropped older exchanges as well)
+        """
+        snapshot = list(self.conversation_history)
+        if message:
+            self.conversation_history.append({"role": "user", "content": message})
+            self._trim_history()
+        return snapshot
+
+    def _trim_history(self) -> None:
+        """
+        Drop the oldest exchanges until the history fits MAX_HISTORY_TOKENS and
+        MAX_HISTORY_MESSAGES.
+
+        An exchange is a user query and everything up to the next one (assistant
+        turns, tool uses and their results), so removing whole exchanges never
+        separates a tool result from its tool use. The first exchange, which sets
+        the session's context, and the query just added are always kept.
+        """
+        history = self.conversation_history
+        sizes = [len(orjson.dumps(m, default=str)) for m in history]
+        budget = MAX_HISTORY_TOKENS * _CHARS_PER_TOKEN
+        total = sum(sizes)
+        count = len(history)
+        if total <= budget and count <= MAX_HISTORY_MESSAGES:
+            return
+
+        starts = [
+            i for i, m in enumerate(history)
+            if m["role"] == "user" and isinstance(m["content"], str)
+        ]
+        end = 1
+        while (total > budget or count > MAX_HISTORY_MESSAGES) and end < len(starts) - 1:
+            total -= sum(sizes[starts[end]:starts[end + 1]])
+            count -= starts[end + 1] - starts[end]
+            end += 1
+        if end > 1:
+            del history[starts[1]:starts[end]]
+
+    def _restore_history(self, snapshot: list[dict[str, Any]]) -> None:
+        """Undo _append_user_turn after a request that failed."""
+        self.conversation_history[:] = snapshot
+
     async def query(
         self,
         message: str,
@@ -72,19 +238,18 @@ class BedrockAgent:
         Returns:
             Response dict with text and tool calls
         """
-        messages = self.conversation_history + [
-            {"role": "user", "content": message}
-        ]
-
-        response = self.client.invoke(
-            messages=messages,
-            system=self.system_prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            tools=self.tools if self.tools else None,
-        )
-
-        self.conversation_history.append({"role": "user", "content": message})
+        snapshot = self._append_user_turn(message)
+        try:
+            response = await self.client.ainvoke(
+                messages=self.conversation_history,
+                system=self.system_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                tools=self._tools_payload,
+            )
+        except Exception:
+            self._restore_history(snapshot)
+            raise
         
         if response.get("content"):
             self.conversation_history.append({
@@ -94,334 +259,91 @@ class BedrockAgent:
 
         return response
 
-    async def query_stream(
+    async def run_batch_async(
         self,
-        message: str,
+        messages: list[str],
+        *,
+        max_concurrency: int = 8,
         max_tokens: int = 4096,
         temperature: float = 1.0,
-    ) -> AsyncIterator[dict[str, Any]]:
-        """
-        Send a query to Claude via Bedrock with streaming.
-        
-        Yields response chunks as they arrive.
-        """
-        messages = self.conversation_history + [
-            {"role": "user", "content": message}
-        ]
-
-        self.conversation_history.append({"role": "user", "content": message})
-        
-        accumulated_content = []
-
-        async for chunk in self.client.invoke_stream(
-            messages=messages,
-            system=self.system_prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            tools=self.tools if self.tools else None,
-        ):
-            if chunk.get("type") == "content_block_delta":
-                delta = chunk.get("delta", {})
-                if delta.get("type") == "text_delta":
-                    accumulated_content.append({
-                        "type": "text",
-                        "text": delta.get("text", "")
-                    })
-                    yield chunk
-            elif chunk.get("type") == "content_block_start":
-                content_block = chunk.get("content_block", {})
-                if content_block.get("type") == "tool_use":
-                    accumulated_content.append(content_block)
-                yield chunk
-            else:
-                yield chunk
-
-        if accumulated_content:
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": accumulated_content
-            })
-
-    async def execute_tool(
-        self,
-        tool_name: str,
-        tool_input: dict[str, Any],
-        tool_handlers: dict[str, callable],
-    ) -> dict[str, Any]:
+    ) -> list[dict[str, Any] | BaseException]:
         """
-        Execute a tool and return the result.
+        Send independent single-turn messages concurrently.
         
-        Args:
-            tool_name: Name of the tool to execute
-            tool_input: Input parameters for the tool
-            tool_handlers: Dict mapping tool names to handler functions
-            
-        Returns:
-            Tool execution result
-        """
-        if tool_name not in tool_handlers:
-            return {
-                "content": [{"type": "text", "text": f"Tool {tool_name} not found"}],
-                "is_error": True,
-            }
-
-        try:
-            handler = tool_handlers[tool_name]
-            result = await handler(tool_input)
-            return result
-        except Exception as e:
-            logger.error(f"Tool execution error for {tool_name}: {e}")
-            return {
-                "content": [{"type": "text", "text": f"Error executing {tool_name}: {str(e)}"}],
-                "is_error": True,
-            }
-
-    async def run_agentic_loop(
-        self,
-        message: str,
-        tool_handlers: dict[str, callable],
-        max_iterations: int = 10,
-    ) -> dict[str, Any]:
-        """
-        Run the agentic loop: query -> tool use -> tool result -> repeat.
+        Each message is sent on its own, without this agent's conversation history
+        (which is left untouched), with at most max_concurrency requests in flight.
         
-        Args:
-            message: Initial user message
-            tool_handlers: Dict mapping tool names to handler functions
-            max_iterations: Maximum number of iterations
-            
         Returns:
-            Final response with text and tool calls
-        """
-        response_text = ""
-        tool_calls = []
-        
-        for iteration in range(max_iterations):
-            response = await self.query(message if iteration == 0 else "")
-            
-            stop_reason = response.get("stop_reason")
-            content = response.get("content", [])
-            
-            has_tool_use = False
-            tool_results = []
-            
-            for block in content:
-                if block.get("type") == "text":
-                    response_text += block.get("text", "")
-                elif block.get("type") == "tool_use":
-                    has_tool_use = True
-                    tool_name = block.get("name")
-                    tool_input = block.get("input", {})
-                    tool_use_id = block.get("id")
-                    
-                    tool_calls.append({
-                        "name": tool_name,
-                        "input": tool_input,
-                    })
-                    
-                    result = await self.execute_tool(
-                        tool_name,
-                        tool_input,
-                        tool_handlers,
-                    )
-                    
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use_id,
-                        "content": result.get("content", []),
-                        "is_error": result.get("is_error", False),
-                    })
-            
-            if has_tool_use and tool_results:
-                self.conversation_history.append({
-                    "role": "user",
-                    "content": tool_results,
-                })
-            elif stop_reason == "end_turn":
-                break
-        
-        return {
-            "response": response_text,
-            "tool_calls": tool_calls,
-        }
-
-    async def run_agentic_loop_stream(
-        self,
-        message: str,
-        tool_handlers: dict[str, callable],
-        max_iterations: int = 10,
-    ) -> AsyncIterator[dict[str, Any]]:
+            Response dicts in message order; a failed request's exception takes its place
         """
-        Run the agentic loop with streaming responses.
-        
-        Yields events as they occur.
-        """
-        for iteration in range(max_iterations):
-            current_tool_use = None
-            tool_results = []
-            has_tool_use = False
-            
-            async for chunk in self.query_stream(message if iteration == 0 else ""):
-                chunk_type = chunk.get("type")
-                
-                if chunk_type == "content_block_start":
-                    content_block = chunk.get("content_block", {})
-                    if content_block.get("type") == "tool_use":
-                        current_tool_use = {
-                            "id": content_block.get("id"),
-                            "name": content_block.get("name"),
-                            "input": {},
-                        }
-                        has_tool_use = True
-                        yield {
-                            "type": "tool_use",
-                            "name": current_tool_use["name"],
-                            "input": {},
-                        }
-                
-                elif chunk_type == "content_block_delta":
-                    delta = chunk.get("delta", {})
-                    if delta.get("type") == "text_delta":
-                        yield {
-                            "type": "text",
-                            "content": delta.get("text", ""),
-                        }
-                    elif delta.get("type") == "input_json_delta" and current_tool_use:
-                        partial_json = delta.get("partial_json", "")
-                        if partial_json:
-                            try:
-                                current_tool_use["input"] = json.loads(
-                                    json.dumps(current_tool_use.get("input", {})) + partial_json
-                                )
-                            except:
-                                pass
-                
-                elif chunk_type == "content_block_stop":
-                    if current_tool_use:
-                        result = await self.execute_tool(
-                            current_tool_use["name"],
-                            current_tool_use["input"],
-                            tool_handlers,
-                        )
-                        
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": current_tool_use["id"],
-                            "content": result.get("content", []),
-                            "is_error": result.get("is_error", False),
-                        })
-                        
-                        yield {
-                            "type": "tool_result",
-                            "name": current_tool_use["name"],
-                            "output": result,
-                        }
-                        
-                        current_tool_use = None
-                
-                elif chunk_type == "message_stop":
-                    if has_tool_use and tool_results:
-                        self.conversation_history.append({
-                            "role": "user",
-                            "content": tool_results,
-                        })
-                    else:
-                        return
-"""
-Bedrock-based agent implementation that mimics Claude Agent SDK interface.
-This allows using Amazon Bedrock instead of direct Anthropic API.
-"""
-
-import json
-import logging
-from typing import Any, AsyncIterator, Optional
-
-from .bedrock_client import BedrockClaudeClient
-from .config import config
-
-logger = logging.getLogger(__name__)
-
-
-class BedrockAgent:
-    """
-    Agent implementation using Amazon Bedrock for Claude.
-    Provides similar interface to Claude Agent SDK but uses Bedrock.
-    """
-
-    def __init__(
-        self,
-        system_prompt: str,
-        tools: list[dict[str, Any]],
-        model_id: str = "anthropic.claude-3-5-sonnet-20241022-v2:0",
-    ):
-        """
-        Initialize Bedrock agent.
-        
-        Args:
-            system_prompt: System prompt for the agent
-            tools: List of tool definitions in Anthropic format
-            model_id: Bedrock model ID
-        """
-        self.system_prompt = system_prompt
-        self.tools = tools
-        self.model_id = model_id
-        
-        self.client = BedrockClaudeClient(
-            region_name=config.bedrock.region_name,
-            model_id=model_id,
-            aws_access_key_id=config.bedrock.aws_access_key_id,
-            aws_secret_access_key=config.bedrock.aws_secret_access_key,
-            aws_session_token=config.bedrock.aws_session_token,
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(message: str) -> dict[str, Any]:
+            async with semaphore:
+                return await self.client.ainvoke(
+                    messages=[{"role": "user", "content": message}],
+                    system=self.system_prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    tools=self._tools_payload,
+                )
+
+        results = await asyncio.gather(
+            *(run_one(message) for message in messages), return_exceptions=True
         )
-        
-        self.conversation_history: list[dict[str, Any]] = []
+        return list(results)
 
-    async def connect(self):
-        """Connect to Bedrock (no-op, connection is per-request)."""
-        pass
-
-    async def disconnect(self):
-        """Disconnect from Bedrock (no-op)."""
-        pass
-
-    async def query(
+    async def submit_batch(
         self,
-        message: str,
+        messages: list[str],
+        *,
+        input_s3_uri: str,
+        output_s3_uri: str,
+        role_arn: str,
         max_tokens: int = 4096,
         temperature: float = 1.0,
-    ) -> dict[str, Any]:
+        job_name: Optional[str] = None,
+    ) -> str:
         """
-        Send a query to Claude via Bedrock.
+        Submit independent single-turn messages as a Bedrock batch inference job.
+        
+        For offline evaluation of at least BATCH_JOB_MIN_RECORDS messages, at about
+        half the cost of run_batch_async. Like run_batch_async, each message is sent
+        without this agent's conversation history.
         
-        Args:
-            message: User message
-            max_tokens: Maximum tokens to generate
-            temperature: Sampling temperature
-            
         Returns:
-            Response dict with text and tool calls
+            The job ARN, to pass to await_batch
         """
-        messages = self.conversation_history + [
-            {"role": "user", "content": message}
-        ]
-
-        response = self.client.invoke(
-            messages=messages,
+        return await asyncio.to_thread(
+            self.client.create_message_batch_job,
+            [[{"role": "user", "content": message}] for message in messages],
+            input_s3_uri=input_s3_uri,
+            output_s3_uri=output_s3_uri,
+            role_arn=role_arn,
             system=self.system_prompt,
             max_tokens=max_tokens,
             temperature=temperature,
-            tools=self.tools if self.tools else None,
+            tools=self._tools_payload,
+            job_name=job_name,
         )
 
-        self.conversation_history.append({"role": "user", "content": message})
+    async def await_batch(
+        self, job_arn: str, poll_interval_s: float = 60.0
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Wait for a job from submit_batch to finish (jobs can take hours).
         
-        if response.get("content"):
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": response["content"]
-            })
-
-        return response
+        Returns:
+            Response dicts by message index; a failed message maps to {"error": ...}
+        
+        Raises:
+            RuntimeError: If the job failed, was stopped or expired
+        """
+        while True:
+            results = await asyncio.to_thread(self.client.get_message_batch_results, job_arn)
+            if results is not None:
+                return results
+            await asyncio.sleep(poll_interval_s)
 
     async def query_stream(
         self,
@@ -434,37 +356,64 @@ class BedrockAgent:
         
         Yields response chunks as they arrive.
         """
-        messages = self.conversation_history + [
-            {"role": "user", "content": message}
-        ]
-
-        self.conversation_history.append({"role": "user", "content": message})
+        snapshot = self._append_user_turn(message)
         
         accumulated_content = []
+        # Content blocks still streaming, by index, with the pieces of their text or input JSON
+        open_blocks: dict[int, tuple[dict[str, Any], list[str]]] = {}
 
-        async for chunk in self.client.invoke_stream(
-            messages=messages,
-            system=self.system_prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            tools=self.tools if self.tools else None,
-        ):
-            if chunk.get("type") == "content_block_delta":
-                delta = chunk.get("delta", {})
-                if delta.get("type") == "text_delta":
-                    accumulated_content.append({
-                        "type": "text",
-                        "text": delta.get("text", "")
-                    })
-                    yield chunk
-            elif chunk.get("type") == "content_block_start":
-                content_block = chunk.get("content_block", {})
-                if content_block.get("type") == "tool_use":
-                    accumulated_content.append(content_block)
-                yield chunk
-            else:
+        try:
+            async for chunk in self.client.invoke_stream(
+                messages=self.conversation_history,
+                system=self.system_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                tools=self._tools_payload,
+            ):
+                chunk_type = chunk.get("type")
+                index = chunk.get("index")
+                if chunk_type == "content_block_delta":
+                    delta = chunk.get("delta", {})
+                    delta_type = delta.get("type")
+                    if (open_block := open_blocks.get(index)) is not None:
+                        if delta_type == "text_delta":
+                            open_block[1].append(delta.get("text", ""))
+                        elif delta_type == "input_json_delta":
+                            open_block[1].append(delta.get("partial_json", ""))
+                elif chunk_type == "content_block_start":
+                    content_block = chunk.get("content_block", {})
+                    block_type = content_block.get("type")
+                    if block_type in ("text", "tool_use"):
+                        content_block = (
+                            {"type": "text", "text": ""}
+                            if block_type == "text"
+                            else {**content_block, "input": {}}
+                        )
+                        accumulated_content.append(content_block)
+                        open_blocks[index] = (content_block, [])
+                elif chunk_type == "content_block_stop" and index in open_blocks:
+                    # Text and input JSON are only complete now, so they are joined once, here
+                    content_block, parts = open_blocks.pop(index)
+                    if content_block["type"] == "text":
+                        content_block["text"] = "".join(parts)
+                    else:
+                        if parts:
+                            try:
+                                content_block["input"] = orjson.loads("".join(parts))
+                            except orjson.JSONDecodeError as e:
+                                name = content_block.get("name")
+                                logger.warning(f"Invalid tool input for {name}: {e}")
+                        chunk = {**chunk, "content_block": content_block}
                 yield chunk
-
+        except BaseException:
+            # Failed or abandoned before the assistant turn was recorded
+            self._restore_history(snapshot)
+            raise
+
+        # Bedrock rejects empty text blocks when the history is sent back
+        accumulated_content = [
+            block for block in accumulated_content if block["type"] != "text" or block["text"]
+        ]
         if accumulated_content:
             self.conversation_history.append({
                 "role": "assistant",
@@ -488,16 +437,26 @@ class BedrockAgent:
         Returns:
             Tool execution result
         """
-        if tool_name not in tool_handlers:
+        handler = tool_handlers.get(tool_name)
+        if handler is None:
             return {
                 "content": [{"type": "text", "text": f"Tool {tool_name} not found"}],
                 "is_error": True,
             }
 
         try:
-            handler = tool_handlers[tool_name]
-            result = await handler(tool_input)
-            return result
+            if _is_async(handler):
+                call = handler(tool_input)
+            else:
+                # Plain functions may block (e.g. a Neo4j query), so run them off the loop
+                call = asyncio.to_thread(handler, tool_input)
+            return await asyncio.wait_for(call, TOOL_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            logger.error(f"Tool {tool_name} timed out after {TOOL_TIMEOUT_S}s")
+            return {
+                "content": [{"type": "text", "text": f"Tool {tool_name} timed out"}],
+                "is_error": True,
+            }
         except Exception as e:
             logger.error(f"Tool execution error for {tool_name}: {e}")
             return {
@@ -510,6 +469,7 @@ class BedrockAgent:
         message: str,
         tool_handlers: dict[str, callable],
         max_iterations: int = 10,
+        time_budget_s: float = 120.0,
     ) -> dict[str, Any]:
         """
         Run the agentic loop: query -> tool use -> tool result -> repeat.
@@ -518,59 +478,76 @@ class BedrockAgent:
             message: Initial user message
             tool_handlers: Dict mapping tool names to handler functions
             max_iterations: Maximum number of iterations
+            time_budget_s: Seconds after which no further model call is started
             
         Returns:
             Final response with text and tool calls
         """
-        response_text = ""
+        response_parts: list[str] = []
         tool_calls = []
+        previous_calls = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_budget_s
         
         for iteration in range(max_iterations):
+            if iteration and loop.time() >= deadline:
+                logger.warning(f"Agent loop budget of {time_budget_s}s spent, stopping")
+                break
             response = await self.query(message if iteration == 0 else "")
             
-            stop_reason = response.get("stop_reason")
             content = response.get("content", [])
             
-            has_tool_use = False
-            tool_results = []
+            tool_use_blocks = []
             
             for block in content:
                 if block.get("type") == "text":
-                    response_text += block.get("text", "")
+                    response_parts.append(block.get("text", ""))
                 elif block.get("type") == "tool_use":
-                    has_tool_use = True
-                    tool_name = block.get("name")
-                    tool_input = block.get("input", {})
-                    tool_use_id = block.get("id")
-                    
-                    tool_calls.append({
-                        "name": tool_name,
-                        "input": tool_input,
-                    })
-                    
-                    result = await self.execute_tool(
-                        tool_name,
-                        tool_input,
-                        tool_handlers,
-                    )
-                    
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use_id,
-                        "content": result.get("content", []),
-                        "is_error": result.get("is_error", False),
-                    })
+                    tool_use_blocks.append(block)
             
-            if has_tool_use and tool_results:
+            # The model has answered once it stops asking for tools
+            if not tool_use_blocks:
+                break
+            
+            # Asking for exactly the same calls again would only repeat the last turn
+            calls = [_call_key(block) for block in tool_use_blocks]
+            if calls == previous_calls:
+                logger.warning(f"Tool loop detected, stopping: {[name for name, _ in calls]}")
+                # The tool uses are already in the history and each needs its result
                 self.conversation_history.append({
                     "role": "user",
-                    "content": tool_results,
+                    "content": [
+                        _tool_result_block(block.get("id"), _REPEATED_CALL_RESULT)
+                        for block in tool_use_blocks
+                    ],
                 })
-            elif stop_reason == "end_turn":
                 break
+            previous_calls = calls
+            
+            tool_calls.extend(
+                {"name": block.get("name"), "input": block.get("input", {})}
+                for block in tool_use_blocks
+            )
+            
+            # Tool calls from one turn are independent, so run them concurrently
+            results = await asyncio.gather(
+                *(
+                    self.execute_tool(block.get("name"), block.get("input", {}), tool_handlers)
+                    for block in tool_use_blocks
+                )
+            )
+            tool_results = [
+                _tool_result_block(block.get("id"), result)
+                for block, result in zip(tool_use_blocks, results, strict=True)
+            ]
+            
+            self.conversation_history.append({
+                "role": "user",
+                "content": tool_results,
+            })
         
         return {
-            "response": response_text,
+            "response": "".join(response_parts),
             "tool_calls": tool_calls,
         }
 
@@ -579,80 +556,103 @@ class BedrockAgent:
         message: str,
         tool_handlers: dict[str, callable],
         max_iterations: int = 10,
+        time_budget_s: float = 120.0,
     ) -> AsyncIterator[dict[str, Any]]:
         """
         Run the agentic loop with streaming responses.
         
-        Yields events as they occur.
+        Yields events as they occur: each text delta as a bare str (the per-token
+        event, so no dict is built for it), and tool_use / tool_result event dicts.
         """
+        previous_calls = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_budget_s
+        
+        def start(tool_use: dict[str, Any]) -> asyncio.Task:
+            return asyncio.create_task(
+                self.execute_tool(tool_use["name"], tool_use["input"], tool_handlers)
+            )
+        
         for iteration in range(max_iterations):
-            current_tool_use = None
-            tool_results = []
-            has_tool_use = False
+            if iteration and loop.time() >= deadline:
+                logger.warning(f"Agent loop budget of {time_budget_s}s spent, stopping")
+                return
+            tool_uses = []
+            calls = []
+            # Each tool starts as soon as its block is complete, so it runs while the rest
+            # of the turn streams and alongside the turn's other tools. While the calls so
+            # far match the previous turn's, they are held back (None) in case the whole
+            # turn turns out to be a repeat.
+            tool_tasks: list[Optional[asyncio.Task]] = []
             
-            async for chunk in self.query_stream(message if iteration == 0 else ""):
-                chunk_type = chunk.get("type")
-                
-                if chunk_type == "content_block_start":
-                    content_block = chunk.get("content_block", {})
-                    if content_block.get("type") == "tool_use":
-                        current_tool_use = {
-                            "id": content_block.get("id"),
-                            "name": content_block.get("name"),
-                            "input": {},
-                        }
-                        has_tool_use = True
-                        yield {
-                            "type": "tool_use",
-                            "name": current_tool_use["name"],
-                            "input": {},
-                        }
+            try:
+                async for chunk in self.query_stream(message if iteration == 0 else ""):
+                    chunk_type = chunk.get("type")
+                    
+                    if chunk_type == "content_block_delta":
+                        delta = chunk["delta"]
+                        if delta.get("type") == "text_delta":
+                            yield delta.get("text", "")
+                    
+                    elif chunk_type == "content_block_stop":
+                        # query_stream attaches a finished tool use block, input parsed
+                        tool_use = chunk.get("content_block")
+                        if tool_use:
+                            yield {
+                                "type": "tool_use",
+                                "name": tool_use["name"],
+                                "input": tool_use["input"],
+                            }
+                            tool_uses.append(tool_use)
+                            calls.append(_call_key(tool_use))
+                            tool_tasks.append(None)
+                            if calls != (previous_calls or [])[:len(calls)]:
+                                tool_tasks = [
+                                    task or start(tool_use)
+                                    for task, tool_use in zip(tool_tasks, tool_uses, strict=True)
+                                ]
                 
-                elif chunk_type == "content_block_delta":
-                    delta = chunk.get("delta", {})
-                    if delta.get("type") == "text_delta":
-                        yield {
-                            "type": "text",
-                            "content": delta.get("text", ""),
-                        }
-                    elif delta.get("type") == "input_json_delta" and current_tool_use:
-                        partial_json = delta.get("partial_json", "")
-                        if partial_json:
-                            try:
-                                current_tool_use["input"] = json.loads(
-                                    json.dumps(current_tool_use.get("input", {})) + partial_json
-                                )
-                            except:
-                                pass
+                # The model has answered once a turn asks for no tools
+                if not tool_uses:
+                    return
                 
-                elif chunk_type == "content_block_stop":
-                    if current_tool_use:
-                        result = await self.execute_tool(
-                            current_tool_use["name"],
-                            current_tool_use["input"],
-                            tool_handlers,
-                        )
-                        
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": current_tool_use["id"],
-                            "content": result.get("content", []),
-                            "is_error": result.get("is_error", False),
-                        })
-                        
-                        yield {
-                            "type": "tool_result",
-                            "name": current_tool_use["name"],
-                            "output": result,
-                        }
-                        
-                        current_tool_use = None
+                if calls == previous_calls:
+                    logger.warning(
+                        f"Tool loop detected, stopping: {[name for name, _ in calls]}"
+                    )
+                    # The tool uses are already in the history and each needs its result
+                    self.conversation_history.append({
+                        "role": "user",
+                        "content": [
+                            _tool_result_block(tool_use["id"], _REPEATED_CALL_RESULT)
+                            for tool_use in tool_uses
+                        ],
+                    })
+                    return
+                previous_calls = calls
                 
-                elif chunk_type == "message_stop":
-                    if has_tool_use and tool_results:
-                        self.conversation_history.append({
-                            "role": "user",
-                            "content": tool_results,
-                        })
-                    else:
-                        return
+                tool_tasks = [
+                    task or start(tool_use)
+                    for task, tool_use in zip(tool_tasks, tool_uses, strict=True)
+                ]
+                results = await asyncio.gather(*tool_tasks)
+            finally:
+                # Stream failed or the consumer stopped: don't leave tools running
+                for task in tool_tasks:
+                    if task is not None:
+                        task.cancel()
+            
+            tool_results = []
+            for tool_use, result in zip(tool_uses, results, strict=True):
+                tool_results.append(_tool_result_block(tool_use["id"], result))
+                yield {
+                    "type": "tool_result",
+                    "name": tool_use["name"],
+                    "output": result,
+                }
+            
+            # After the stream, so the results follow the assistant turn query_stream recorded
+            self.conversation_history.append({
+                "role": "user",
+                "content": tool_results,
+            })
@@ -3,15 +3,600 @@ Amazon Bedrock client for Claude and embeddings.
 Replaces direct Anthropic and OpenAI API calls with Bedrock.
 """
 
-import json
+import asyncio
+import base64
+import importlib.util
 import logging
-from typing import Any, AsyncIterator, Optional
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Optional, Sequence
+from urllib.parse import quote
 
 import boto3
+import httpx
+import numpy as np
+import orjson
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.client import BaseClient
 from botocore.config import Config
+from botocore.eventstream import EventStreamBuffer
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    NoCredentialsError,
+    ReadTimeoutError,
+)
+from urllib3.exceptions import ProtocolError
 
 logger = logging.getLogger(__name__)
 
+# Errors that indicate the pooled connections behind a client have gone bad
+_STALE_CONNECTION_ERRORS = (ConnectionClosedError, ReadTimeoutError, ProtocolError)
+
+# Fields shared by every Claude request body
+_CLAUDE_BODY_BASE = {"anthropic_version": "bedrock-2023-05-31"}
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize types orjson does not know: read-only (e.g. frozen tool) mappings."""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def encode_tools(tools: Sequence[Any]) -> bytes:
+    """Encode tool definitions as the JSON array a request body's "tools" field takes."""
+    return orjson.dumps(tools, default=_json_default)
+
+
+@lru_cache(maxsize=16)
+def _body_prelude(
+    system: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    tools: Optional[bytes],
+    prompt_caching: bool = False,
+) -> bytes:
+    """
+    Encode the static part of a Claude request body once per agent configuration.
+
+    The result is an unterminated JSON object ending in '"messages":', so a request
+    body is the prelude, the encoded messages and a closing brace.
+
+    With prompt_caching, the system prompt carries a cache breakpoint. Tools come
+    before the system prompt in Claude's prompt, so the cached prefix covers both.
+    """
+    prelude = {**_CLAUDE_BODY_BASE, "max_tokens": max_tokens, "temperature": temperature}
+    if system and prompt_caching:
+        prelude["system"] = [
+            {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+        ]
+    elif system:
+        prelude["system"] = system
+    head = orjson.dumps(prelude)[:-1]
+    if tools:
+        head += b',"tools":' + tools
+    return head + b',"messages":'
+
+
+# Bedrock batch inference jobs need at least this many records; smaller batches
+# are cheaper to send as concurrent InvokeModel calls
+BATCH_JOB_MIN_RECORDS = 100
+
+# Models with latency-optimized inference on Bedrock; performanceConfigLatency is
+# only sent for these (and their cross-region inference profiles)
+LATENCY_OPTIMIZED_MODELS = frozenset({
+    "anthropic.claude-3-5-haiku-20241022-v1:0",
+    "meta.llama3-1-70b-instruct-v1:0",
+    "meta.llama3-1-405b-instruct-v1:0",
+    "amazon.nova-pro-v1:0",
+})
+
+# Error codes Bedrock returns when a request is throttled
+_THROTTLING_CODES = frozenset(
+    {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+)
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Shared bedrock-runtime clients, keyed by region, credentials and read timeout
+_runtime_clients: dict[tuple, Any] = {}
+_runtime_clients_lock = threading.Lock()
+
+
+def _is_throttling(error: ClientError) -> bool:
+    """Check whether a ClientError means the request was throttled."""
+    err = error.response.get("Error", {})
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return (
+        err.get("Code") in _THROTTLING_CODES
+        or status == 429
+        or "rate limit" in err.get("Message", "").lower()
+    )
+
+
+class BedrockRateLimiter:
+    """
+    Caps in-flight Bedrock requests and their start rate, and retries throttled calls.
+
+    Thread-safe, so it covers both the sync clients and calls made from
+    asyncio.to_thread. Throttled calls are retried with exponential backoff plus
+    jitter, on top of botocore's own adaptive retries.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_second: Optional[float] = None,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            max_concurrency: Maximum requests in flight at once
+            requests_per_second: Maximum request start rate (unlimited if not set)
+            max_attempts: Attempts per call before a throttling error is raised
+            base_delay: Backoff before the first retry, doubled per attempt (seconds)
+            max_delay: Upper bound for the backoff before jitter (seconds)
+        """
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _reserve_turn(self) -> float:
+        """Reserve the next start slot under the configured rate; returns seconds to wait."""
+        if not self._interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        return start - now
+
+    def _backoff(self, attempt: int) -> float:
+        """Jittered exponential backoff before retrying a throttled attempt."""
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        delay += random.uniform(0, self.base_delay)
+        logger.warning(f"Bedrock request throttled, retrying in {delay:.2f}s")
+        return delay
+
+    def call(self, operation, *args, **kwargs):
+        """Run operation(*args, **kwargs) within the limits, retrying if throttled."""
+        for attempt in range(self.max_attempts):
+            wait = self._reserve_turn()
+            if wait > 0:
+                time.sleep(wait)
+            with self._slots:
+                try:
+                    return operation(*args, **kwargs)
+                except ClientError as e:
+                    if not _is_throttling(e) or attempt == self.max_attempts - 1:
+                        raise
+            time.sleep(self._backoff(attempt))
+
+    async def _acquire_slot(self) -> None:
+        """Take a slot without blocking the event loop (slots are shared with threads)."""
+        if self._slots.acquire(blocking=False):
+            return
+        # Only hop to a thread when no slot is free
+        acquired = asyncio.ensure_future(asyncio.to_thread(self._slots.acquire))
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            # The thread keeps waiting after the caller is cancelled, so hand the
+            # slot back as soon as it gets one
+            def release(future: asyncio.Future) -> None:
+                if not future.cancelled():
+                    self._slots.release()
+
+            acquired.add_done_callback(release)
+            raise
+
+    async def acall(self, operation, *args, **kwargs):
+        """Await operation(*args, **kwargs) within the limits, retrying if throttled."""
+        for attempt in range(self.max_attempts):
+            wait = self._reserve_turn()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._acquire_slot()
+            try:
+                return await operation(*args, **kwargs)
+            except ClientError as e:
+                if not _is_throttling(e) or attempt == self.max_attempts - 1:
+                    raise
+            finally:
+                self._slots.release()
+            await asyncio.sleep(self._backoff(attempt))
+
+
+class AsyncBedrockRuntime:
+    """
+    Minimal async client for the bedrock-runtime InvokeModel APIs.
+
+    Requests are SigV4-signed with botocore and sent on one long-lived
+    httpx.AsyncClient (HTTP/2 when h2 is installed), so concurrent invocations
+    share connections and never block the event loop. Errors are raised as
+    botocore ClientError, matching the boto3 client.
+    """
+
+    def __init__(
+        self,
+        region_name: str,
+        boto3_session: Optional[boto3.Session] = None,
+        max_connections: int = 100,
+        read_timeout: int = 300,
+    ):
+        """
+        Initialize the async runtime.
+
+        Args:
+            region_name: AWS region where Bedrock is available
+            boto3_session: Session providing credentials (default credential chain if not given)
+            max_connections: Maximum open connections in the HTTP pool
+            read_timeout: Seconds to wait for response data
+        """
+        self.region_name = region_name
+        self._session = boto3_session or boto3.Session(region_name=region_name)
+        self._endpoint = f"https://bedrock-runtime.{region_name}.amazonaws.com"
+        self._limits = httpx.Limits(max_connections=max_connections)
+        self._timeout = httpx.Timeout(10.0, read=read_timeout)
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=_HTTP2_AVAILABLE, limits=self._limits, timeout=self._timeout
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _signed_request(
+        self, model_id: str, action: str, body: bytes, headers: dict[str, str]
+    ) -> httpx.Request:
+        """Build a SigV4-signed POST to /model/{model_id}/{action}."""
+        credentials = self._session.get_credentials()
+        if credentials is None:
+            raise NoCredentialsError()
+        url = f"{self._endpoint}/model/{quote(model_id, safe='')}/{action}"
+        aws_request = AWSRequest(method="POST", url=url, data=body, headers=headers)
+        SigV4Auth(credentials.get_frozen_credentials(), "bedrock", self.region_name).add_auth(
+            aws_request
+        )
+        return self._client().build_request(
+            "POST", url, content=body, headers=dict(aws_request.headers.items())
+        )
+
+    @staticmethod
+    def _headers(accept: str, performance_config_latency: Optional[str]) -> dict[str, str]:
+        headers = {"Content-Type": "application/json", "Accept": accept}
+        if performance_config_latency:
+            headers["X-Amzn-Bedrock-PerformanceConfig-Latency"] = performance_config_latency
+        return headers
+
+    @staticmethod
+    async def _raise_for_error(response: httpx.Response, operation_name: str) -> None:
+        """Raise a ClientError built from a failed Bedrock response."""
+        if response.status_code < 400:
+            return
+        payload = await response.aread()
+        try:
+            message = orjson.loads(payload).get("message", "")
+        except orjson.JSONDecodeError:
+            message = payload.decode("utf-8", errors="replace")
+        code = response.headers.get("x-amzn-errortype", "").split(":")[0]
+        raise ClientError(
+            {
+                "Error": {"Code": code or str(response.status_code), "Message": message},
+                "ResponseMetadata": {"HTTPStatusCode": response.status_code},
+            },
+            operation_name,
+        )
+
+    async def invoke_model(
+        self, modelId: str, body: bytes, performanceConfigLatency: Optional[str] = None
+    ) -> dict[str, Any]:
+        """Invoke a model and return the decoded JSON response body."""
+        request = self._signed_request(
+            modelId, "invoke", body, self._headers("application/json", performanceConfigLatency)
+        )
+        response = await self._client().send(request)
+        await self._raise_for_error(response, "InvokeModel")
+        return orjson.loads(response.content)
+
+    async def invoke_model_with_response_stream(
+        self, modelId: str, body: bytes, performanceConfigLatency: Optional[str] = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Start a streaming invocation.
+
+        Errors in the initial response are raised here; the returned iterator
+        yields each decoded chunk event.
+        """
+        request = self._signed_request(
+            modelId,
+            "invoke-with-response-stream",
+            body,
+            self._headers("application/vnd.amazon.eventstream", performanceConfigLatency),
+        )
+        response = await self._client().send(request, stream=True)
+        try:
+            await self._raise_for_error(response, "InvokeModelWithResponseStream")
+        except BaseException:
+            await response.aclose()
+            raise
+        return self._iter_chunks(response)
+
+    @staticmethod
+    async def _iter_chunks(response: httpx.Response) -> AsyncIterator[dict[str, Any]]:
+        """Decode the AWS event stream, yielding the JSON payload of each chunk event."""
+        buffer = EventStreamBuffer()
+        try:
+            async for data in response.aiter_bytes():
+                buffer.add_data(data)
+                for message in buffer:
+                    headers = message.headers
+                    if headers.get(":message-type") == "exception":
+                        raise ClientError(
+                            {
+                                "Error": {
+                                    "Code": headers.get(":exception-type", ""),
+                                    "Message": orjson.loads(message.payload).get("message", ""),
+                                }
+                            },
+                            "InvokeModelWithResponseStream",
+                        )
+                    if headers.get(":event-type") == "chunk":
+                        yield orjson.loads(base64.b64decode(orjson.loads(message.payload)["bytes"]))
+        finally:
+            await response.aclose()
+
+
+def _build_bedrock_runtime(
+    region_name: str,
+    aws_access_key_id: Optional[str],
+    aws_secret_access_key: Optional[str],
+    aws_session_token: Optional[str],
+    read_timeout: int,
+    boto3_session: Optional[boto3.Session] = None,
+    max_concurrency: int = 8,
+) -> BaseClient:
+    """
+    Create a new bedrock-runtime client.
+
+    The connection pool size and TCP keepalive can only be set here, when the
+    client is created. The pool is sized to at least max_concurrency so
+    concurrent requests never queue for a connection.
+    """
+    config = Config(
+        region_name=region_name,
+        read_timeout=read_timeout,
+        retries={"max_attempts": 3, "mode": "adaptive"},
+        max_pool_connections=max(32, max_concurrency),
+        tcp_keepalive=True,
+    )
+
+    if boto3_session is not None:
+        return boto3_session.client(service_name="bedrock-runtime", config=config)
+
+    if aws_access_key_id and aws_secret_access_key:
+        return boto3.client(
+            service_name="bedrock-runtime",
+            region_name=region_name,
+            aws_access_key_id=aws_access_key_id,
+            aws_secret_access_key=aws_secret_access_key,
+            aws_session_token=aws_session_token,
+            config=config,
+        )
+
+    return boto3.client(
+        service_name="bedrock-runtime",
+        region_name=region_name,
+        config=config,
+    )
+
+
+def _get_bedrock_runtime(
+    region_name: str,
+    aws_access_key_id: Optional[str] = None,
+    aws_secret_access_key: Optional[str] = None,
+    aws_session_token: Optional[str] = None,
+    read_timeout: int = 300,
+    boto3_session: Optional[boto3.Session] = None,
+    max_concurrency: int = 8,
+) -> BaseClient:
+    """
+    Get a bedrock-runtime client, reusing one built earlier with the same settings.
+
+    Creating a client loads the service model and resolves credentials, so it is
+    only done once per region/credentials/timeout/pool size. Clients built from temporary
+    credentials (with a session token) are not cached since the token expires.
+    When a boto3 session is given its credentials are used and the client is
+    cached per session.
+    """
+    if boto3_session is None and aws_session_token and aws_access_key_id and aws_secret_access_key:
+        return _build_bedrock_runtime(
+            region_name,
+            aws_access_key_id,
+            aws_secret_access_key,
+            aws_session_token,
+            read_timeout,
+            max_concurrency=max_concurrency,
+        )
+
+    pool_size = max(32, max_concurrency)
+    if boto3_session is not None:
+        key = (region_name, boto3_session, read_timeout, pool_size)
+    else:
+        key = (
+            region_name,
+            aws_access_key_id or None,
+            aws_secret_access_key or None,
+            read_timeout,
+            pool_size,
+        )
+    with _runtime_clients_lock:
+        client = _runtime_clients.get(key)
+        if client is None:
+            client = _build_bedrock_runtime(
+                region_name,
+                aws_access_key_id,
+                aws_secret_access_key,
+                None,
+                read_timeout,
+                boto3_session=boto3_session,
+                max_concurrency=max_concurrency,
+            )
+            _runtime_clients[key] = client
+        return client
+
+
+def invalidate_runtime_client(region_name: str) -> None:
+    """Drop cached bedrock-runtime clients for a region so the next call rebuilds them."""
+    with _runtime_clients_lock:
+        for key in [k for k in _runtime_clients if k[0] == region_name]:
+            del _runtime_clients[key]
+
+
+def submit_batch_inference_job(
+    boto3_session: boto3.Session,
+    model_id: str,
+    records: list[dict[str, Any]],
+    input_s3_uri: str,
+    output_s3_uri: str,
+    role_arn: str,
+    job_name: Optional[str] = None,
+) -> str:
+    """
+    Upload records as JSONL to S3 and start a Bedrock batch inference job.
+
+    Args:
+        boto3_session: Session used for the S3 and Bedrock control-plane clients
+        model_id: Bedrock model ID to run the job with
+        records: Items of the form {"recordId": ..., "modelInput": {...}}
+        input_s3_uri: S3 object URI to write the JSONL input to
+        output_s3_uri: S3 prefix Bedrock writes the results to
+        role_arn: IAM role Bedrock assumes to read the input and write the output
+        job_name: Optional job name (generated if not given)
+
+    Returns:
+        The job ARN, for polling with get_model_invocation_job
+    """
+    if len(records) < BATCH_JOB_MIN_RECORDS:
+        raise ValueError(
+            f"Batch inference jobs need at least {BATCH_JOB_MIN_RECORDS} records, "
+            f"got {len(records)}"
+        )
+
+    bucket, _, key = input_s3_uri.removeprefix("s3://").partition("/")
+    payload = b"\n".join(orjson.dumps(record) for record in records)
+    boto3_session.client("s3").put_object(Bucket=bucket, Key=key, Body=payload)
+
+    response = boto3_session.client("bedrock").create_model_invocation_job(
+        jobName=job_name or f"context-graph-{uuid.uuid4().hex[:12]}",
+        roleArn=role_arn,
+        modelId=model_id,
+        inputDataConfig={"s3InputDataConfig": {"s3Uri": input_s3_uri}},
+        outputDataConfig={"s3OutputDataConfig": {"s3Uri": output_s3_uri}},
+    )
+    return response["jobArn"]
+
+
+def read_batch_inference_results(
+    boto3_session: boto3.Session, job_arn: str
+) -> Optional[dict[int, dict[str, Any]]]:
+    """
+    Read the output of a batch inference job started by submit_batch_inference_job.
+
+    Args:
+        boto3_session: Session used for the S3 and Bedrock control-plane clients
+        job_arn: ARN returned when the job was submitted
+
+    Returns:
+        None while the job is still running, then each record's modelOutput by its
+        (integer) recordId; a record that failed maps to {"error": ...}
+
+    Raises:
+        RuntimeError: If the job failed, was stopped or expired
+    """
+    job = boto3_session.client("bedrock").get_model_invocation_job(jobIdentifier=job_arn)
+    status = job["status"]
+    if status in ("Failed", "Stopped", "Expired"):
+        raise RuntimeError(f"Batch inference job {job_arn} {status.lower()}: {job.get('message')}")
+    if status not in ("Completed", "PartiallyCompleted"):
+        return None
+
+    # Bedrock writes <output prefix>/<job ID>/<input file name>.out
+    input_name = job["inputDataConfig"]["s3InputDataConfig"]["s3Uri"].rsplit("/", 1)[-1]
+    output_prefix = job["outputDataConfig"]["s3OutputDataConfig"]["s3Uri"].rstrip("/")
+    output_uri = f"{output_prefix}/{job_arn.rsplit('/', 1)[-1]}/{input_name}.out"
+    bucket, _, key = output_uri.removeprefix("s3://").partition("/")
+    body = boto3_session.client("s3").get_object(Bucket=bucket, Key=key)["Body"].read()
+
+    results = {}
+    for line in body.splitlines():
+        if line:
+            record = orjson.loads(line)
+            output = record.get("modelOutput")
+            results[int(record["recordId"])] = (
+                output if output is not None else {"error": record.get("error")}
+            )
+    return results
+
+
+def _titan_body(text: str) -> bytes:
+    return orjson.dumps({"inputText": text})
+
+
+def _titan_embedding(response_body: dict[str, Any]) -> np.ndarray:
+    return np.asarray(response_body["embedding"], dtype=np.float32)
+
+
+def _cohere_body(text: str) -> bytes:
+    return orjson.dumps({"texts": [text], "input_type": "search_document"})
+
+
+def _cohere_embedding(response_body: dict[str, Any]) -> np.ndarray:
+    return np.asarray(response_body["embeddings"][0], dtype=np.float32)
+
+
+def _stack_embeddings(vectors: list[np.ndarray]) -> np.ndarray:
+    """Stack per-text vectors into one (N, D) float32 matrix."""
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack(vectors)
+
+
+# Request body builder and response extractor per embedding model family
+_EMBEDDING_FAMILIES = {
+    "titan": (_titan_body, _titan_embedding),
+    "cohere": (_cohere_body, _cohere_embedding),
+}
+
+
+def _supports_latency_optimized(model_id: str) -> bool:
+    """Check whether a model ID or inference profile (e.g. "us.<model>") is latency-optimized."""
+    base = model_id.split(".", 1)[1] if model_id.startswith(("us.", "eu.", "apac.")) else model_id
+    return base in LATENCY_OPTIMIZED_MODELS
+
 
 class BedrockClaudeClient:
     """Client for invoking Claude via Amazon Bedrock."""
@@ -23,6 +608,12 @@ class BedrockClaudeClient:
         aws_access_key_id: Optional[str] = None,
         aws_secret_access_key: Optional[str] = None,
         aws_session_token: Optional[str] = None,
+        client: Optional[BaseClient] = None,
+        boto3_session: Optional[boto3.Session] = None,
+        performance_config: Optional[str] = None,
+        rate_limiter: Optional[BedrockRateLimiter] = None,
+        async_runtime: Optional[AsyncBedrockRuntime] = None,
+        prompt_caching: bool = False,
     ):
         """
         Initialize Bedrock Claude client.
@@ -33,39 +624,99 @@ class BedrockClaudeClient:
             aws_access_key_id: AWS access key (optional, uses default credentials if not provided)
             aws_secret_access_key: AWS secret key
             aws_session_token: AWS session token (for temporary credentials)
+            client: Pre-built bedrock-runtime client to use as-is
+            boto3_session: boto3 session to build the bedrock-runtime client from
+            performance_config: Default latency mode ("optimized", or "standard"/None);
+                                only applied to LATENCY_OPTIMIZED_MODELS
+            rate_limiter: Limiter shared with other clients (a private one is created if not given)
+            async_runtime: Async HTTP runtime for ainvoke/invoke_stream (built from the same
+                           credentials if not given; with an injected client, the async
+                           methods fall back to running the sync client in a thread)
+            prompt_caching: Add a prompt cache breakpoint after the tools and system prompt
+                            (the model must support Claude prompt caching on Bedrock)
         """
         self.model_id = model_id
         self.region_name = region_name
+        self.performance_config = performance_config
+        self.prompt_caching = prompt_caching
+        self.rate_limiter = rate_limiter or BedrockRateLimiter()
 
-        config = Config(
-            region_name=region_name,
-            read_timeout=300,
-            retries={"max_attempts": 3, "mode": "adaptive"},
-        )
+        if client is not None:
+            # Caller owns the client, so it is never rebuilt here
+            self._runtime_kwargs = None
+            self.bedrock_runtime = client
+            self.async_runtime = async_runtime
+            self.boto3_session = boto3_session
+            return
 
-        if aws_access_key_id and aws_secret_access_key:
-            self.bedrock_runtime = boto3.client(
-                service_name="bedrock-runtime",
-                region_name=region_name,
-                aws_access_key_id=aws_access_key_id,
-                aws_secret_access_key=aws_secret_access_key,
-                aws_session_token=aws_session_token,
-                config=config,
-            )
-        else:
-            self.bedrock_runtime = boto3.client(
-                service_name="bedrock-runtime",
-                region_name=region_name,
-                config=config,
-            )
+        if async_runtime is None:
+            if boto3_session is None and aws_access_key_id and aws_secret_access_key:
+                boto3_session = boto3.Session(
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    aws_session_token=aws_session_token or None,
+                    region_name=region_name,
+                )
+            async_runtime = AsyncBedrockRuntime(region_name, boto3_session=boto3_session)
+        self.async_runtime = async_runtime
+        # Also used for the S3 and control-plane calls of batch jobs
+        self.boto3_session = boto3_session
+
+        self._runtime_kwargs = {
+            "region_name": region_name,
+            "aws_access_key_id": aws_access_key_id,
+            "aws_secret_access_key": aws_secret_access_key,
+            "aws_session_token": aws_session_token,
+            "read_timeout": 300,
+            "boto3_session": boto3_session,
+        }
+        self.bedrock_runtime = _get_bedrock_runtime(**self._runtime_kwargs)
+
+    def _reset_runtime(self, error: Exception) -> None:
+        """Replace the runtime client if the error means its connections are dead."""
+        if self._runtime_kwargs is not None and isinstance(error, _STALE_CONNECTION_ERRORS):
+            invalidate_runtime_client(self.region_name)
+            self.bedrock_runtime = _get_bedrock_runtime(**self._runtime_kwargs)
+
+    async def aclose(self) -> None:
+        """Close the async runtime's pooled HTTP connections (reopened on next use)."""
+        if self.async_runtime is not None:
+            await self.async_runtime.aclose()
+
+    def _invoke_kwargs(
+        self, body: bytes, performance_config: Optional[str]
+    ) -> dict[str, Any]:
+        """Build the InvokeModel arguments, adding the latency mode when supported."""
+        kwargs = {"modelId": self.model_id, "body": body}
+        latency = performance_config or self.performance_config
+        if latency and latency != "standard" and _supports_latency_optimized(self.model_id):
+            kwargs["performanceConfigLatency"] = latency
+        return kwargs
+
+    def _build_body(
+        self,
+        messages: Sequence[dict[str, Any]],
+        system: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        tools: Optional[list[dict] | bytes],
+    ) -> bytes:
+        """Encode the Anthropic Messages request body; only the messages change per turn."""
+        if tools and not isinstance(tools, bytes):
+            tools = encode_tools(tools)
+        prelude = _body_prelude(
+            system, max_tokens, temperature, tools or None, self.prompt_caching
+        )
+        return prelude + orjson.dumps(messages, default=_json_default) + b"}"
 
     def invoke(
         self,
-        messages: list[dict[str, Any]],
+        messages: Sequence[dict[str, Any]],
         system: Optional[str] = None,
         max_tokens: int = 4096,
         temperature: float = 1.0,
-        tools: Optional[list[dict]] = None,
+        tools: Optional[list[dict] | bytes] = None,
+        performance_config: Optional[str] = None,
     ) -> dict[str, Any]:
         """
         Invoke Claude via Bedrock (non-streaming).
@@ -75,81 +726,174 @@ class BedrockClaudeClient:
             system: System prompt
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
-            tools: List of tool definitions
+            tools: List of tool definitions, or their JSON array pre-encoded as bytes
+            performance_config: Latency mode override ("optimized" or "standard")
             
         Returns:
             Response dict with Claude's output
         """
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-        }
+        body = self._build_body(messages, system, max_tokens, temperature, tools)
 
-        if system:
-            body["system"] = system
+        try:
+            response = self.rate_limiter.call(
+                self.bedrock_runtime.invoke_model,
+                **self._invoke_kwargs(body, performance_config),
+            )
 
-        if tools:
-            body["tools"] = tools
+            return orjson.loads(response["body"].read())
 
-        try:
-            response = self.bedrock_runtime.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(body),
+        except Exception as e:
+            logger.error(f"Bedrock invocation error: {e}")
+            self._reset_runtime(e)
+            raise
+
+    async def ainvoke(
+        self,
+        messages: Sequence[dict[str, Any]],
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        tools: Optional[list[dict] | bytes] = None,
+        performance_config: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Invoke Claude via Bedrock (non-streaming) without blocking the event loop.
+
+        Takes the same arguments and returns the same response as invoke.
+        """
+        if self.async_runtime is None:
+            return await asyncio.to_thread(
+                self.invoke, messages, system, max_tokens, temperature, tools, performance_config
             )
 
-            response_body = json.loads(response["body"].read())
-            return response_body
+        body = self._build_body(messages, system, max_tokens, temperature, tools)
 
+        try:
+            return await self.rate_limiter.acall(
+                self.async_runtime.invoke_model,
+                **self._invoke_kwargs(body, performance_config),
+            )
         except Exception as e:
             logger.error(f"Bedrock invocation error: {e}")
             raise
 
     async def invoke_stream(
         self,
-        messages: list[dict[str, Any]],
+        messages: Sequence[dict[str, Any]],
         system: Optional[str] = None,
         max_tokens: int = 4096,
         temperature: float = 1.0,
-        tools: Optional[list[dict]] = None,
+        tools: Optional[list[dict] | bytes] = None,
+        performance_config: Optional[str] = None,
     ) -> AsyncIterator[dict[str, Any]]:
         """
         Invoke Claude via Bedrock with streaming.
         
-        Yields response chunks as they arrive.
+        Yields response chunks as they arrive. Uses the async HTTP runtime; with an
+        injected sync client, the boto3 call and event stream reads run in a worker
+        thread instead so the event loop stays free.
         """
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-        }
-
-        if system:
-            body["system"] = system
+        body = self._build_body(messages, system, max_tokens, temperature, tools)
 
-        if tools:
-            body["tools"] = tools
+        if self.async_runtime is not None:
+            try:
+                chunks = await self.rate_limiter.acall(
+                    self.async_runtime.invoke_model_with_response_stream,
+                    **self._invoke_kwargs(body, performance_config),
+                )
+                async for chunk in chunks:
+                    yield chunk
+            except Exception as e:
+                logger.error(f"Bedrock streaming error: {e}")
+                raise
+            return
 
         try:
-            response = self.bedrock_runtime.invoke_model_with_response_stream(
-                modelId=self.model_id,
-                body=json.dumps(body),
+            response = await asyncio.to_thread(
+                self.rate_limiter.call,
+                self.bedrock_runtime.invoke_model_with_response_stream,
+                **self._invoke_kwargs(body, performance_config),
             )
 
             stream = response.get("body")
             if stream:
-                for event in stream:
+                events = iter(stream)
+                while (event := await asyncio.to_thread(next, events, None)) is not None:
                     chunk = event.get("chunk")
                     if chunk:
-                        chunk_data = json.loads(chunk.get("bytes").decode())
-                        yield chunk_data
+                        yield orjson.loads(chunk["bytes"])
 
         except Exception as e:
             logger.error(f"Bedrock streaming error: {e}")
+            self._reset_runtime(e)
             raise
 
+    def create_message_batch_job(
+        self,
+        conversations: Sequence[Sequence[dict[str, Any]]],
+        input_s3_uri: str,
+        output_s3_uri: str,
+        role_arn: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        tools: Optional[list[dict] | bytes] = None,
+        job_name: Optional[str] = None,
+    ) -> str:
+        """
+        Run independent conversations offline with a Bedrock batch inference job.
+
+        Batch jobs cost about half as much as on-demand calls, for workloads that can
+        wait for the job to finish (see get_message_batch_results); needs at least
+        BATCH_JOB_MIN_RECORDS conversations. Each output record's recordId is the
+        index of its conversation.
+
+        Args:
+            conversations: One list of message dicts per request
+            input_s3_uri: S3 object URI to write the JSONL input to
+            output_s3_uri: S3 prefix Bedrock writes the results to
+            role_arn: IAM role Bedrock assumes to read the input and write the output
+            system: System prompt shared by all requests
+            max_tokens: Maximum tokens to generate per request
+            temperature: Sampling temperature
+            tools: List of tool definitions, or their JSON array pre-encoded as bytes
+            job_name: Optional job name (generated if not given)
+
+        Returns:
+            The job ARN
+        """
+        model_input = {**_CLAUDE_BODY_BASE, "max_tokens": max_tokens, "temperature": temperature}
+        if system:
+            model_input["system"] = system
+        if tools:
+            model_input["tools"] = orjson.loads(tools) if isinstance(tools, bytes) else tools
+        records = [
+            {"recordId": str(i), "modelInput": {**model_input, "messages": list(messages)}}
+            for i, messages in enumerate(conversations)
+        ]
+
+        return submit_batch_inference_job(
+            self.boto3_session or boto3.Session(region_name=self.region_name),
+            model_id=self.model_id,
+            records=records,
+            input_s3_uri=input_s3_uri,
+            output_s3_uri=output_s3_uri,
+            role_arn=role_arn,
+            job_name=job_name,
+        )
+
+    def get_message_batch_results(self, job_arn: str) -> Optional[dict[int, dict[str, Any]]]:
+        """
+        Get the responses of a job from create_message_batch_job.
+
+        Returns:
+            None while the job is still running, then the response dicts by
+            conversation index ({"error": ...} for a request that failed)
+        """
+        return read_batch_inference_results(
+            self.boto3_session or boto3.Session(region_name=self.region_name), job_arn
+        )
+
 
 class BedrockEmbeddingsClient:
     """Client for generating embeddings via Amazon Bedrock."""
@@ -161,6 +905,11 @@ class BedrockEmbeddingsClient:
         aws_access_key_id: Optional[str] = None,
         aws_secret_access_key: Optional[str] = None,
         aws_session_token: Optional[str] = None,
+        client: Optional[BaseClient] = None,
+        boto3_session: Optional[boto3.Session] = None,
+        max_concurrency: int = 8,
+        requests_per_second: Optional[float] = None,
+        rate_limiter: Optional[BedrockRateLimiter] = None,
     ):
         """
         Initialize Bedrock embeddings client.
@@ -175,33 +924,58 @@ class BedrockEmbeddingsClient:
             aws_access_key_id: AWS access key
             aws_secret_access_key: AWS secret key
             aws_session_token: AWS session token
+            client: Pre-built bedrock-runtime client to use as-is
+            boto3_session: boto3 session to build the bedrock-runtime client from
+            max_concurrency: Maximum in-flight requests when embedding a batch
+                             one text at a time (Titan)
+            requests_per_second: Maximum request rate for the private rate limiter
+            rate_limiter: Limiter shared with other clients (overrides max_concurrency
+                          and requests_per_second for request admission)
+
+        Raises:
+            ValueError: If model_id is not a Titan or Cohere embedding model
         """
+        model = model_id.lower()
+        if "titan" in model:
+            self._family = "titan"
+        elif "cohere" in model:
+            self._family = "cohere"
+        else:
+            raise ValueError(f"Unsupported embedding model: {model_id}")
+        self._build_body, self._extract_embedding = _EMBEDDING_FAMILIES[self._family]
+
         self.model_id = model_id
         self.region_name = region_name
-
-        config = Config(
-            region_name=region_name,
-            read_timeout=60,
-            retries={"max_attempts": 3, "mode": "adaptive"},
+        self.max_concurrency = max_concurrency
+        self.boto3_session = boto3_session
+        self.rate_limiter = rate_limiter or BedrockRateLimiter(
+            max_concurrency=max_concurrency, requests_per_second=requests_per_second
         )
 
-        if aws_access_key_id and aws_secret_access_key:
-            self.bedrock_runtime = boto3.client(
-                service_name="bedrock-runtime",
-                region_name=region_name,
-                aws_access_key_id=aws_access_key_id,
-                aws_secret_access_key=aws_secret_access_key,
-                aws_session_token=aws_session_token,
-                config=config,
-            )
-        else:
-            self.bedrock_runtime = boto3.client(
-                service_name="bedrock-runtime",
-                region_name=region_name,
-                config=config,
-            )
+        if client is not None:
+            # Caller owns the client, so it is never rebuilt here
+            self._runtime_kwargs = None
+            self.bedrock_runtime = client
+            return
 
-    def generate_embedding(self, text: str) -> list[float]:
+        self._runtime_kwargs = {
+            "region_name": region_name,
+            "aws_access_key_id": aws_access_key_id,
+            "aws_secret_access_key": aws_secret_access_key,
+            "aws_session_token": aws_session_token,
+            "read_timeout": 60,
+            "boto3_session": boto3_session,
+            "max_concurrency": max_concurrency,
+        }
+        self.bedrock_runtime = _get_bedrock_runtime(**self._runtime_kwargs)
+
+    def _reset_runtime(self, error: Exception) -> None:
+        """Replace the runtime client if the error means its connections are dead."""
+        if self._runtime_kwargs is not None and isinstance(error, _STALE_CONNECTION_ERRORS):
+            invalidate_runtime_client(self.region_name)
+            self.bedrock_runtime = _get_bedrock_runtime(**self._runtime_kwargs)
+
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
         
@@ -209,61 +983,148 @@ class BedrockEmbeddingsClient:
             text: Input text to embed
             
         Returns:
-            List of floats representing the embedding vector
+            1-D float32 array with the embedding vector (call .tolist() for JSON)
         """
-        if "titan" in self.model_id.lower():
-            body = json.dumps({"inputText": text})
-        elif "cohere" in self.model_id.lower():
-            body = json.dumps({
-                "texts": [text],
-                "input_type": "search_document",
-            })
-        else:
-            raise ValueError(f"Unsupported embedding model: {self.model_id}")
-
         try:
-            response = self.bedrock_runtime.invoke_model(
+            response = self.rate_limiter.call(
+                self.bedrock_runtime.invoke_model,
                 modelId=self.model_id,
-                body=body,
+                body=self._build_body(text),
             )
-
-            response_body = json.loads(response["body"].read())
-
-            if "titan" in self.model_id.lower():
-                return response_body["embedding"]
-            elif "cohere" in self.model_id.lower():
-                return response_body["embeddings"][0]
+            return self._extract_embedding(orjson.loads(response["body"].read()))
 
         except Exception as e:
             logger.error(f"Bedrock embedding error: {e}")
+            self._reset_runtime(e)
             raise
 
-    def generate_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
+    def generate_embedding_int8(self, text: str) -> tuple[np.ndarray, float]:
+        """
+        Generate an L2-normalized embedding scalar-quantized to int8.
+
+        Cosine similarity is scale-invariant, so the int8 codes can be compared
+        directly; multiply by the scale to recover the normalized float vector.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            Tuple of (int8 codes, scale) where codes * scale ~= the unit vector
+        """
+        vector = self.generate_embedding(text)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        max_abs = float(np.abs(vector).max()) if vector.size else 0.0
+        if max_abs == 0.0:
+            return np.zeros(vector.shape, dtype=np.int8), 1.0
+        codes = np.round(vector / max_abs * 127).astype(np.int8)
+        return codes, max_abs / 127
+
+    def generate_embeddings_batch(self, texts: list[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
+
+        Cohere models embed the whole batch in one request. Titan takes one
+        text per request, so those are sent concurrently; for large offline
+        batches use create_embedding_batch_job instead.
         
         Args:
             texts: List of input texts
             
         Returns:
-            List of embedding vectors
+            (N, D) float32 array with one embedding per row
         """
-        if "cohere" in self.model_id.lower():
-            body = json.dumps({
+        if self._family == "cohere":
+            body = orjson.dumps({
                 "texts": texts,
                 "input_type": "search_document",
             })
 
             try:
-                response = self.bedrock_runtime.invoke_model(
+                response = self.rate_limiter.call(
+                    self.bedrock_runtime.invoke_model,
                     modelId=self.model_id,
                     body=body,
                 )
-                response_body = json.loads(response["body"].read())
-                return response_body["embeddings"]
+                response_body = orjson.loads(response["body"].read())
+                return np.asarray(response_body["embeddings"], dtype=np.float32)
 
             except Exception as e:
                 logger.error(f"Bedrock batch embedding error: {e}")
+                self._reset_runtime(e)
                 raise
         else:
-            return [self.generate_embedding(text) for text in texts]
+            # Titan takes one text per request, so send them concurrently
+            if len(texts) <= 1:
+                return _stack_embeddings([self.generate_embedding(text) for text in texts])
+            workers = min(self.max_concurrency, len(texts))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return _stack_embeddings(list(executor.map(self.generate_embedding, texts)))
+
+    async def agenerate_embeddings_batch(
+        self, texts: list[str], max_concurrency: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts without blocking the event loop.
+        
+        Args:
+            texts: List of input texts
+            max_concurrency: Maximum in-flight requests (defaults to the client setting)
+            
+        Returns:
+            (N, D) float32 array, rows in the same order as texts
+        """
+        if self._family == "cohere":
+            return await asyncio.to_thread(self.generate_embeddings_batch, texts)
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def embed(text: str) -> np.ndarray:
+            async with semaphore:
+                return await asyncio.to_thread(self.generate_embedding, text)
+
+        return _stack_embeddings(await asyncio.gather(*(embed(text) for text in texts)))
+
+    def create_embedding_batch_job(
+        self,
+        texts: list[str],
+        input_s3_uri: str,
+        output_s3_uri: str,
+        role_arn: str,
+        job_name: Optional[str] = None,
+    ) -> str:
+        """
+        Embed a large set of texts offline with a Bedrock batch inference job.
+
+        Meant for bulk (re)indexing where latency does not matter; needs at
+        least BATCH_JOB_MIN_RECORDS texts. Each output record's recordId is the
+        index of its text. Uses the client's boto3 session, or the default
+        credential chain if none was given.
+
+        Returns:
+            The job ARN
+        """
+        if self._family == "titan":
+            records = [
+                {"recordId": str(i), "modelInput": {"inputText": text}}
+                for i, text in enumerate(texts)
+            ]
+        else:
+            records = [
+                {
+                    "recordId": str(i),
+                    "modelInput": {"texts": [text], "input_type": "search_document"},
+                }
+                for i, text in enumerate(texts)
+            ]
+
+        return submit_batch_inference_job(
+            self.boto3_session or boto3.Session(region_name=self.region_name),
+            model_id=self.model_id,
+            records=records,
+            input_s3_uri=input_s3_uri,
+            output_s3_uri=output_s3_uri,
+            role_arn=role_arn,
+            job_name=job_name,
+        )
@@ -4,6 +4,7 @@ Configuration management for the Context Graph application.
 
 import os
 from dataclasses import dataclass
+from typing import Any, Optional
 
 from dotenv import load_dotenv
 
@@ -70,6 +71,19 @@ class BedrockConfig:
     claude_model_id: str
     embedding_model_id: str
     embedding_dimensions: int
+    # Request latency-optimized inference where the model supports it (LATENCY_OPTIMIZED_MODELS)
+    latency_optimized: bool = True
+    # Concurrent Bedrock requests per batch; size to the account's quota/usage tier
+    max_concurrency: int = 8
+    # Maximum Bedrock request rate per client; 0 leaves it to max_concurrency and botocore retries
+    requests_per_second: float = 0.0
+    # Model calls per agent query before the tool loop is cut off
+    max_agent_iterations: int = 10
+    # Seconds per agent query after which no further model call is started
+    agent_loop_budget_s: float = 120.0
+    # Mark the tools + system prompt prefix for Claude prompt caching (only for models
+    # and regions that support it on Bedrock; others reject the request)
+    prompt_caching: bool = False
 
     @classmethod
     def from_env(cls) -> "BedrockConfig":
@@ -87,8 +101,27 @@ class BedrockConfig:
                 "amazon.titan-embed-text-v2:0"
             ),
             embedding_dimensions=int(os.getenv("BEDROCK_EMBEDDING_DIMENSIONS", "1024")),
+            latency_optimized=os.getenv("BEDROCK_LATENCY_OPTIMIZED", "true").lower() == "true",
+            max_concurrency=int(os.getenv("BEDROCK_MAX_CONCURRENCY", "8")),
+            requests_per_second=float(os.getenv("BEDROCK_REQUESTS_PER_SECOND", "0")),
+            max_agent_iterations=int(os.getenv("BEDROCK_MAX_AGENT_ITERATIONS", "10")),
+            agent_loop_budget_s=float(os.getenv("BEDROCK_AGENT_LOOP_BUDGET_S", "120")),
+            prompt_caching=os.getenv("BEDROCK_PROMPT_CACHING", "false").lower() == "true",
         )
 
+    def create_session(self):
+        """Create a boto3 session from these credentials, or the default credential chain."""
+        import boto3
+
+        if self.aws_access_key_id and self.aws_secret_access_key:
+            return boto3.Session(
+                aws_access_key_id=self.aws_access_key_id,
+                aws_secret_access_key=self.aws_secret_access_key,
+                aws_session_token=self.aws_session_token or None,
+                region_name=self.region_name,
+            )
+        return boto3.Session(region_name=self.region_name)
+
 
 @dataclass
 class AppConfig:
@@ -102,6 +135,9 @@ class AppConfig:
     # Toggle between direct API and Bedrock
     use_bedrock: bool = False
 
+    # Shared boto3 session for all Bedrock clients (only created when using Bedrock)
+    boto3_session: Optional[Any] = None
+
     # FastRP embedding dimensions (structural)
     fastrp_dimensions: int = 128
 
@@ -112,12 +148,15 @@ class AppConfig:
 
     @classmethod
     def from_env(cls) -> "AppConfig":
+        bedrock = BedrockConfig.from_env()
+        use_bedrock = os.getenv("USE_BEDROCK", "false").lower() == "true"
         return cls(
             neo4j=Neo4jConfig.from_env(),
             openai=OpenAIConfig.from_env(),
             anthropic=AnthropicConfig.from_env(),
-            bedrock=BedrockConfig.from_env(),
-            use_bedrock=os.getenv("USE_BEDROCK", "false").lower() == "true",
+            bedrock=bedrock,
+            use_bedrock=use_bedrock,
+            boto3_session=bedrock.create_session() if use_bedrock else None,
             fastrp_dimensions=int(os.getenv("FASTRP_DIMENSIONS", "128")),
             host=os.getenv("HOST", "0.0.0.0"),
             port=int(os.getenv("PORT", "8000")),
@@ -25,6 +25,14 @@ from .models import (
 )
 
 
+class ContextGraphNotFound(LookupError):
+    """Raised when a requested node does not exist in the context graph."""
+
+
+class CypherValidationError(ValueError):
+    """Raised when a Cypher query is rejected before it is sent to Neo4j."""
+
+
 def convert_neo4j_value(value: Any) -> Any:
     """Convert Neo4j types to JSON-serializable Python types."""
     if isinstance(value, Neo4jDateTime):
@@ -45,6 +53,39 @@ def convert_node_properties(props: dict) -> dict:
     return {k: convert_neo4j_value(v) for k, v in props.items()}
 
 
+def build_graph_data(neo4j_nodes: list, neo4j_relationships: list) -> GraphData:
+    """Convert Neo4j nodes and relationships to GraphData, dropping nulls and duplicates."""
+    nodes = []
+    seen_node_ids = set()
+    for node in neo4j_nodes or []:
+        if node and node.element_id not in seen_node_ids:
+            seen_node_ids.add(node.element_id)
+            nodes.append(
+                GraphNode(
+                    id=str(node.element_id),
+                    labels=list(node.labels),
+                    properties=convert_node_properties(dict(node)),
+                )
+            )
+
+    relationships = []
+    seen_rel_ids = set()
+    for rel in neo4j_relationships or []:
+        if rel is not None and rel.element_id not in seen_rel_ids:
+            seen_rel_ids.add(rel.element_id)
+            relationships.append(
+                GraphRelationship(
+                    id=str(rel.element_id),
+                    type=rel.type,
+                    start_node_id=str(rel.start_node.element_id),
+                    end_node_id=str(rel.end_node.element_id),
+                    properties=convert_node_properties(dict(rel)),
+                )
+            )
+
+    return GraphData(nodes=nodes, relationships=relationships)
+
+
 class ContextGraphClient:
     """Neo4j client for context graph operations."""
 
@@ -228,6 +269,62 @@ class ContextGraphClient:
             )
             return [dict(record) for record in result]
 
+    def search_customers_with_graph(
+        self,
+        query: str,
+        limit: int = 10,
+        graph_depth: int = 1,
+        graph_customers: int = 3,
+    ) -> tuple[list[dict], GraphData]:
+        """
+        Search for customers and fetch the neighborhood of the top matches in one query.
+
+        Returns the same rows as search_customers plus the subgraph within
+        graph_depth hops of the first graph_customers results.
+        """
+        with self.driver.session(database=self.database) as session:
+            result = session.run(
+                f"""
+                MATCH (p:Person)
+                WHERE toLower(p.name) CONTAINS toLower($query)
+                   OR toLower(p.email) CONTAINS toLower($query)
+                   OR EXISTS {{
+                       MATCH (p)-[:OWNS]->(a:Account)
+                       WHERE a.account_number CONTAINS $query
+                   }}
+                OPTIONAL MATCH (p)-[:OWNS]->(a:Account)
+                OPTIONAL MATCH (d:Decision)-[:ABOUT]->(p)
+                WITH p, count(DISTINCT a) AS account_count, count(DISTINCT d) AS decision_count
+                ORDER BY p.risk_score DESC
+                LIMIT $limit
+                WITH collect({{
+                    customer: {{
+                        id: p.id,
+                        name: p.name,
+                        email: p.email,
+                        risk_score: p.risk_score,
+                        account_count: account_count,
+                        decision_count: decision_count
+                    }},
+                    node: p
+                }}) AS rows
+                CALL (rows) {{
+                    UNWIND rows[0..$graph_customers] AS row
+                    WITH row.node AS center
+                    OPTIONAL MATCH path = (center)-[:!HAS_SIMILAR_FACTORS&!BELONGS_TO_DECISION_COMMUNITY&!BELONGS_TO_ACCOUNT_COMMUNITY*1..{int(graph_depth)}]-()
+                    WITH collect(DISTINCT center) AS centers, collect(path) AS paths
+                    RETURN centers + reduce(ns = [], path IN paths | ns + nodes(path)) AS nodes,
+                           reduce(rs = [], path IN paths | rs + relationships(path)) AS relationships
+                }}
+                RETURN [row IN rows | row.customer] AS customers, nodes, relationships
+                """,
+                {"query": query, "limit": limit, "graph_customers": graph_customers},
+            )
+            record = result.single()
+            if not record:
+                return [], GraphData(nodes=[], relationships=[])
+            return record["customers"], build_graph_data(record["nodes"], record["relationships"])
+
     def get_customer(self, customer_id: str) -> Optional[dict]:
         """Get a customer by ID with related entities."""
         with self.driver.session(database=self.database) as session:
@@ -266,6 +363,8 @@ class ContextGraphClient:
                 WITH d, maker, collect(DISTINCT policy.name) AS policies_applied
                 RETURN d {{
                     .*,
+                    reasoning_embedding: null,
+                    fast_rp_embedding: null,
                     made_by: maker.name,
                     policies_applied: policies_applied
                 }} AS decision
@@ -298,9 +397,11 @@ class ContextGraphClient:
                 OPTIONAL MATCH (d)-[:HAD_CONTEXT]->(context:DecisionContext)
                 RETURN d {
                     .*,
+                    reasoning_embedding: null,
+                    fast_rp_embedding: null,
                     about_entities: collect(DISTINCT {id: entity.id, labels: labels(entity), name: entity.name}),
                     made_by: maker {.*},
-                    policies: collect(DISTINCT policy {.*}),
+                    policies: collect(DISTINCT policy {.*, description_embedding: null}),
                     exceptions: collect(DISTINCT exception {.*}),
                     escalations: collect(DISTINCT escalation {.*}),
                     contexts: collect(DISTINCT context {.*})
@@ -438,6 +539,8 @@ class ContextGraphClient:
                 WITH d, collect(DISTINCT labels(target)[0]) AS target_types
                 RETURN d {{
                     .*,
+                    reasoning_embedding: null,
+                    fast_rp_embedding: null,
                     target_types: target_types
                 }} AS decision
                 ORDER BY decision.decision_timestamp DESC
@@ -470,7 +573,9 @@ class ContextGraphClient:
                     MATCH (d:Decision {{id: $decision_id}})
                     MATCH path = (cause:Decision)-[:CAUSED|INFLUENCED*1..{depth}]->(d)
                     WITH cause, length(path) AS distance
-                    RETURN cause {{.*, distance: distance}} AS decision
+                    RETURN cause {{
+                        .*, reasoning_embedding: null, fast_rp_embedding: null, distance: distance
+                    }} AS decision
                     ORDER BY distance
                     """,
                     {"decision_id": decision_id},
@@ -483,7 +588,9 @@ class ContextGraphClient:
                     MATCH (d:Decision {{id: $decision_id}})
                     MATCH path = (d)-[:CAUSED|INFLUENCED*1..{depth}]->(effect:Decision)
                     WITH effect, length(path) AS distance
-                    RETURN effect {{.*, distance: distance}} AS decision
+                    RETURN effect {{
+                        .*, reasoning_embedding: null, fast_rp_embedding: null, distance: distance
+                    }} AS decision
                     ORDER BY distance
                     """,
                     {"decision_id": decision_id},
@@ -510,13 +617,41 @@ class ContextGraphClient:
                 f"""
                 MATCH (p:Policy)
                 {category_filter}
-                RETURN p {{.*}} AS policy
+                RETURN p {{.*, description_embedding: null}} AS policy
                 ORDER BY p.name
                 """,
                 {"category": category},
             )
             return [record["policy"] for record in result]
 
+    def get_policies_by_name(
+        self, search_words: list[str], category: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Find policies whose name contains any of the search words.
+
+        Returns {"policy", "relevance_score"} dicts ordered by how many words matched,
+        so only matching policies are sent back from the database.
+        """
+        if not search_words:
+            return []
+
+        category_filter = "AND p.category = $category" if category else ""
+
+        with self.driver.session(database=self.database) as session:
+            result = session.run(
+                f"""
+                MATCH (p:Policy)
+                WHERE p.name IS NOT NULL {category_filter}
+                WITH p, size([word IN $words WHERE toLower(p.name) CONTAINS word]) AS score
+                WHERE score > 0
+                RETURN p {{.*, description_embedding: null}} AS policy, score AS relevance_score
+                ORDER BY relevance_score DESC, p.name
+                """,
+                {"words": [word.lower() for word in search_words], "category": category},
+            )
+            return [record.data() for record in result]
+
     def get_policy(self, policy_id: str) -> Optional[dict]:
         """Get a policy by ID."""
         with self.driver.session(database=self.database) as session:
@@ -526,6 +661,7 @@ class ContextGraphClient:
                 OPTIONAL MATCH (d:Decision)-[:APPLIED_POLICY]->(p)
                 RETURN p {
                     .*,
+                    description_embedding: null,
                     usage_count: count(d)
                 } AS policy
                 """,
@@ -585,35 +721,58 @@ class ContextGraphClient:
             if not record:
                 return GraphData(nodes=[], relationships=[])
 
-            nodes = []
-            seen_node_ids = set()
-            for node in record["nodes"] or []:
-                if node and node.element_id not in seen_node_ids:
-                    seen_node_ids.add(node.element_id)
-                    nodes.append(
-                        GraphNode(
-                            id=str(node.element_id),
-                            labels=list(node.labels),
-                            properties=convert_node_properties(dict(node)),
-                        )
-                    )
+            return build_graph_data(record["nodes"], record["relationships"])
 
-            relationships = []
-            seen_rel_ids = set()
-            for rel in record["relationships"] or []:
-                if rel is not None and rel.element_id not in seen_rel_ids:
-                    seen_rel_ids.add(rel.element_id)
-                    relationships.append(
-                        GraphRelationship(
-                            id=str(rel.element_id),
-                            type=rel.type,
-                            start_node_id=str(rel.start_node.element_id),
-                            end_node_id=str(rel.end_node.element_id),
-                            properties=convert_node_properties(dict(rel)),
-                        )
-                    )
+    def get_graph_view(self, center_node_id: str, limit: int = 30) -> dict:
+        """
+        Get the 2-hop subgraph around a node, already projected into the tool/NVL shape.
+
+        Raises ContextGraphNotFound if no node has the given id or element id.
 
-            return GraphData(nodes=nodes, relationships=relationships)
+        Nodes and relationships come back from Cypher as plain maps
+        ({id, labels, properties} / {id, type, startNodeId, endNodeId, properties}),
+        deduplicated and with relationships restricted to the returned nodes, so
+        no GraphNode/GraphRelationship objects are built per record.
+        """
+        with self.driver.session(database=self.database) as session:
+            result = session.run(
+                """
+                MATCH (center)
+                WHERE center.id = $center_id OR elementId(center) = $center_id
+                OPTIONAL MATCH (center)-[r1:!HAS_SIMILAR_FACTORS&!BELONGS_TO_DECISION_COMMUNITY&!BELONGS_TO_ACCOUNT_COMMUNITY]-(n1)
+                OPTIONAL MATCH (n1)-[r2:!HAS_SIMILAR_FACTORS&!BELONGS_TO_DECISION_COMMUNITY&!BELONGS_TO_ACCOUNT_COMMUNITY]-(n2) WHERE n2 <> center
+                WITH center,
+                     collect(DISTINCT n1) + collect(DISTINCT n2) AS connectedNodes,
+                     collect(DISTINCT r1) + collect(DISTINCT r2) AS allRels
+                WITH [center] + reduce(
+                         acc = [], n IN connectedNodes | CASE WHEN n IN acc THEN acc ELSE acc + n END
+                     )[0..$limit] AS nodes,
+                     allRels
+                RETURN [n IN nodes | {
+                           id: elementId(n),
+                           labels: labels(n),
+                           properties: n {
+                               .*,
+                               fast_rp_embedding: null,
+                               reasoning_embedding: null,
+                               description_embedding: null,
+                               embedding: null
+                           }
+                       }] AS nodes,
+                       [r IN allRels WHERE startNode(r) IN nodes AND endNode(r) IN nodes | {
+                           id: elementId(r),
+                           type: type(r),
+                           startNodeId: elementId(startNode(r)),
+                           endNodeId: elementId(endNode(r)),
+                           properties: properties(r)
+                       }] AS relationships
+                """,
+                {"center_id": center_node_id, "limit": limit},
+            )
+            record = result.single()
+            if not record:
+                raise ContextGraphNotFound(f"No node found with id {center_node_id}")
+            return {"nodes": record["nodes"], "relationships": record["relationships"]}
 
     def get_connected_nodes(
         self,
@@ -638,35 +797,7 @@ class ContextGraphClient:
             if not record:
                 return GraphData(nodes=[], relationships=[])
 
-            nodes = []
-            seen_node_ids = set()
-            for node in record["nodes"] or []:
-                if node and node.element_id not in seen_node_ids:
-                    seen_node_ids.add(node.element_id)
-                    nodes.append(
-                        GraphNode(
-                            id=str(node.element_id),
-                            labels=list(node.labels),
-                            properties=convert_node_properties(dict(node)),
-                        )
-                    )
-
-            relationships = []
-            seen_rel_ids = set()
-            for rel in record["relationships"] or []:
-                if rel is not None and rel.element_id not in seen_rel_ids:
-                    seen_rel_ids.add(rel.element_id)
-                    relationships.append(
-                        GraphRelationship(
-                            id=str(rel.element_id),
-                            type=rel.type,
-                            start_node_id=str(rel.start_node.element_id),
-                            end_node_id=str(rel.end_node.element_id),
-                            properties=convert_node_properties(dict(rel)),
-                        )
-                    )
-
-            return GraphData(nodes=nodes, relationships=relationships)
+            return build_graph_data(record["nodes"], record["relationships"])
 
     def get_relationships_between_nodes(
         self,
@@ -748,14 +879,20 @@ class ContextGraphClient:
     # ============================================
 
     def execute_cypher(self, cypher: str, parameters: dict = None) -> list[dict]:
-        """Execute a read-only Cypher query."""
+        """
+        Execute a read-only Cypher query.
+
+        Raises CypherValidationError if the query is empty or contains a write keyword.
+        """
         # Basic safety check - only allow read operations
         cypher_upper = cypher.upper().strip()
+        if not cypher_upper:
+            raise CypherValidationError("Query is empty")
         if any(
             keyword in cypher_upper
             for keyword in ["CREATE", "MERGE", "DELETE", "SET", "REMOVE", "DROP"]
         ):
-            raise ValueError("Only read operations are allowed")
+            raise CypherValidationError("Only read operations are allowed")
 
         with self.driver.session(database=self.database) as session:
             result = session.run(cypher, parameters or {})
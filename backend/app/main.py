@@ -3,13 +3,14 @@ FastAPI application for the Context Graph demo.
 Provides REST API endpoints for the frontend and agent interactions.
 """
 
-import json
 import logging
 import traceback
 import uuid
 from contextlib import asynccontextmanager
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 
+import orjson
 from fastapi import FastAPI, HTTPException
 
 # Configure logging
@@ -19,11 +20,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response
 from sse_starlette.sse import EventSourceResponse
 
-from .agent import ContextGraphAgent
-from .agent_bedrock import ContextGraphAgentBedrock
 from .config import config
 from .context_graph_client import context_graph_client
 from .gds_client import gds_client
@@ -36,6 +35,44 @@ from .models import (
 from .vector_client import vector_client
 
 
+class _OrjsonResponse(JSONResponse):
+    """JSON response encoded with orjson, the default for all API routes."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def _sse_frame(event: str, payload: Any) -> bytes:
+    """
+    Build a complete SSE frame with a JSON payload.
+
+    EventSourceResponse sends bytes as-is, so frames skip its per-event
+    ServerSentEvent encoding. orjson escapes newlines, so the data is one line.
+    """
+    data = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return b"event: " + event.encode() + b"\r\ndata: " + data + b"\r\n\r\n"
+
+
+@lru_cache(maxsize=1)
+def get_agent_class() -> type:
+    """
+    Import only the agent implementation selected by USE_BEDROCK.
+
+    Deferred to the first chat request so a deployment does not build the other
+    backend's tool tables and clients at startup.
+    """
+    if config.use_bedrock:
+        from .agent_bedrock import ContextGraphAgentBedrock
+
+        return ContextGraphAgentBedrock
+
+    from .agent import ContextGraphAgent
+
+    return ContextGraphAgent
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
@@ -68,6 +105,10 @@ async def lifespan(app: FastAPI):
     if gds_client:
         gds_client.close()
     vector_client.close()
+    if config.use_bedrock:
+        from .bedrock_agent import close_shared_clients
+
+        await close_shared_clients()
 
 
 app = FastAPI(
@@ -75,6 +116,7 @@ app = FastAPI(
     description="Decision traces for AI agents using Neo4j",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=_OrjsonResponse,
 )
 
 # CORS middleware for frontend
@@ -130,8 +172,7 @@ async def chat(request: ChatRequest):
         ]
 
         logger.info(f"Creating agent (Bedrock: {config.use_bedrock})...")
-        AgentClass = ContextGraphAgentBedrock if config.use_bedrock else ContextGraphAgent
-        async with AgentClass() as agent:
+        async with get_agent_class()() as agent:
             logger.info("Agent connected, sending query...")
             result = await agent.query(request.message, conversation_history=history)
             logger.info("Query completed successfully")
@@ -166,8 +207,7 @@ async def chat_stream(request: ChatRequest):
             ]
 
             logger.info(f"Creating agent for streaming (Bedrock: {config.use_bedrock})...")
-            AgentClass = ContextGraphAgentBedrock if config.use_bedrock else ContextGraphAgent
-            async with AgentClass() as agent:
+            async with get_agent_class()() as agent:
                 logger.info("Agent connected, starting stream...")
 
                 # Use an async queue to enable keep-alive pings during long operations
@@ -203,62 +243,38 @@ async def chat_stream(request: ChatRequest):
 
                             # Send different event types
                             if event["type"] == "agent_context":
-                                yield {
-                                    "event": "agent_context",
-                                    "data": json.dumps(event["context"]),
-                                }
+                                yield _sse_frame("agent_context", event["context"])
                             elif event["type"] == "text":
-                                yield {
-                                    "event": "text",
-                                    "data": json.dumps({"content": event["content"]}),
-                                }
+                                yield _sse_frame("text", {"content": event["content"]})
                             elif event["type"] == "tool_use":
                                 logger.info(f"Tool use: {event['name']}")
-                                yield {
-                                    "event": "tool_use",
-                                    "data": json.dumps(
-                                        {
-                                            "name": event["name"],
-                                            "input": event.get("input", {}),
-                                        }
-                                    ),
-                                }
+                                yield _sse_frame(
+                                    "tool_use",
+                                    {"name": event["name"], "input": event.get("input", {})},
+                                )
                             elif event["type"] == "tool_result":
                                 logger.info(f"Tool result: {event['name']}")
-                                yield {
-                                    "event": "tool_result",
-                                    "data": json.dumps(
-                                        {
-                                            "name": event["name"],
-                                            "output": event.get("output"),
-                                        }
-                                    ),
-                                }
+                                yield _sse_frame(
+                                    "tool_result",
+                                    {"name": event["name"], "output": event.get("output")},
+                                )
                             elif event["type"] == "done":
                                 logger.info("Stream completed successfully")
-                                yield {
-                                    "event": "done",
-                                    "data": json.dumps(
-                                        {
-                                            "session_id": session_id,
-                                            "tool_calls": event.get("tool_calls", []),
-                                            "decisions_made": event.get("decisions_made", []),
-                                        }
-                                    ),
-                                }
+                                yield _sse_frame(
+                                    "done",
+                                    {
+                                        "session_id": session_id,
+                                        "tool_calls": event.get("tool_calls", []),
+                                        "decisions_made": event.get("decisions_made", []),
+                                    },
+                                )
                             elif event["type"] == "error":
                                 logger.error(f"Agent error: {event.get('error')}")
-                                yield {
-                                    "event": "error",
-                                    "data": json.dumps({"error": event.get("error")}),
-                                }
+                                yield _sse_frame("error", {"error": event.get("error")})
 
                         except asyncio.TimeoutError:
                             # Send keep-alive ping to prevent connection timeout
-                            yield {
-                                "event": "ping",
-                                "data": json.dumps({"keepalive": True}),
-                            }
+                            yield _sse_frame("ping", {"keepalive": True})
                 finally:
                     # Ensure the agent task is cleaned up
                     if not agent_task.done():
@@ -270,10 +286,7 @@ async def chat_stream(request: ChatRequest):
 
         except Exception as e:
             logger.error(f"Stream error: {traceback.format_exc()}")
-            yield {
-                "event": "error",
-                "data": json.dumps({"error": str(e)}),
-            }
+            yield _sse_frame("error", {"error": str(e)})
 
     return EventSourceResponse(event_generator(), ping=20)
 
@@ -437,6 +450,16 @@ async def get_policy(policy_id: str):
 # ============================================
 
 
+def _graph_response(graph: GraphData) -> Response:
+    """
+    Send graph data serialized once by pydantic-core.
+
+    Returning the model would make FastAPI validate and serialize it again
+    against response_model, which is costly for large graphs.
+    """
+    return Response(content=graph.model_dump_json(by_alias=True), media_type="application/json")
+
+
 @app.get("/api/graph", response_model=GraphData)
 async def get_graph(
     center_node_id: Optional[str] = None,
@@ -454,7 +477,7 @@ async def get_graph(
             include_decisions=include_decisions,
             limit=limit,
         )
-        return graph
+        return _graph_response(graph)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -474,7 +497,7 @@ async def expand_node(node_id: str, limit: int = 50):
     """Get all nodes connected to a given node (for graph expansion on double-click)."""
     try:
         graph = context_graph_client.get_connected_nodes(node_id=node_id, limit=limit)
-        return graph
+        return _graph_response(graph)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
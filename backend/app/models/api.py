@@ -5,7 +5,10 @@ Pydantic models for API requests and responses.
 from datetime import datetime
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# API models are only read once built, so they are frozen
+_FROZEN = ConfigDict(frozen=True)
 
 
 class ConversationMessage(BaseModel):
@@ -14,6 +17,8 @@ class ConversationMessage(BaseModel):
     role: str  # 'user' or 'assistant'
     content: str
 
+    model_config = _FROZEN
+
 
 class ChatRequest(BaseModel):
     """Request to send a message to the AI agent."""
@@ -22,6 +27,8 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = None
     conversation_history: list[ConversationMessage] = Field(default_factory=list)
 
+    model_config = _FROZEN
+
 
 class ToolCall(BaseModel):
     """Record of a tool call made by the agent."""
@@ -30,6 +37,8 @@ class ToolCall(BaseModel):
     input: dict[str, Any] = Field(default_factory=dict)
     output: Optional[Any] = None
 
+    model_config = _FROZEN
+
 
 class ChatResponse(BaseModel):
     """Response from the AI agent."""
@@ -39,6 +48,8 @@ class ChatResponse(BaseModel):
     tool_calls: list[ToolCall] = Field(default_factory=list)
     decisions_made: list[str] = Field(default_factory=list)  # Decision IDs
 
+    model_config = _FROZEN
+
 
 class DecisionRequest(BaseModel):
     """Request to record a new decision."""
@@ -53,6 +64,8 @@ class DecisionRequest(BaseModel):
     precedent_ids: list[str] = Field(default_factory=list)
     confidence_score: float = Field(default=0.8, ge=0.0, le=1.0)
 
+    model_config = _FROZEN
+
 
 class GraphNode(BaseModel):
     """A node in the graph for visualization."""
@@ -61,6 +74,8 @@ class GraphNode(BaseModel):
     labels: list[str]
     properties: dict[str, Any]
 
+    model_config = _FROZEN
+
 
 class GraphRelationship(BaseModel):
     """A relationship in the graph for visualization."""
@@ -71,7 +86,7 @@ class GraphRelationship(BaseModel):
     end_node_id: str = Field(alias="endNodeId", serialization_alias="endNodeId")
     properties: dict[str, Any] = Field(default_factory=dict)
 
-    model_config = {"populate_by_name": True}
+    model_config = ConfigDict(frozen=True, populate_by_name=True)
 
 
 class GraphData(BaseModel):
@@ -80,7 +95,7 @@ class GraphData(BaseModel):
     nodes: list[GraphNode]
     relationships: list[GraphRelationship]
 
-    model_config = {"by_alias": True}
+    model_config = _FROZEN
 
 
 class CustomerSearchResult(BaseModel):
@@ -93,6 +108,8 @@ class CustomerSearchResult(BaseModel):
     account_count: int = 0
     decision_count: int = 0
 
+    model_config = _FROZEN
+
 
 class FraudPattern(BaseModel):
     """Detected fraud pattern."""
@@ -103,6 +120,8 @@ class FraudPattern(BaseModel):
     risk_indicators: list[str] = Field(default_factory=list)
     similar_fraud_cases: list[str] = Field(default_factory=list)
 
+    model_config = _FROZEN
+
 
 class EntityMatch(BaseModel):
     """Potential duplicate entity match."""
@@ -114,6 +133,8 @@ class EntityMatch(BaseModel):
     similarity_score: float
     match_reasons: list[str] = Field(default_factory=list)
 
+    model_config = _FROZEN
+
 
 class CommunityInfo(BaseModel):
     """Information about a decision community."""
@@ -123,3 +144,5 @@ class CommunityInfo(BaseModel):
     decision_types: list[str]
     categories: list[str]
     top_decisions: list[str] = Field(default_factory=list)
+
+    model_config = _FROZEN
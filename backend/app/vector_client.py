@@ -3,14 +3,19 @@ Neo4j vector search client.
 Handles semantic similarity using text embeddings and hybrid search.
 """
 
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 from neo4j import GraphDatabase
 from openai import OpenAI
 
-from .bedrock_client import BedrockEmbeddingsClient
 from .config import config
 
+# Number of text embeddings kept in memory, so repeated (e.g. templated) texts skip the API
+EMBEDDING_CACHE_SIZE = 4096
+
 
 class VectorClient:
     """Neo4j vector search client for semantic similarity."""
@@ -23,12 +28,18 @@ class VectorClient:
         self.database = config.neo4j.database
         
         if config.use_bedrock:
+            # Imported here so OpenAI deployments never load boto3/botocore
+            from .bedrock_client import BedrockEmbeddingsClient
+
             self.bedrock_client = BedrockEmbeddingsClient(
                 region_name=config.bedrock.region_name,
                 model_id=config.bedrock.embedding_model_id,
                 aws_access_key_id=config.bedrock.aws_access_key_id,
                 aws_secret_access_key=config.bedrock.aws_secret_access_key,
                 aws_session_token=config.bedrock.aws_session_token,
+                boto3_session=config.boto3_session,
+                max_concurrency=config.bedrock.max_concurrency,
+                requests_per_second=config.bedrock.requests_per_second or None,
             )
             self.openai_client = None
             self.embedding_model = config.bedrock.embedding_model_id
@@ -41,6 +52,10 @@ class VectorClient:
             self.embedding_model = config.openai.embedding_model
             self.embedding_dimensions = config.openai.embedding_dimensions
 
+        # LRU of embeddings keyed by a blake2b digest of the text
+        self._embedding_cache: OrderedDict[bytes, list[float]] = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+
     def close(self):
         self.driver.close()
 
@@ -49,7 +64,31 @@ class VectorClient:
     # ============================================
 
     def generate_embedding(self, text: str) -> list[float]:
-        """Generate an embedding for the given text using OpenAI or Bedrock."""
+        """
+        Generate an embedding for the given text using OpenAI or Bedrock.
+
+        Results are cached per exact text, so the returned vector must not be modified.
+        Bedrock returns a float32 numpy array; the Neo4j driver accepts either as a parameter.
+        """
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._embedding_cache_lock:
+            embedding = self._embedding_cache.get(key)
+            if embedding is not None:
+                self._embedding_cache.move_to_end(key)
+                return embedding
+
+        embedding = self._generate_embedding(text)
+        if hasattr(embedding, "setflags"):
+            embedding.setflags(write=False)
+
+        with self._embedding_cache_lock:
+            self._embedding_cache[key] = embedding
+            if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        return embedding
+
+    def _generate_embedding(self, text: str) -> list[float]:
+        """Call the configured embedding API for a single text."""
         if config.use_bedrock:
             if not self.bedrock_client:
                 raise ValueError("Bedrock client not configured")
@@ -315,14 +354,19 @@ Neo4j vector search client.
 Handles semantic similarity using text embeddings and hybrid search.
 """
 
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 from neo4j import GraphDatabase
 from openai import OpenAI
 
-from .bedrock_client import BedrockEmbeddingsClient
 from .config import config
 
+# Number of text embeddings kept in memory, so repeated (e.g. templated) texts skip the API
+EMBEDDING_CACHE_SIZE = 4096
+
 
 class VectorClient:
     """Neo4j vector search client for semantic similarity."""
@@ -335,12 +379,18 @@ class VectorClient:
         self.database = config.neo4j.database
         
         if config.use_bedrock:
+            # Imported here so OpenAI deployments never load boto3/botocore
+            from .bedrock_client import BedrockEmbeddingsClient
+
             self.bedrock_client = BedrockEmbeddingsClient(
                 region_name=config.bedrock.region_name,
                 model_id=config.bedrock.embedding_model_id,
                 aws_access_key_id=config.bedrock.aws_access_key_id,
                 aws_secret_access_key=config.bedrock.aws_secret_access_key,
                 aws_session_token=config.bedrock.aws_session_token,
+                boto3_session=config.boto3_session,
+                max_concurrency=config.bedrock.max_concurrency,
+                requests_per_second=config.bedrock.requests_per_second or None,
             )
             self.openai_client = None
             self.embedding_model = config.bedrock.embedding_model_id
@@ -353,6 +403,10 @@ class VectorClient:
             self.embedding_model = config.openai.embedding_model
             self.embedding_dimensions = config.openai.embedding_dimensions
 
+        # LRU of embeddings keyed by a blake2b digest of the text
+        self._embedding_cache: OrderedDict[bytes, list[float]] = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+
     def close(self):
         self.driver.close()
 
@@ -361,7 +415,31 @@ class VectorClient:
     # ============================================
 
     def generate_embedding(self, text: str) -> list[float]:
-        """Generate an embedding for the given text using OpenAI or Bedrock."""
+        """
+        Generate an embedding for the given text using OpenAI or Bedrock.
+
+        Results are cached per exact text, so the returned vector must not be modified.
+        Bedrock returns a float32 numpy array; the Neo4j driver accepts either as a parameter.
+        """
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._embedding_cache_lock:
+            embedding = self._embedding_cache.get(key)
+            if embedding is not None:
+                self._embedding_cache.move_to_end(key)
+                return embedding
+
+        embedding = self._generate_embedding(text)
+        if hasattr(embedding, "setflags"):
+            embedding.setflags(write=False)
+
+        with self._embedding_cache_lock:
+            self._embedding_cache[key] = embedding
+            if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        return embedding
+
+    def _generate_embedding(self, text: str) -> list[float]:
+        """Call the configured embedding API for a single text."""
         if config.use_bedrock:
             if not self.bedrock_client:
                 raise ValueError("Bedrock client not configured")